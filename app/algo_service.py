@@ -1,27 +1,83 @@
+import asyncio
+import base64
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from algosdk import encoding, mnemonic
 from algosdk.error import AlgodHTTPError
 from algosdk.future.transaction import (ApplicationOptInTxn, AssetConfigTxn,
-                                        AssetTransferTxn, PaymentTxn)
+                                        AssetTransferTxn, PaymentTxn,
+                                        assign_group_id)
 from algosdk.v2client import algod
 from dotenv import load_dotenv
-from utils.constants import MIN_PARTICIPATION_AMOUNT, USDC_ID
-from utils.types import (AssetLog, InvalidAssetIDException, NewLogAssetInput,
-                         ProfileUpdate, UnlockedAccount)
-from utils.utils import (call_app, check_registrar_field_match,
-                         get_arc3_nft_metadata, get_created_asset,
-                         read_global_state, wait_for_confirmation)
+from starlette.concurrency import run_in_threadpool
+from utils.accounts import AccountInfoCache, txn_addresses
+from utils.app_state import REGISTRAR_KEY, GlobalStateCache, state_address
+from utils.assets import CreatedAssetRegistry, asset_params_from_txn
+from utils.async_algod import AsyncAlgodClient
+from utils.blocks import BlockSource
+from utils.confirmations import ConfirmationEngine
+from utils.constants import MAX_GROUP_SIZE, MIN_PARTICIPATION_AMOUNT, USDC_ID
+from utils.logger import get_logger
+from utils.metrics import InstrumentedAlgod
+from utils.note_index import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NoteIndex,
+                              NoteIndexer, decode_cursor, encode_cursor)
+from utils.notes import (NOTE_PREFIX, NoteFormat, decode_note, decode_notes,
+                         encode_note, split_note)
+from utils.params import SuggestedParamsProvider
+from utils.profiles import (PROFILE_PAGE_SIZE, ProfileIndexer, ProfileTable,
+                            credit_fields)
+from utils.rounds import RoundFollower
+from utils.signing import SIGNING_PROCESSES, SigningPool, sign_transactions
+from utils.tracing import span
+from utils.tracker import (TX_UNKNOWN, TransactionTracker,
+                           status_from_pending_info)
+from utils.types import (AssetLog, AssetLogEntry, InvalidAssetIDException,
+                         InvalidCursorException,
+                         InvalidTransactionSpecException, LogTooLargeException,
+                         NewLogAssetInput, OptInQuery, ProfileUpdate,
+                         UnlockedAccount, UnsignedTransactionSpec,
+                         UnsignedTransactionType)
+from utils.utils import (call_app, call_app_async, check_registrar_field_match,
+                         find_asset_holding, get_arc3_nft_metadata,
+                         get_arc3_nft_metadata_batch, is_opted_in_to_app,
+                         is_opted_in_to_asset, parse_local_state,
+                         sign_and_send_tx_async)
 
 load_dotenv()
 
 
+logger = get_logger(__name__)
+
 APP_PREFIX = "arboreum/v1:j"
 
+# number of transaction groups the sync AlgoService submits and waits for concurrently
+MAX_PARALLEL_GROUPS = 8
+# number of transaction groups the AsyncAlgoService keeps in flight (submitted but not yet confirmed) when minting
+# or writing a batch of logs
+MAX_GROUPS_IN_FLIGHT = 32
+# most entries per log batch (POST /v1/log/batch)
+MAX_LOG_BATCH_ENTRIES = 1024
+# number of accounts fetched concurrently for bulk state-lookups
+MAX_PARALLEL_ACCOUNT_FETCHES = 16
+# most queries per bulk opt-in check (POST /v1/state/optIn needs no auth, every distinct address is fetched at algod)
+MAX_OPT_IN_QUERIES = 256
+# number of transactions looked up at algod concurrently for bulk status-requests
+MAX_PARALLEL_STATUS_LOOKUPS = 16
+
 # return 31566704
 
 
+def _repeat_lease(repeat: int) -> Optional[bytes]:
+    """
+    a (random) lease telling the `repeat`-th copy of an otherwise identical transaction apart, None for the first one.
+    Unlike moving the validity window this works for any number of copies.
+    """
+    return os.urandom(32) if repeat else None
+
+
 class AlgoService:
     def __init__(
         self,
@@ -40,29 +96,131 @@ class AlgoService:
         """
         self.net = net_name
         headers = {"X-API-Key": algod_token}
-        self.algod_client = algod.AlgodClient(algod_token, algod_address, headers)
+        # every algod call is timed into the algod_request_duration_seconds histogram (see /metrics)
+        self.algod_client = InstrumentedAlgod(algod.AlgodClient(algod_token, algod_address, headers))
         # self.indexer = indexer.IndexerClient(indexer_token, indexer_address)
         self.master_account = UnlockedAccount(
             public_key=mnemonic.to_public_key(master_mnemonic), private_key=mnemonic.to_private_key(master_mnemonic)
         )
-        print("master account", self.master_account.public_key)
         self.clawback_account = self.master_account
         self.profile_contract_id = profile_contract_id
 
-        # verify that master_account is the registrar-address by reading global state of profile-contract
-        global_master_state = read_global_state(self.algod_client, self.master_account.public_key, profile_contract_id)
+        # background components driven by new rounds, started/stopped together with the service (see start/stop)
+        self.round_follower = RoundFollower(self.algod_client)
+        self.params = SuggestedParamsProvider(self.algod_client)
+        self.round_follower.subscribe(self.params.on_round)
+        self.assets = CreatedAssetRegistry(self.algod_client, self.master_account.public_key)
+        self.round_follower.subscribe(self.assets.on_round)
+        self.accounts = AccountInfoCache(self.algod_client)
+        self.round_follower.subscribe(self.accounts.on_round)
+        self.blocks = BlockSource(self.algod_client)
+        self.confirmations = ConfirmationEngine(self.algod_client, self.round_follower, self.blocks)
+        self.round_follower.subscribe(self.confirmations.on_round)
+        # the local indexes are files that outlive the service, they are emptied if they belong to another network
+        genesis_hash = self.params.get().gh
+        self.note_index = NoteIndex()
+        self.note_index.bind_to_chain(genesis_hash)
+        self.note_indexer = NoteIndexer(
+            self.note_index, self.blocks, NOTE_PREFIX, senders={self.clawback_account.public_key}
+        )
+        self.round_follower.subscribe(self.note_indexer.on_round)
+        self.global_state = GlobalStateCache(
+            self.algod_client, self.profile_contract_id, self.blocks, on_change=self._on_global_state_change
+        )
+        self.round_follower.subscribe(self.global_state.on_round)
+        self.profiles = ProfileTable()
+        self.profiles.bind_to_chain(genesis_hash)
+        self.profile_indexer = ProfileIndexer(self.profiles, self.blocks, self.profile_contract_id)
+        self.round_follower.subscribe(self.profile_indexer.on_round)
+        # signs bulk operations in worker processes (all our transactions are signed by the master/clawback account)
+        self.signer = SigningPool(self.clawback_account.private_key) if SIGNING_PROCESSES else None
+
+        self.verify_registrar()
+        logger.info(
+            "connected to node",
+            extra={"net": self.net, "algod_address": algod_address, "master_account": self.master_account.public_key},
+        )
+
+    def verify_registrar(self, fresh: bool = False):
+        """
+        verify that master_account is the registrar-address by reading global state of profile-contract.
+        fresh: read it from algod instead of the cache (which is only refreshed by the round-follower)
+        """
+        try:
+            if fresh:
+                self.global_state.load()
+            global_master_state = self.global_state.get()
+        except AlgodHTTPError as e:
+            raise AssertionError(f"could not read global state of profile app {self.profile_contract_id}: {e}")
         if not check_registrar_field_match(global_master_state, self.master_account.public_key):
             raise AssertionError("master-account is not registered as registrar of profile app")
-        print(f"successfully connected to {self.net} @ {algod_address}")
+
+    def _on_global_state_change(self, changed, previous, current):
+        """ alert on a registrar change right away instead of failing the next registrar-check """
+        if REGISTRAR_KEY in changed:
+            logger.error(
+                "ALERT: registrar of profile app changed",
+                extra={
+                    "app_id": self.profile_contract_id,
+                    "previous_registrar": state_address(previous, REGISTRAR_KEY),
+                    "registrar": state_address(current, REGISTRAR_KEY),
+                    "master_account": self.master_account.public_key,
+                },
+            )
+
+    def start(self):
+        self.assets.load()
+        self.note_indexer.start()
+        self.profile_indexer.start()
+        self.round_follower.start()
+
+    def stop(self):
+        self.round_follower.stop()
+        self.note_indexer.stop()
+        self.profile_indexer.stop()
+        if self.signer is not None:
+            self.signer.close()
 
     def create_new_asset(self, input: NewLogAssetInput):
         # Get network params for transactions before every transaction.
-        params = self.algod_client.suggested_params()
+        params = self.params.get()
+        with span("build_asset_txn"):
+            txn = self._new_asset_txn(input, params)
+        # Sign with secret key of creator
+        with span("sign", count=1):
+            stxn = txn.sign(self.master_account.private_key)
+
+        # Send the transaction to the network and retrieve the txid.
+        txid = self.algod_client.send_transaction(stxn)
+
+        # Retrieve the asset ID of the newly created asset by first
+        # ensuring that the creation transaction was confirmed,
+        # then grabbing the asset id from the transaction.
+
+        # Wait for the transaction to be confirmed
+        ptx = self.confirmations.wait(txid, txn.last_valid_round)
+        self.accounts.evict(self.master_account.public_key)
+
+        try:
+            # Pull account info for the creator
+            # account_info = algod_client.account_info(accounts[1]['pk'])
+            # get asset_id from tx (the txinfo of the confirmation holds it)
+            asset_id = ptx["asset-index"]
+            self.assets.add(asset_id, asset_params_from_txn(txn))
+            # print_created_asset(self.algod_client, self.master_account.public_key, asset_id)
+            # print_asset_holding(self.algod_client, self.master_account.public_key, asset_id)
+            return {"tx_id": txid, "asset_id": asset_id}
+        except Exception:
+            logger.exception("could not find created asset", extra={"txid": txid})
+            raise AssertionError(f"could not find created asset from tx {txid}")
+
+    def _new_asset_txn(self, input: NewLogAssetInput, params, metadata_hash: bytes = None, lease: bytes = None):
         # create object to conform to
 
         # sample_data = """{ "tenor_in_days": 90, "loan_id": "ll42", "principal": 200000, "apr": 0.13, "start_date": 1600942397, "invoices": ["35ce990e-d39c-4cb6-8335-eea9fc88d3fc", "75906861-abee-46c9-9a1b-56e65ddfa6f4"] }"""  # noqa: E501
         # metadata_hash = hash_str(sample_data)
-        metadata_hash = get_arc3_nft_metadata(name=input.asset_name, loan_data=input.loan_params.dict())
+        if metadata_hash is None:
+            metadata_hash = get_arc3_nft_metadata(name=input.asset_name, loan_data=input.loan_params.dict())
 
         txn = AssetConfigTxn(
             sender=self.master_account.public_key,
@@ -80,79 +238,357 @@ class AlgoService:
             metadata_hash=metadata_hash,
             url="",
             decimals=0,
+            lease=lease,
         )
-        # Sign with secret key of creator
-        stxn = txn.sign(self.master_account.private_key)
+        return txn
 
-        # Send the transaction to the network and retrieve the txid.
-        txid = self.algod_client.send_transaction(stxn)
+    def create_new_assets(self, inputs: List[NewLogAssetInput]):
+        """
+        mints the log-assets of many loans at once: the asset-config transactions are packed into atomic groups of
+        up to MAX_GROUP_SIZE transactions which are submitted and confirmed in parallel, instead of one round per
+        asset. Returns one result per input (in order), a failing group only fails the loans in it.
+        """
+        groups = self._signed_asset_groups(inputs, self.params.get())
 
-        # Retrieve the asset ID of the newly created asset by first
-        # ensuring that the creation transaction was confirmed,
-        # then grabbing the asset id from the transaction.
+        def submit(group):
+            txid = self.algod_client.send_transactions([stxn for _, stxn in group])
+            txinfo = self.confirmations.wait(txid, group[0][1].transaction.last_valid_round)
+            self.accounts.evict(self.master_account.public_key)
+            return self._register_created_assets(group, txinfo)
 
-        # Wait for the transaction to be confirmed
-        wait_for_confirmation(self.algod_client, txid)
+        with ThreadPoolExecutor(max_workers=min(len(groups), MAX_PARALLEL_GROUPS) or 1) as pool:
+            futures = [pool.submit(submit, group) for group in groups]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+        return self._asset_group_results(inputs, groups, outcomes)
 
-        try:
-            # Pull account info for the creator
-            # account_info = algod_client.account_info(accounts[1]['pk'])
-            # get asset_id from tx
-            # Get the new asset's information from the creator account
-            ptx = self.algod_client.pending_transaction_info(txid)
-            asset_id = ptx["asset-index"]
-            # print_created_asset(self.algod_client, self.master_account.public_key, asset_id)
-            # print_asset_holding(self.algod_client, self.master_account.public_key, asset_id)
-            return {"tx_id": txid, "asset_id": asset_id}
-        except Exception as e:
-            print(e)
-            raise AssertionError(f"could not find created asset from tx {txid}")
+    def _signed_asset_groups(self, inputs: List[NewLogAssetInput], params):
+        """ splits the asset-config transactions of the inputs into signed groups: [[(input_index, signed_txn)]] """
+        metadata_hashes = get_arc3_nft_metadata_batch([(i.asset_name, i.loan_params.dict()) for i in inputs])
+        groups, current, seen, repeats = [], [], set(), {}
+        for i, (input, metadata_hash) in enumerate(zip(inputs, metadata_hashes)):
+            txn = self._new_asset_txn(input, params, metadata_hash)
+            # the same loan twice would be the same transaction (txid) within a group, so it goes into the next one
+            txid = txn.get_txid()
+            if len(current) == MAX_GROUP_SIZE or txid in seen:
+                groups.append(current)
+                current, seen = [], set()
+            current.append((i, txn))
+            seen.add(txid)
+            # two groups of nothing but the same loan would be identical as well, repeats get a lease of their own
+            repeats[txid] = repeats.get(txid, -1) + 1
+            if repeats[txid]:
+                current[-1] = (i, self._new_asset_txn(input, params, metadata_hash, _repeat_lease(repeats[txid])))
+        if current:
+            groups.append(current)
+
+        # the signing pool holds the clawback key, which is the key of the master account
+        txns = [txn for group in groups for txn in assign_group_id([txn for _, txn in group])]
+        stxns = iter(sign_transactions(txns, self.master_account.private_key, self.signer))
+        return [[(i, next(stxns)) for i, _ in group] for group in groups]
+
+    def _register_created_assets(self, group, txinfo):
+        """
+        the ids of the assets created by a confirmed group, read from the apply-data in its block (one shared,
+        cached block-fetch instead of a pending_transaction_info per transaction)
+        """
+        round = txinfo["confirmed-round"]
+        created = {tx["txid"]: tx["stxn"].get("caid") for tx in self.blocks.transactions(round)}
+        asset_ids = []
+        for _, stxn in group:
+            asset_id = created.get(stxn.get_txid())
+            if asset_id is not None:
+                self.assets.add(asset_id, asset_params_from_txn(stxn.transaction))
+            asset_ids.append(asset_id)
+        return {"confirmed_round": round, "asset_ids": asset_ids}
+
+    def _asset_group_results(self, inputs: List[NewLogAssetInput], groups, outcomes):
+        results = [None] * len(inputs)
+        for group, outcome in zip(groups, outcomes):
+            group_id = base64.b64encode(group[0][1].transaction.group).decode("utf-8")
+            for position, (i, stxn) in enumerate(group):
+                result = {
+                    "loan_id": inputs[i].loan_params.loan_id,
+                    "asset_name": inputs[i].asset_name,
+                    "tx_id": stxn.get_txid(),
+                    "group_id": group_id,
+                }
+                if isinstance(outcome, Exception):
+                    result["error"] = str(outcome)
+                else:
+                    result["confirmed_round"] = outcome["confirmed_round"]
+                    result["asset_id"] = outcome["asset_ids"][position]
+                    if result["asset_id"] is None:
+                        result["error"] = f"could not find created asset from tx {result['tx_id']}"
+                results[i] = result
+        return results
 
     def get_created_asset(self, asset_id: int):
-        return get_created_asset(self.algod_client, self.master_account.public_key, asset_id)
+        return self.assets.get(asset_id)
 
     def get_created_assets(self):
-        account_info = self.algod_client.account_info(self.master_account.public_key)
-        return [a["index"] for a in account_info["created-assets"]]
+        return self.assets.asset_ids()
+
+    def get_asset_holding(self, address: str, asset_id: int):
+        return find_asset_holding(self.accounts.account_info(address), asset_id)
+
+    def get_asset_logs(self, asset_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+        """
+        the logs of an asset (in chain-order) from the local note index.
+        Pass `next_cursor` of a page as `cursor` to get the next one, it is None on the last page.
+        """
+        if not self.assets.contains(asset_id):
+            raise InvalidAssetIDException(f"assetId {asset_id} not known")
+        return self._asset_log_page(asset_id, cursor, limit)
+
+    def _asset_log_page(self, asset_id: int, cursor: str, limit: int):
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise InvalidCursorException(str(e))
+        limit = min(limit, MAX_PAGE_SIZE)
+        rows = self.note_index.query(asset_id, after, limit)
+        logs = [
+            {"tx_id": row["tx_id"], "round": row["round"], "log": log}
+            for row, log in zip(rows, decode_notes([row["note"] for row in rows]))
+            if log is not None
+        ]
+        # a full page might be followed by more
+        last = rows[-1] if len(rows) == limit else None
+        return {
+            "logs": logs,
+            "next_cursor": encode_cursor(last["round"], last["offset"]) if last else None,
+            "indexed_round": self.note_indexer.indexed_round,
+        }
+
+    def export_asset_logs(self, asset_ids: List[int] = None, min_round: int = None, max_round: int = None):
+        """
+        generator over all logs (of `asset_ids`, or of all assets) as newline-delimited json, one log per line.
+        Reads the note index in batches, so exports of any size run in constant memory.
+        """
+        for asset_id in asset_ids or []:
+            if not self.assets.contains(asset_id):
+                raise InvalidAssetIDException(f"assetId {asset_id} not known")
+        return self._asset_log_lines(asset_ids, min_round, max_round)
+
+    def _asset_log_lines(self, asset_ids: List[int], min_round: int, max_round: int):
+        for row in self.note_index.iter_notes(asset_ids, min_round, max_round):
+            log = decode_note(row["note"])
+            if log is None:
+                continue
+            # same (camelCase) keys as the json-responses
+            line = {"assetId": row["asset_id"], "txId": row["tx_id"], "round": row["round"], "log": log}
+            yield json.dumps(line) + "\n"
+
+    def has_opted_in_to_asset(self, address: str, asset_id: int):
+        return is_opted_in_to_asset(self.accounts.account_info(address), asset_id)
+
+    def has_opted_in_to_app(self, address: str):
+        return is_opted_in_to_app(self.accounts.account_info(address), self.profile_contract_id)
+
+    def read_local_state(self, address: str):
+        return parse_local_state(self.accounts.account_info(address), self.profile_contract_id)
+
+    def get_profile(self, address: str):
+        """
+        the credit profile of an address from the materialized profile table (None if it has none).
+        Until the table is seeded from the creation round of the contract, misses are read from the chain.
+        """
+        profile = self.profiles.get(address)
+        if profile is None and not self.profile_indexer.seeded:
+            profile = self._profile_from_account_info(address, self.accounts.account_info(address))
+        return profile
+
+    def _profile_from_account_info(self, address: str, info: Dict):
+        """ a profile-table row built from the local state in the account_info (None if not opted in) """
+        if not is_opted_in_to_app(info, self.profile_contract_id):
+            return None
+        state = parse_local_state(info, self.profile_contract_id)
+        return {"address": address, **credit_fields(state), "state": state, "round": info.get("round", 0)}
+
+    def query_profiles(self, loan_state: str = None, cursor: str = None, limit: int = PROFILE_PAGE_SIZE):
+        """ a page of credit profiles (with the given loanState), ordered by address, the cursor is the last address """
+        profiles = self.profiles.query(loan_state, cursor, limit)
+        next_cursor = profiles[-1]["address"] if len(profiles) == limit else None
+        return {"profiles": profiles, "next_cursor": next_cursor, "indexed_round": self.profile_indexer.indexed_round}
 
-    def asset_tx_with_log(self, asset_id: int, log: AssetLog):
+    def opt_in_statuses(self, queries: List[OptInQuery]):
+        """
+        opt-in status of many (address, asset_id) pairs (asset_id None: the profile-contract), in the order of the
+        queries. Every distinct account is fetched once, MAX_PARALLEL_ACCOUNT_FETCHES at a time.
+        """
+        addresses = list({q.address: None for q in queries})
+
+        def fetch(address):
+            try:
+                return self.accounts.account_info(address)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(len(addresses), MAX_PARALLEL_ACCOUNT_FETCHES) or 1) as pool:
+            infos = dict(zip(addresses, pool.map(fetch, addresses)))
+        return self._opt_in_statuses(queries, infos)
+
+    def _opt_in_statuses(self, queries: List[OptInQuery], infos: Dict):
+        results = []
+        for query in queries:
+            result = {"address": query.address, "asset_id": query.asset_id}
+            info = infos[query.address]
+            if isinstance(info, Exception):
+                result["error"] = str(info)
+            elif query.asset_id is None:
+                result["opted_in"] = is_opted_in_to_app(info, self.profile_contract_id)
+            else:
+                result["opted_in"] = is_opted_in_to_asset(info, query.asset_id)
+            results.append(result)
+        return results
+
+    def asset_tx_with_log(self, asset_id: int, log: AssetLog, note_format: NoteFormat = NoteFormat.json):
         """
         create a clawback transaction with 0 value from token holder itself
         attaching a piece of data to the note-field
         """
-        if asset_id not in self.get_created_assets():
+        if not self.assets.contains(asset_id):
             raise InvalidAssetIDException(f"assetId {asset_id} not known")
 
-        # create note with app-prefix according to note-field-conventions
-        note = (APP_PREFIX + json.dumps(log.dict())).encode()
+        params = self.params.get()
+        stxns = self._signed_log_txns(asset_id, log, params, note_format)
+        txid = self.algod_client.send_transactions(stxns)
+        tx_result = self.confirmations.wait(txid, params.last)
+        self.accounts.evict(*txn_addresses([stxn.transaction for stxn in stxns]))
+        return {"tx_id": txid, "data": tx_result}
+
+    def _log_txns(
+        self, asset_id: int, log: AssetLog, params, note_format: NoteFormat = NoteFormat.json, lease: bytes = None
+    ):
+        """
+        the log-transaction, or - for logs that do not fit into one note - one transaction per chunk of the note
+        (which have to be sent in one group). The lease goes on the first transaction only (a lease is exclusive).
+        """
+        # create note with app-prefix according to note-field-conventions (APP_PREFIX for json)
+        note = encode_note(log.dict(), note_format)
+        chunks = split_note(note)
+        if len(chunks) > MAX_GROUP_SIZE:
+            raise LogTooLargeException(
+                f"log of {len(note)} bytes does not fit into {MAX_GROUP_SIZE} transactions, try noteFormat=msgpack-zlib"
+            )
 
         # TODO parameterize this:
         token_holder = self.master_account.public_key
 
-        params = self.algod_client.suggested_params()
-        txn = AssetTransferTxn(
-            sender=self.clawback_account.public_key,
-            sp=params,
-            receiver=token_holder,
-            revocation_target=token_holder,
-            amt=0,
-            index=asset_id,
-            note=note,
-        )
+        return [
+            AssetTransferTxn(
+                sender=self.clawback_account.public_key,
+                sp=params,
+                receiver=token_holder,
+                revocation_target=token_holder,
+                amt=0,
+                index=asset_id,
+                note=chunk,
+                lease=lease if i == 0 else None,
+            )
+            for i, chunk in enumerate(chunks)
+        ]
 
-        stxn = txn.sign(self.clawback_account.private_key)
-        txid = self.algod_client.send_transaction(stxn)
-        tx_result = wait_for_confirmation(self.algod_client, txid)
-        return {"tx_id": txid, "data": tx_result}
+    def _signed_log_txns(self, asset_id: int, log: AssetLog, params, note_format: NoteFormat = NoteFormat.json):
+        with span("build_log_txns", asset_id=asset_id):
+            txns = self._log_txns(asset_id, log, params, note_format)
+        if len(txns) > 1:
+            txns = assign_group_id(txns)
+        with span("sign", count=len(txns)):
+            return [txn.sign(self.clawback_account.private_key) for txn in txns]
+
+    def asset_tx_with_logs(self, entries: List[AssetLogEntry], note_format: NoteFormat = NoteFormat.json):
+        """
+        writes many logs (for one or many assets) at once: the log-transactions are packed into atomic groups of
+        up to MAX_GROUP_SIZE transactions which are submitted and confirmed in parallel.
+        Returns one result per entry (in order), a failing group only fails its own entries.
+        """
+        for asset_id in {e.asset_id for e in entries}:
+            if not self.assets.contains(asset_id):
+                raise InvalidAssetIDException(f"assetId {asset_id} not known")
+
+        groups = self._signed_log_groups(entries, self.params.get(), note_format)
+
+        def submit(group):
+            txid = self.algod_client.send_transactions([stxn for _, stxn in group])
+            txinfo = self.confirmations.wait(txid, group[0][1].transaction.last_valid_round)
+            self.accounts.evict(*txn_addresses([stxn.transaction for _, stxn in group]))
+            return txinfo
+
+        with ThreadPoolExecutor(max_workers=min(len(groups), MAX_PARALLEL_GROUPS) or 1) as pool:
+            futures = [pool.submit(submit, group) for group in groups]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+        return self._group_results(entries, groups, outcomes)
+
+    def _signed_log_groups(self, entries: List[AssetLogEntry], params, note_format: NoteFormat = NoteFormat.json):
+        """
+        splits the entries into groups of signed log-transactions: [[(entry_index, signed_txn), ...], ...].
+        The chunks of a large log always end up in the same group.
+        """
+        groups, current, seen, repeats = [], [], set(), {}
+        for i, entry in enumerate(entries):
+            log = AssetLog(data=entry.data)
+            txns = self._log_txns(entry.asset_id, log, params, note_format)
+            keys = {(entry.asset_id, txn.note) for txn in txns}
+            # identical transactions would have the same txid within a group, so they go into the next one
+            if current and (len(current) + len(txns) > MAX_GROUP_SIZE or keys & seen):
+                groups.append(current)
+                current, seen = [], set()
+            # two groups of nothing but the same log would be identical as well, repeats get a lease of their own
+            repeat = repeats[frozenset(keys)] = repeats.get(frozenset(keys), -1) + 1
+            if repeat:
+                txns = self._log_txns(entry.asset_id, log, params, note_format, _repeat_lease(repeat))
+            current += [(i, txn) for txn in txns]
+            seen |= keys
+        if current:
+            groups.append(current)
+
+        txns = [txn for group in groups for txn in assign_group_id([txn for _, txn in group])]
+        stxns = iter(sign_transactions(txns, self.clawback_account.private_key, self.signer))
+        return [[(i, next(stxns)) for i, _ in group] for group in groups]
+
+    def _group_results(self, entries: List[AssetLogEntry], groups, outcomes):
+        results = [None] * len(entries)
+        for group, outcome in zip(groups, outcomes):
+            group_id = base64.b64encode(group[0][1].transaction.group).decode("utf-8")
+            for i, stxn in group:
+                if results[i] is not None:
+                    # further chunks of the same log
+                    continue
+                result = {"asset_id": entries[i].asset_id, "tx_id": stxn.get_txid(), "group_id": group_id}
+                if isinstance(outcome, Exception):
+                    result["error"] = str(outcome)
+                else:
+                    result["confirmed_round"] = outcome.get("confirmed-round")
+                results[i] = result
+        return results
 
     def clawback_asset_transfer(self, asset_id, target_address: str):
         """
         sending the token from the current holder to a new target
         eg, when the investor wants to hold the token themself
         """
-        if asset_id not in self.get_created_assets():
+        if not self.assets.contains(asset_id):
             raise InvalidAssetIDException(f"assetId {asset_id} not known")
 
+        params = self.params.get()
+        stxn = self._clawback_txn(asset_id, target_address, params).sign(self.clawback_account.private_key)
+        txid = self.algod_client.send_transaction(stxn)
+        tx_result = self.confirmations.wait(txid, params.last)
+        self.accounts.evict(*txn_addresses([stxn.transaction]))
+        return {"tx_id": txid, "data": tx_result}
+
+    def _clawback_txn(self, asset_id: int, target_address: str, params):
         log = {"purpose": "investor claims token"}
 
         # create note with app-prefix according to note-field-conventions
@@ -161,8 +597,7 @@ class AlgoService:
         # TODO parameterize this:
         token_holder = self.master_account.public_key
 
-        params = self.algod_client.suggested_params()
-        txn = AssetTransferTxn(
+        return AssetTransferTxn(
             sender=self.clawback_account.public_key,
             sp=params,
             receiver=target_address,
@@ -172,30 +607,55 @@ class AlgoService:
             note=note,
         )
 
-        stxn = txn.sign(self.clawback_account.private_key)
-        txid = self.algod_client.send_transaction(stxn)
-        tx_result = wait_for_confirmation(self.algod_client, txid)
-        return {"tx_id": txid, "data": tx_result}
-
     def create_opt_in_tx(self, asset_id: int, address: str):
-        params = self.algod_client.suggested_params()
-        txn = AssetTransferTxn(sender=address, sp=params, receiver=address, amt=0, index=asset_id)
-        py_enc_tx = encoding.msgpack_encode(txn)
-        # print('encoded', py_enc_tx)
-        return py_enc_tx
+        params = self.params.get()
+        return encoding.msgpack_encode(self._opt_in_txn(asset_id, address, params))
+
+    def _opt_in_txn(self, asset_id: int, address: str, params):
+        return AssetTransferTxn(sender=address, sp=params, receiver=address, amt=0, index=asset_id)
 
     def create_usdc_transfer(self, sender, receiver, amount):
-        params = self.algod_client.suggested_params()
+        params = self.params.get()
+        return encoding.msgpack_encode(self._usdc_transfer_txn(sender, receiver, amount, params))
+
+    def _usdc_transfer_txn(self, sender, receiver, amount, params):
         amount_with_decimals = amount * 10 ** 6
-        txn = AssetTransferTxn(sender=sender, sp=params, receiver=receiver, amt=amount_with_decimals, index=USDC_ID)
-        py_enc_tx = encoding.msgpack_encode(txn)
-        return py_enc_tx
+        return AssetTransferTxn(sender=sender, sp=params, receiver=receiver, amt=amount_with_decimals, index=USDC_ID)
 
     def create_opt_in_tx_to_profile_contract(self, address: str):
-        params = self.algod_client.suggested_params()
-        txn = ApplicationOptInTxn(sender=address, sp=params, index=self.profile_contract_id)
-        py_enc_tx = encoding.msgpack_encode(txn)
-        return py_enc_tx
+        params = self.params.get()
+        return encoding.msgpack_encode(self._profile_opt_in_txn(address, params))
+
+    def _profile_opt_in_txn(self, address: str, params):
+        return ApplicationOptInTxn(sender=address, sp=params, index=self.profile_contract_id)
+
+    def build_unsigned_txns(self, specs: List[UnsignedTransactionSpec], group: bool = False):
+        """
+        builds many unsigned transactions (opt-ins, usdc-transfers) for the frontend at once, from a single set of
+        suggested params. With group=True they get a common group-id and can only be confirmed together.
+        """
+        return self._unsigned_txns(specs, group, self.params.get())
+
+    def _unsigned_txns(self, specs: List[UnsignedTransactionSpec], group: bool, params):
+        if group and len(specs) > MAX_GROUP_SIZE:
+            raise InvalidTransactionSpecException(f"a group can not hold more than {MAX_GROUP_SIZE} transactions")
+        txns = [self._unsigned_txn(spec, params) for spec in specs]
+        group_id = None
+        if group and txns:
+            txns = assign_group_id(txns)
+            group_id = base64.b64encode(txns[0].group).decode("utf-8")
+        return {"blobs": [encoding.msgpack_encode(txn) for txn in txns], "group_id": group_id}
+
+    def _unsigned_txn(self, spec: UnsignedTransactionSpec, params):
+        if spec.type == UnsignedTransactionType.opt_in_asset:
+            if spec.asset_id is None:
+                raise InvalidTransactionSpecException("optInAsset needs an assetId")
+            return self._opt_in_txn(spec.asset_id, spec.address, params)
+        if spec.type == UnsignedTransactionType.usdc_transfer:
+            if spec.receiver is None or spec.amount is None:
+                raise InvalidTransactionSpecException("usdcTransfer needs a receiver and an amount")
+            return self._usdc_transfer_txn(spec.address, spec.receiver, spec.amount, params)
+        return self._profile_opt_in_txn(spec.address, params)
 
     def create_new_profile(self, input: ProfileUpdate):
         """
@@ -204,30 +664,46 @@ class AlgoService:
         TODO: only do so if there is not active/defaulted loan in the profile
         only allow doing so if its repaid
         """
-        borrower = input.user_address
-        borrower_metadata = json.dumps({"activeLoan": input.active_loan, "loanState": input.loan_state})
-
-        app_args = [b"new_profile", bytes(borrower_metadata, "utf-8")]
-        accounts = [borrower]
-
-        print("Issuing diploma for {}: {}".format(borrower, borrower_metadata))
-
+        app_args, accounts = self._new_profile_args(input)
         try:
             # Call application with the relevant arguments
             tx_id = call_app(
-                self.algod_client, self.master_account.private_key, self.profile_contract_id, app_args, accounts
+                self.algod_client,
+                self.master_account.private_key,
+                self.profile_contract_id,
+                app_args,
+                accounts,
+                params=self.params.get(),
+                confirmations=self.confirmations,
             )
+            self.accounts.evict(input.user_address)
             return True, tx_id
         except AlgodHTTPError as e:
             return False, str(e)
 
+    def _new_profile_args(self, input: ProfileUpdate):
+        borrower = input.user_address
+        borrower_metadata = json.dumps({"activeLoan": input.active_loan, "loanState": input.loan_state})
+
+        app_args = [b"new_profile", bytes(borrower_metadata, "utf-8")]
+        accounts = [borrower]
+
+        logger.info("issuing profile", extra={"address": borrower, "credit": borrower_metadata})
+        return app_args, accounts
+
     def update_profile(self, update: ProfileUpdate):
         pass
 
     def fund_account(self, receiver_address: str):
         """ this funds an account with the minimum amount of algos so that they can participate in the smart-contract"""
-        params = self.algod_client.suggested_params()
-        unsigned_txn = PaymentTxn(
+        params = self.params.get()
+        signed_txn = self._fund_txn(receiver_address, params).sign(self.master_account.private_key)
+        transaction_id = self.algod_client.send_transaction(signed_txn)  # send the signed transaction to the network
+        self.accounts.evict(self.master_account.public_key, receiver_address)
+        return transaction_id
+
+    def _fund_txn(self, receiver_address: str, params):
+        return PaymentTxn(
             self.master_account.public_key,
             params,
             receiver_address,
@@ -236,12 +712,277 @@ class AlgoService:
             None,
             "fund minimal amount".encode(),
         )
-        signed_txn = unsigned_txn.sign(self.master_account.private_key)
-        transaction_id = self.algod_client.send_transaction(signed_txn)  # send the signed transaction to the network
-        return transaction_id
 
 
-def get_algo_client(node=".env-defined"):
+class AsyncAlgoService(AlgoService):
+    """
+    asyncio variant of the AlgoService: all calls to algod go through an AsyncAlgodClient so that waiting for
+    confirmations parks a coroutine instead of a worker thread.
+    The synchronous sdk-client is kept as `algod_client` for the (background) registrar-check and test helpers.
+    """
+
+    def __init__(self, algod_address: str, algod_token: str, *args, **kwargs):
+        super().__init__(algod_address, algod_token, *args, **kwargs)
+        self.async_algod_client = InstrumentedAlgod(
+            AsyncAlgodClient(algod_token, algod_address, {"X-API-Key": algod_token})
+        )
+        self.params.async_client = self.async_algod_client
+        self.assets.async_client = self.async_algod_client
+        self.confirmations.async_client = self.async_algod_client
+        self.accounts.async_client = self.async_algod_client
+        self.global_state.async_client = self.async_algod_client
+        self.tracker = TransactionTracker()
+        self._background_tasks = set()
+
+    async def _confirm(self, txids: List[str], last_valid: int = None):
+        """ waits for the (group of) transaction(s) to be confirmed and records the outcome in the tracker """
+        try:
+            txinfo = await self.confirmations.wait_async(txids[0], last_valid)
+        except Exception as e:
+            for txid in txids:
+                self.tracker.reject(txid, str(e))
+            raise
+        for txid in txids:
+            self.tracker.confirm(txid, txinfo.get("confirmed-round"))
+        return txinfo
+
+    async def _confirm_in_background(self, txids: List[str], on_confirmed=None, last_valid: int = None):
+        try:
+            txinfo = await self._confirm(txids, last_valid)
+            if on_confirmed is not None:
+                on_confirmed(txinfo)
+        except Exception as e:
+            logger.warning("transaction failed", extra={"txid": txids[0], "error": str(e)})
+
+    async def _submit(self, stxns: List, wait: bool = True, on_confirmed=None):
+        """
+        sends the signed transaction(s) as one group and tracks them.
+        wait=True: returns (txid, txinfo) once confirmed
+        wait=False: returns (txid, None) right away, the confirmation is awaited in the background
+        """
+        txid = await self.async_algod_client.send_transactions(stxns)
+        txids = [stxn.get_txid() for stxn in stxns]
+        addresses = txn_addresses([stxn.transaction for stxn in stxns])
+
+        def confirmed(txinfo):
+            self.accounts.evict(*addresses)
+            if on_confirmed is not None:
+                on_confirmed(txinfo)
+
+        return txid, await self._track(txid, txids, wait, confirmed, stxns[0].transaction.last_valid_round)
+
+    async def _track(self, txid: str, txids: List[str], wait: bool, on_confirmed=None, last_valid: int = None):
+        for t in txids:
+            self.tracker.track(t)
+        if not wait:
+            task = asyncio.ensure_future(self._confirm_in_background(txids, on_confirmed, last_valid))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            return None
+        txinfo = await self._confirm(txids, last_valid)
+        if on_confirmed is not None:
+            on_confirmed(txinfo)
+        return txinfo
+
+    async def transaction_status(self, txid: str):
+        """ status of a transaction from the tracker or (for transactions submitted elsewhere) from algod """
+        status = self.tracker.get(txid)
+        if status is not None:
+            return status
+        try:
+            return status_from_pending_info(txid, await self.async_algod_client.pending_transaction_info(txid))
+        except AlgodHTTPError as e:
+            return {"tx_id": txid, "status": TX_UNKNOWN, "confirmed_round": None, "error": str(e)}
+
+    async def transaction_statuses(self, txids: List[str]):
+        """ transaction_status of many transactions (in order), MAX_PARALLEL_STATUS_LOOKUPS at a time """
+        lookups = asyncio.Semaphore(MAX_PARALLEL_STATUS_LOOKUPS)
+
+        async def status(txid):
+            async with lookups:
+                return await self.transaction_status(txid)
+
+        return await asyncio.gather(*[status(txid) for txid in txids])
+
+    async def create_new_asset(self, input: NewLogAssetInput, wait: bool = True):
+        params = await self.params.get_async()
+        with span("build_asset_txn"):
+            txn = self._new_asset_txn(input, params)
+        with span("sign", count=1):
+            stxn = txn.sign(self.master_account.private_key)
+
+        def register_asset(ptx):
+            self.assets.add(ptx["asset-index"], asset_params_from_txn(txn))
+
+        txid, ptx = await self._submit([stxn], wait, register_asset)
+        if not wait:
+            return {"tx_id": txid, "asset_id": None}
+        try:
+            return {"tx_id": txid, "asset_id": ptx["asset-index"]}
+        except Exception:
+            logger.exception("could not find created asset", extra={"txid": txid})
+            raise AssertionError(f"could not find created asset from tx {txid}")
+
+    async def create_new_assets(self, inputs: List[NewLogAssetInput]):
+        params = await self.params.get_async()
+        groups = await run_in_threadpool(self._signed_asset_groups, inputs, params)
+        in_flight = asyncio.Semaphore(MAX_GROUPS_IN_FLIGHT)
+
+        async def submit(group):
+            async with in_flight:
+                _, txinfo = await self._submit([stxn for _, stxn in group])
+            return await run_in_threadpool(self._register_created_assets, group, txinfo)
+
+        outcomes = await asyncio.gather(*[submit(group) for group in groups], return_exceptions=True)
+        return self._asset_group_results(inputs, groups, outcomes)
+
+    async def get_created_asset(self, asset_id: int):
+        return await self.assets.get_async(asset_id)
+
+    async def get_created_assets(self):
+        if not self.assets.loaded:
+            await self.assets.load_async()
+        return self.assets.asset_ids()
+
+    async def get_asset_holding(self, address: str, asset_id: int):
+        return find_asset_holding(await self.accounts.account_info_async(address), asset_id)
+
+    async def get_asset_logs(self, asset_id: int, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+        if not await self.assets.contains_async(asset_id):
+            raise InvalidAssetIDException(f"assetId {asset_id} not known")
+        return await run_in_threadpool(self._asset_log_page, asset_id, cursor, limit)
+
+    async def export_asset_logs(self, asset_ids: List[int] = None, min_round: int = None, max_round: int = None):
+        for asset_id in asset_ids or []:
+            if not await self.assets.contains_async(asset_id):
+                raise InvalidAssetIDException(f"assetId {asset_id} not known")
+        return self._asset_log_lines(asset_ids, min_round, max_round)
+
+    async def has_opted_in_to_asset(self, address: str, asset_id: int):
+        return is_opted_in_to_asset(await self.accounts.account_info_async(address), asset_id)
+
+    async def has_opted_in_to_app(self, address: str):
+        return is_opted_in_to_app(await self.accounts.account_info_async(address), self.profile_contract_id)
+
+    async def read_local_state(self, address: str):
+        return parse_local_state(await self.accounts.account_info_async(address), self.profile_contract_id)
+
+    async def get_profile(self, address: str):
+        profile = await run_in_threadpool(self.profiles.get, address)
+        if profile is None and not self.profile_indexer.seeded:
+            profile = self._profile_from_account_info(address, await self.accounts.account_info_async(address))
+        return profile
+
+    async def query_profiles(self, loan_state: str = None, cursor: str = None, limit: int = PROFILE_PAGE_SIZE):
+        return await run_in_threadpool(super().query_profiles, loan_state, cursor, limit)
+
+    async def opt_in_statuses(self, queries: List[OptInQuery]):
+        addresses = list({q.address: None for q in queries})
+        fetches = asyncio.Semaphore(MAX_PARALLEL_ACCOUNT_FETCHES)
+
+        async def fetch(address):
+            async with fetches:
+                return await self.accounts.account_info_async(address)
+
+        infos = await asyncio.gather(*[fetch(address) for address in addresses], return_exceptions=True)
+        return self._opt_in_statuses(queries, dict(zip(addresses, infos)))
+
+    async def asset_tx_with_log(
+        self, asset_id: int, log: AssetLog, wait: bool = True, note_format: NoteFormat = NoteFormat.json
+    ):
+        if not await self.assets.contains_async(asset_id):
+            raise InvalidAssetIDException(f"assetId {asset_id} not known")
+
+        params = await self.params.get_async()
+        txid, tx_result = await self._submit(self._signed_log_txns(asset_id, log, params, note_format), wait)
+        return {"tx_id": txid, "data": tx_result or {}}
+
+    async def asset_tx_with_logs(self, entries: List[AssetLogEntry], note_format: NoteFormat = NoteFormat.json):
+        for asset_id in {e.asset_id for e in entries}:
+            if not await self.assets.contains_async(asset_id):
+                raise InvalidAssetIDException(f"assetId {asset_id} not known")
+
+        params = await self.params.get_async()
+        groups = await run_in_threadpool(self._signed_log_groups, entries, params, note_format)
+        in_flight = asyncio.Semaphore(MAX_GROUPS_IN_FLIGHT)
+
+        async def submit(group):
+            async with in_flight:
+                _, txinfo = await self._submit([stxn for _, stxn in group])
+            return txinfo
+
+        outcomes = await asyncio.gather(*[submit(group) for group in groups], return_exceptions=True)
+        return self._group_results(entries, groups, outcomes)
+
+    async def clawback_asset_transfer(self, asset_id, target_address: str, wait: bool = True):
+        if not await self.assets.contains_async(asset_id):
+            raise InvalidAssetIDException(f"assetId {asset_id} not known")
+
+        params = await self.params.get_async()
+        stxn = self._clawback_txn(asset_id, target_address, params).sign(self.clawback_account.private_key)
+        txid, tx_result = await self._submit([stxn], wait)
+        return {"tx_id": txid, "data": tx_result or {}}
+
+    async def create_opt_in_tx(self, asset_id: int, address: str):
+        return encoding.msgpack_encode(self._opt_in_txn(asset_id, address, await self.params.get_async()))
+
+    async def create_usdc_transfer(self, sender, receiver, amount):
+        params = await self.params.get_async()
+        return encoding.msgpack_encode(self._usdc_transfer_txn(sender, receiver, amount, params))
+
+    async def create_opt_in_tx_to_profile_contract(self, address: str):
+        return encoding.msgpack_encode(self._profile_opt_in_txn(address, await self.params.get_async()))
+
+    async def build_unsigned_txns(self, specs: List[UnsignedTransactionSpec], group: bool = False):
+        return self._unsigned_txns(specs, group, await self.params.get_async())
+
+    async def create_new_profile(self, input: ProfileUpdate, wait: bool = True):
+        app_args, accounts = self._new_profile_args(input)
+        params = await self.params.get_async()
+        try:
+            tx_id = await call_app_async(
+                self.async_algod_client,
+                self.master_account.private_key,
+                self.profile_contract_id,
+                app_args,
+                accounts,
+                params=params,
+                wait=False,
+            )
+            await self._track(
+                tx_id, [tx_id], wait, lambda _: self.accounts.evict(input.user_address), last_valid=params.last
+            )
+            return True, tx_id
+        except AlgodHTTPError as e:
+            return False, str(e)
+
+    async def update_profile(self, update: ProfileUpdate):
+        pass
+
+    async def fund_account(self, receiver_address: str):
+        params = await self.params.get_async()
+        signed_txn = self._fund_txn(receiver_address, params).sign(self.master_account.private_key)
+        txid = await self.async_algod_client.send_transaction(signed_txn)
+        self.accounts.evict(self.master_account.public_key, receiver_address)
+        return txid
+
+    async def sign_and_send(self, unsigned_tx, private_key: str):
+        txinfo = await sign_and_send_tx_async(
+            self.async_algod_client, unsigned_tx, private_key, confirmations=self.confirmations
+        )
+        self.accounts.evict(*txn_addresses([unsigned_tx]))
+        return txinfo
+
+    async def close(self):
+        """ releases the connections of the (stopped) service: the async client and the indexes """
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.async_algod_client.close()
+        self.note_index.close()
+        self.profiles.close()
+
+
+def get_algo_client(node=".env-defined", service_class=AlgoService):
     """
     helper function to initiate algoclient to different kinds of algorand nodes:
     - '.env-defined': whatever ALGORAND_ENVIRONMENT is set to in (DEFAULT)
@@ -251,6 +992,7 @@ def get_algo_client(node=".env-defined"):
         - "MAINNET" (public), via node on purestake API
         - "LOCAL" started by algod/infrastructure with goal client
         - "SANDBOX" docker container
+    service_class: AlgoService or AsyncAlgoService
     """
     connect_to = ""
     if node == ".env":
@@ -260,8 +1002,8 @@ def get_algo_client(node=".env-defined"):
         indexer_token = os.getenv("ALGORAND_INDEXER_TOKEN")
         master_mnemonic = os.getenv("MASTER_MNEMONIC")
         profile_contract_id = int(os.getenv("PROFILE_CONTRACT_ID"))
-        print("connecting to node as defined in .env")
-        return AlgoService(
+        logger.info("connecting to node as defined in .env")
+        return service_class(
             algod_address, algod_token, indexer_token, indexer_address, master_mnemonic, profile_contract_id, "CUSTOM"
         )
 
@@ -270,7 +1012,7 @@ def get_algo_client(node=".env-defined"):
     else:
         connect_to = node
 
-    print(f"connecting to {connect_to}-node")
+    logger.info("connecting to node", extra={"net": connect_to})
     # default config for algorand services
     algod_address = "http://localhost:4001"
     algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
@@ -289,7 +1031,7 @@ def get_algo_client(node=".env-defined"):
             master_mnemonic = os.getenv("SANDBOX_MASTER_MNEMONIC")
             profile_contract_id = int(os.getenv("SANDBOX_PROFILE_CONTRACT_ID"))
 
-        return AlgoService(
+        return service_class(
             algod_address, algod_token, indexer_token, indexer_address, master_mnemonic, profile_contract_id, connect_to
         )
 
@@ -305,7 +1047,7 @@ def get_algo_client(node=".env-defined"):
         master_mnemonic = os.getenv("PURESTAKE_MNEMONIC")
         profile_contract_id = int(os.getenv("TESTNET_PROFILE_CONTRACT_ID"))
 
-        return AlgoService(
+        return service_class(
             algod_address, algod_token, indexer_token, indexer_address, master_mnemonic, profile_contract_id, connect_to
         )
 
@@ -316,7 +1058,7 @@ def get_algo_client(node=".env-defined"):
         master_mnemonic = os.getenv("MAINNET_MNEMONIC")
         profile_contract_id = int(os.getenv("MAINNET_PROFILE_CONTRACT_ID"))
 
-        return AlgoService(
+        return service_class(
             algod_address, algod_token, indexer_token, indexer_address, master_mnemonic, profile_contract_id, connect_to
         )
     else:
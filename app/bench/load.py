@@ -0,0 +1,323 @@
+"""
+end-to-end load test of main.app (auth, validation, dependencies, threadpool and the AsyncAlgoService) against an
+in-process fake algod (see bench.service): a configurable mix of /v1/log, /v1/tx, /v1/state and /v1/profile requests
+is sent at a target rate (open loop, latencies are measured from the scheduled send time so queueing is not hidden),
+in stages of increasing rate. Every stage reports throughput, latency percentiles and error rates, the first stage
+that cannot keep up (throughput below 90% of the target, too many errors or a too high p99) is the saturation point.
+
+    cd app && python -m bench.load [--rps 25,50,100,200] [--duration 10] [--mix log=1,tx=2,state=4,profile=1]
+                                   [--transport http|asgi] [--block-time 0.5] [--latency 0.002] [--output load.json]
+
+--transport http (default) serves the app with uvicorn on a local port, asgi calls it in-process without a server.
+With --url an already running app is tested instead (its algod is then whatever it is configured with).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from algosdk import account
+from argon2 import PasswordHasher
+from bench.service import fake_service, new_asset_input
+
+DEFAULT_MIX = "log=1,tx=2,state=4,profile=1"
+ADDRESSES = 64
+# a stage is saturated if it reaches less of its target rate, more errors or a higher p99
+MIN_THROUGHPUT_SHARE = 0.9
+
+Request = Tuple[str, str, Dict]  # (method, url, httpx-kwargs)
+
+
+class Workload:
+    """ the requests of each category, with the ids (asset, addresses, txid) created while seeding """
+
+    def __init__(self, asset_id: int, tx_id: str, wait: bool, seed: int = 1):
+        self.asset_id = asset_id
+        self.tx_id = tx_id
+        self.wait = wait
+        self.rnd = random.Random(seed)
+        self.addresses = [account.generate_account()[1] for _ in range(ADDRESSES)]
+        self.categories: Dict[str, List[Callable[[], Request]]] = {
+            "log": [self.log_write, self.log_read, self.log_read],
+            "tx": [self.tx_opt_in, self.tx_batch, self.tx_status],
+            "state": [self.state_local, self.state_opt_in, self.state_opt_ins],
+            "profile": [self.profile_opt_in, self.profiles],
+        }
+
+    def address(self) -> str:
+        return self.rnd.choice(self.addresses)
+
+    def request(self, category: str) -> Request:
+        return self.rnd.choice(self.categories[category])()
+
+    def log_write(self) -> Request:
+        log = {"data": {"repaid": self.rnd.randint(0, 10 ** 6), "currency": "USDC"}}
+        params = {"wait": str(self.wait).lower()}
+        return "POST", f"/v1/log/{self.asset_id}", {"json": log, "params": params}
+
+    def log_read(self) -> Request:
+        return "GET", f"/v1/log/{self.asset_id}", {"params": {"limit": 20}}
+
+    def tx_opt_in(self) -> Request:
+        return "GET", f"/v1/tx/optIn/asset/{self.asset_id}/{self.address()}", {}
+
+    def tx_batch(self) -> Request:
+        specs = [{"type": "optInAsset", "address": self.address(), "assetId": self.asset_id} for _ in range(4)]
+        return "POST", "/v1/tx/batch", {"json": {"transactions": specs, "group": True}}
+
+    def tx_status(self) -> Request:
+        return "GET", f"/v1/tx/status/{self.tx_id}", {}
+
+    def state_local(self) -> Request:
+        return "GET", f"/v1/state/local/now/{self.address()}", {}
+
+    def state_opt_in(self) -> Request:
+        return "GET", f"/v1/state/optIn/asset/{self.asset_id}/{self.address()}", {}
+
+    def state_opt_ins(self) -> Request:
+        queries = [{"address": self.address(), "assetId": self.asset_id} for _ in range(8)]
+        return "POST", "/v1/state/optIn", {"json": queries}
+
+    def profile_opt_in(self) -> Request:
+        return "GET", f"/v1/profile/optIn/status/{self.address()}", {}
+
+    def profiles(self) -> Request:
+        return "GET", "/v1/profiles", {"params": {"limit": 20}}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """ "log=1,tx=2,..." as {category: weight} """
+    weights = {}
+    for entry in mix.split(","):
+        category, _, weight = entry.partition("=")
+        weights[category.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def summarize(latencies: List[float], errors: int, count: int) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        **{f"p{p}_ms": (percentile(latencies, p) or 0) * 1000 for p in (50, 90, 99)},
+        "max_ms": (latencies[-1] if latencies else 0) * 1000,
+    }
+
+
+async def run_stage(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    mix: Dict[str, float],
+    rps: float,
+    duration: float,
+    max_in_flight: int,
+) -> Dict:
+    """ sends requests at `rps` for `duration` seconds, requests beyond `max_in_flight` are not sent (dropped) """
+    categories, weights = list(mix), list(mix.values())
+    samples: Dict[str, List[float]] = {c: [] for c in categories}
+    errors: Dict[str, int] = {c: 0 for c in categories}
+    counts: Dict[str, int] = {c: 0 for c in categories}
+    statuses: Dict[str, int] = {}
+    in_flight, peak_in_flight, dropped = 0, 0, 0
+
+    async def send(category: str, scheduled: float):
+        nonlocal in_flight
+        method, url, kwargs = workload.request(category)
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            in_flight -= 1
+        statuses[status] = statuses.get(status, 0) + 1
+        if not status.startswith("2"):
+            errors[category] += 1
+        else:
+            samples[category].append(time.perf_counter() - scheduled)
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= max_in_flight:
+            dropped += 1
+            continue
+        category = workload.rnd.choices(categories, weights)[0]
+        counts[category] += 1
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        tasks.append(asyncio.ensure_future(send(category, scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    completed = sum(len(s) for s in samples.values())
+    total = summarize([x for s in samples.values() for x in s], sum(errors.values()), sum(counts.values()))
+    return {
+        "target_rps": rps,
+        "throughput": completed / elapsed,
+        "dropped": dropped,
+        "peak_in_flight": peak_in_flight,
+        "statuses": statuses,
+        **total,
+        "categories": {c: summarize(samples[c], errors[c], counts[c]) for c in categories if counts[c]},
+    }
+
+
+def saturated(stage: Dict, max_error_rate: float, max_p99_ms: float) -> bool:
+    return (
+        stage["throughput"] < MIN_THROUGHPUT_SHARE * stage["target_rps"]
+        or stage["error_rate"] > max_error_rate
+        or stage["p99_ms"] > max_p99_ms
+    )
+
+
+class LocalApp:
+    """ main.app backed by a fake algod, served by uvicorn on a local port (http) or called in-process (asgi) """
+
+    def __init__(self, transport: str, block_time: float, latency: float):
+        self.transport = transport
+        self.service, self.algod_server = fake_service(block_time, latency)
+        self.token = secrets.token_urlsafe(16)
+        os.environ["HASHED_API_SECRET"] = PasswordHasher().hash(self.token)
+
+        import main
+        from service_registry import registry
+
+        # the startup-event of the app is not run (lifespan off), it would build a service of its own
+        registry.set(self.service)
+        self.app = main.app
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def client(self, timeout: float) -> httpx.AsyncClient:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        if self.transport == "asgi":
+            return httpx.AsyncClient(app=self.app, base_url="http://app", headers=headers, timeout=timeout)
+        return httpx.AsyncClient(base_url=self.start_server(), headers=headers, timeout=timeout)
+
+    def start_server(self) -> str:
+        import uvicorn
+
+        if self._server is None:
+            config = uvicorn.Config(self.app, host="127.0.0.1", port=0, lifespan="off", log_level="warning")
+            self._server = uvicorn.Server(config)
+            # signal handlers can only be installed from the main thread
+            self._server.install_signal_handlers = lambda: None
+
+            def serve():
+                asyncio.set_event_loop(asyncio.new_event_loop())
+                asyncio.get_event_loop().run_until_complete(self._server.serve())
+
+            self._thread = threading.Thread(target=serve, name="load-test-app", daemon=True)
+            self._thread.start()
+            while not self._server.started:
+                time.sleep(0.01)
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def close(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+        self.service.stop()
+        await self.service.close()
+        self.algod_server.stop()
+
+
+async def seed(client: httpx.AsyncClient) -> Tuple[int, str]:
+    """ creates the asset the log- and tx-requests refer to, through the api """
+    response = await client.post("/v1/log/new", json=json.loads(new_asset_input(0).json(by_alias=True)))
+    response.raise_for_status()
+    created = response.json()
+    return created["assetId"], created["txId"]
+
+
+async def run(args) -> List[Dict]:
+    local = None
+    if args.url:
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        client = httpx.AsyncClient(base_url=args.url, headers=headers, timeout=args.timeout)
+    else:
+        local = LocalApp(args.transport, args.block_time, args.latency)
+        client = local.client(args.timeout)
+    try:
+        asset_id, tx_id = await seed(client)
+        workload = Workload(asset_id, tx_id, wait=not args.no_wait)
+        mix = parse_mix(args.mix)
+        stages = []
+        for rps in args.rps:
+            stage = await run_stage(client, workload, mix, rps, args.duration, args.max_in_flight)
+            stages.append(stage)
+            report(stage)
+            if args.stop_at_saturation and saturated(stage, args.max_error_rate, args.max_p99_ms):
+                break
+        return stages
+    finally:
+        await client.aclose()
+        if local is not None:
+            await local.close()
+
+
+def report(stage: Dict):
+    print(
+        f"target {stage['target_rps']:7.1f} req/s: {stage['throughput']:7.1f} req/s  "
+        f"p50 {stage['p50_ms']:8.1f} ms  p90 {stage['p90_ms']:8.1f} ms  p99 {stage['p99_ms']:8.1f} ms  "
+        f"errors {stage['error_rate']:6.2%}  dropped {stage['dropped']}  peak in flight {stage['peak_in_flight']}"
+    )
+    for category, c in stage["categories"].items():
+        print(
+            f"    {category:8} {c['requests']:6} requests  p50 {c['p50_ms']:8.1f} ms  p99 {c['p99_ms']:8.1f} ms"
+            f"  errors {c['error_rate']:6.2%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", default="25,50,100,200", help="target rates of the stages, comma-separated")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per stage")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weights of the request categories")
+    parser.add_argument("--transport", choices=("http", "asgi"), default="http")
+    parser.add_argument("--url", help="test an already running app instead of starting one")
+    parser.add_argument("--token", default=os.getenv("API_SECRET"), help="bearer token for --url")
+    parser.add_argument("--block-time", type=float, default=0.5, help="seconds between blocks of the fake algod")
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds every algod-call takes")
+    parser.add_argument("--no-wait", action="store_true", help="log writes return without waiting for confirmation")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p99-ms", type=float, default=2000)
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--output", help="write the stages as json to this file")
+    args = parser.parse_args()
+    args.rps = [float(r) for r in args.rps.split(",")]
+
+    stages = asyncio.get_event_loop().run_until_complete(run(args))
+    saturation = next((s for s in stages if saturated(s, args.max_error_rate, args.max_p99_ms)), None)
+    if saturation is None:
+        print(f"not saturated up to {stages[-1]['target_rps']} req/s")
+    else:
+        print(f"saturated at {saturation['target_rps']} req/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "stages": stages}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+size and speed of the note formats (utils.notes.NoteFormat) for typical logs: a loan-log with a growing list of
+repayment entries. Notes are limited to 1KB, so the size decides how many entries fit into one transaction.
+
+    cd app && python -m bench.note_formats
+"""
+import time
+
+from utils.constants import MAX_NOTE_SIZE
+from utils.notes import NoteFormat, decode_note, encode_note
+
+REPEAT = 5
+NUMBER = 2000
+
+
+def repayment_log(entries: int):
+    return {
+        "data": {
+            "loanId": "a3f1c2d4-5e6f-4a1b-9c8d-7e6f5a4b3c2d",
+            "event": "repayment",
+            "repayments": [
+                {"date": 1640995200 + i * 86400, "amount": 125000 + i, "currency": "USDC", "status": "paid"}
+                for i in range(entries)
+            ],
+        }
+    }
+
+
+def ops_per_second(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(NUMBER):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return NUMBER / best
+
+
+def max_entries(format: NoteFormat) -> int:
+    entries = 0
+    while len(encode_note(repayment_log(entries + 1), format)) <= MAX_NOTE_SIZE:
+        entries += 1
+    return entries
+
+
+def main():
+    print(f"{'format':14} {'entries':>8} {'bytes':>6} {'ratio':>6} {'encode/s':>10} {'decode/s':>10}")
+    for entries in (1, 5, 10):
+        log = repayment_log(entries)
+        json_size = len(encode_note(log, NoteFormat.json))
+        for format in NoteFormat:
+            note = encode_note(log, format)
+            assert decode_note(note) == log
+            encode = ops_per_second(lambda: encode_note(log, format))
+            decode = ops_per_second(lambda: decode_note(note))
+            ratio = len(note) / json_size
+            print(f"{format.value:14} {entries:8} {len(note):6} {ratio:6.2f} {encode:10,.0f} {decode:10,.0f}")
+    print()
+    for format in NoteFormat:
+        print(f"{format.value:14} fits {max_entries(format):3} repayment entries into one {MAX_NOTE_SIZE} byte note")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+micro-benchmark of note decoding when scanning blocks: the per-transaction path of utils.utils against the batch
+decoder of utils.notes (with the json-module and, if installed, with orjson).
+
+    cd app && python -m bench.notes [number of transactions] [share of our notes]
+"""
+import base64
+import json
+import os
+import random
+import sys
+import time
+
+from utils import notes
+from utils.utils import get_note_from_tx, get_object_from_note
+
+PREFIX = "arboreum/v1:j"
+REPEAT = 5
+
+
+def make_transactions(n: int, ours: float, seed: int = 1):
+    """ algod-json transactions: `ours` of them carry a log-note, the others foreign notes (text, binary) or none """
+    rnd = random.Random(seed)
+    txs = []
+    for i in range(n):
+        r = rnd.random()
+        if r < ours:
+            log = {"data": {"loanId": f"loan-{i}", "repaid": rnd.randint(0, 10 ** 6), "currency": "USDC", "day": i}}
+            note = (PREFIX + json.dumps(log)).encode()
+        elif r < ours + (1 - ours) / 3:
+            note = b"other-app/v2:j" + json.dumps({"k": i}).encode()
+        elif r < ours + 2 * (1 - ours) / 3:
+            note = os.urandom(64)
+        else:
+            note = None
+        txn = {"type": "pay", "fee": 1000}
+        if note is not None:
+            txn["note"] = base64.b64encode(note).decode()
+        txs.append({"txn": {"txn": txn, "sig": ""}})
+    return txs
+
+
+def per_transaction(txs):
+    results = []
+    for tx in txs:
+        try:
+            results.append(get_object_from_note(get_note_from_tx(tx), PREFIX))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def batch(txs):
+    return notes.decode_tx_notes(txs)
+
+
+def batch_stdlib_json(txs):
+    loads, notes.json_loads = notes.json_loads, notes._stdlib_json_loads
+    try:
+        return batch(txs)
+    finally:
+        notes.json_loads = loads
+
+
+def measure(fn, txs) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(txs)
+        best = min(best, time.perf_counter() - start)
+    return len(txs) / best
+
+
+def main(n: int = 100000, ours: float = 0.1):
+    txs = make_transactions(n, ours)
+    assert per_transaction(txs) == batch(txs) == batch_stdlib_json(txs)
+
+    print(f"{n} transactions, {ours:.0%} with our notes (best of {REPEAT})")
+    baseline = None
+    candidates = [("per transaction (utils.utils)", per_transaction), ("batch, json", batch_stdlib_json)]
+    if notes.orjson is not None:
+        candidates.append(("batch, orjson", batch))
+    for name, fn in candidates:
+        rate = measure(fn, txs)
+        baseline = baseline or rate
+        print(f"{name:32} {rate:12,.0f} notes/s  {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[t(a) for t, a in zip([int, float], sys.argv[1:])])
@@ -0,0 +1,164 @@
+"""
+throughput and p50/p99 latency of the AsyncAlgoService against an in-process fake algod (test.fake_algod, served over
+http with a configurable block time and latency): asset creation, log writes, state reads and tx-blob building.
+Results are compared to the regression thresholds in bench/thresholds.json (set for the default settings), the exit
+code is 1 if one is exceeded. With --output the results are written as json, to be kept and compared across releases.
+
+    cd app && python -m bench.service [--requests 200] [--concurrency 32] [--block-time 0.1] [--latency 0.001]
+                                      [--output results.json] [--thresholds bench/thresholds.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+# the service of test.fake_algod.fake_service keeps its indexes in memory and signs inline
+os.environ.setdefault("ALGORAND_ENVIRONMENT", "LOCAL")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+# isort: off
+from test import fake_algod  # noqa: E402
+
+from algosdk import account  # noqa: E402
+from utils.types import AssetLog, NewLoanParams, NewLogAssetInput  # noqa: E402
+from utils.types import UnsignedTransactionSpec, UnsignedTransactionType  # noqa: E402
+
+# isort: on
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+# addresses whose state is read in the state-read benchmark
+STATE_ADDRESSES = 64
+BUILD_BATCH_SIZE = 16
+
+
+def fake_service(block_time: float = 0.1, latency: float = 0.001):
+    """ a started AsyncAlgoService connected to a FakeAlgodServer (stop both when done), see fake_algod.fake_service """
+    return fake_algod.fake_service(fake_algod.FakeAlgod(block_time=block_time, latency=latency))
+
+
+def new_asset_input(i: int) -> NewLogAssetInput:
+    return NewLogAssetInput(
+        asset_name=f"loan-{i}",
+        loan_params=NewLoanParams(
+            loan_id=f"loan-{i}",
+            borrower_info="bench",
+            principal=200000,
+            apr=0.13,
+            tenor_in_days=90,
+            start_date=1600942397,
+            compounding_frequency="daily",
+            data="[]",
+        ),
+    )
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def measure(operation: Callable, requests: int, concurrency: int) -> Dict:
+    """ runs operation(i) for i in range(requests), `concurrency` at a time """
+    latencies, errors = [], 0
+    next_request = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_request:
+            start = time.perf_counter()
+            try:
+                await operation(i)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+    }
+
+
+async def run(requests: int, concurrency: int, block_time: float, latency: float) -> Dict[str, Dict]:
+    service, server = fake_service(block_time, latency)
+    try:
+        addresses = [account.generate_account()[1] for _ in range(STATE_ADDRESSES)]
+        asset_id = (await service.create_new_asset(new_asset_input(-1)))["asset_id"]
+        specs = [
+            UnsignedTransactionSpec(type=UnsignedTransactionType.opt_in_asset, address=address, asset_id=asset_id)
+            for address in addresses[:BUILD_BATCH_SIZE]
+        ]
+        benchmarks = {
+            "asset_creation": lambda i: service.create_new_asset(new_asset_input(i)),
+            "log_write": lambda i: service.asset_tx_with_log(asset_id, AssetLog(data={"repaid": i, "day": i})),
+            "state_read": lambda i: service.read_local_state(addresses[i % len(addresses)]),
+            "tx_blob_building": lambda i: service.build_unsigned_txns(specs, group=True),
+        }
+        return {name: await measure(operation, requests, concurrency) for name, operation in benchmarks.items()}
+    finally:
+        service.stop()
+        await service.close()
+        server.stop()
+
+
+def check(results: Dict[str, Dict], thresholds: Dict[str, Dict]) -> List[str]:
+    """ the exceeded regression thresholds: min_throughput (requests/s), max_p99_ms and max_errors per benchmark """
+    failures = []
+    for name, limits in thresholds.items():
+        result = results.get(name)
+        if result is None:
+            continue
+        if "min_throughput" in limits and result["throughput"] < limits["min_throughput"]:
+            failures.append(f"{name}: throughput {result['throughput']:.1f}/s < {limits['min_throughput']}/s")
+        if "max_p99_ms" in limits and (result["p99_ms"] is None or result["p99_ms"] > limits["max_p99_ms"]):
+            failures.append(f"{name}: p99 {result['p99_ms']} ms > {limits['max_p99_ms']} ms")
+        if result["errors"] > limits.get("max_errors", 0):
+            failures.append(f"{name}: {result['errors']} errors")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--block-time", type=float, default=0.1, help="seconds between blocks of the fake algod")
+    parser.add_argument("--latency", type=float, default=0.001, help="seconds every algod-call takes")
+    parser.add_argument("--output", help="write the results (and the settings) as json to this file")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    args = parser.parse_args()
+
+    results = asyncio.get_event_loop().run_until_complete(
+        run(args.requests, args.concurrency, args.block_time, args.latency)
+    )
+    print(
+        f"{args.requests} requests per benchmark, concurrency {args.concurrency}, "
+        f"block time {args.block_time}s, algod latency {args.latency * 1000:.1f}ms"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:18} {r['throughput']:10,.1f} req/s  p50 {r['p50_ms']:8.2f} ms  p99 {r['p99_ms']:8.2f} ms"
+            f"  errors {r['errors']}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    with open(args.thresholds) as f:
+        failures = check(results, json.load(f))
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+signatures per second: inline signing against the SigningPool (utils.signing) with a growing number of processes
+
+    cd app && python -m bench.signing [number of transactions]
+"""
+import os
+import sys
+import time
+
+from algosdk import account
+from algosdk.future.transaction import (AssetTransferTxn, SuggestedParams,
+                                        assign_group_id)
+from utils.signing import SigningPool
+
+REPEAT = 3
+
+
+def make_transactions(n: int, address: str):
+    params = SuggestedParams(1000, 1000, 2000, "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", "testnet-v1.0", False)
+    txns = [
+        AssetTransferTxn(address, params, address, 0, 42, revocation_target=address, note=f"log {i}".encode())
+        for i in range(n)
+    ]
+    grouped = []
+    for start in range(0, n, 16):
+        end = start + 16
+        grouped += assign_group_id(txns[start:end])
+    return grouped
+
+
+def rate(sign, txns) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        sign(txns)
+        best = min(best, time.perf_counter() - start)
+    return len(txns) / best
+
+
+def main(n: int = 4000):
+    private_key, address = account.generate_account()
+    txns = make_transactions(n, address)
+    inline = [txn.sign(private_key) for txn in txns]
+
+    cores = os.cpu_count() or 1
+    print(f"{n} transactions, {cores} cores (best of {REPEAT})")
+    baseline = rate(lambda t: [txn.sign(private_key) for txn in t], txns)
+    print(f"{'inline':12} {baseline:10,.0f} signatures/s  1.00x")
+    processes = sorted({p for p in (1, 2, 4, 8, 16, 32) if p <= cores} | {cores})
+    for p in processes:
+        pool = SigningPool(private_key, processes=p)
+        try:
+            # warm up: spawn the workers
+            assert [s.signature for s in pool.sign(txns)] == [s.signature for s in inline]
+            r = rate(pool.sign, txns)
+        finally:
+            pool.close()
+        print(f"{f'{p} processes':12} {r:10,.0f} signatures/s  {r / baseline:4.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
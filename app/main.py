@@ -1,10 +1,9 @@
-# from utils.logger import get_logger
 import os
 
-from argon2 import PasswordHasher
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer
 from routes.v1.admin import admin_app
 from routes.v1.log import log_app
@@ -12,19 +11,31 @@ from routes.v1.profile import profile_app
 from routes.v1.state import state_app
 from routes.v1.test import test_app
 from routes.v1.transactions import tx_app
-from starlette.status import HTTP_401_UNAUTHORIZED
+from service_registry import STATUS_HEALTHY, registry
+from starlette.concurrency import run_in_threadpool
+from starlette.status import (HTTP_200_OK, HTTP_401_UNAUTHORIZED,
+                              HTTP_503_SERVICE_UNAVAILABLE)
+from utils.auth import TokenVerifier
+from utils.logger import get_logger, shutdown_logging
+from utils.metrics import METRICS, RequestMetricsMiddleware
+from utils.tracing import TracingMiddleware
 
 load_dotenv()
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 
+logger = get_logger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="")
 
 
+token_verifier = TokenVerifier()
+
+
 async def check_authorization(token: str = Depends(oauth2_scheme)):
-    try:
-        ph = PasswordHasher()
-        ph.verify(os.getenv("HASHED_API_SECRET"), token)
-    except Exception:
+    # argon2 is expensive by design, so only tokens that are not yet cached are verified (off the event loop)
+    if token_verifier.lookup(token):
+        return
+    if not await run_in_threadpool(token_verifier.verify, token):
         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid password")
 
 
@@ -38,7 +49,7 @@ app.include_router(test_app, prefix="/v1/test", dependencies=[Depends(check_auth
 app.include_router(admin_app, prefix="/v1/admin", dependencies=[Depends(check_authorization)])
 
 origins = [FRONTEND_URL]
-print("origins", origins)
+logger.info("cors origins", extra={"origins": origins})
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,8 +58,68 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
+# added last, so it is the outermost middleware and times the complete request
+app.add_middleware(RequestMetricsMiddleware)
+
+
+def _cache_stats():
+    stats = registry.cache_stats()
+    stats["auth_token"] = {"hits": token_verifier.hits, "misses": token_verifier.misses}
+    return stats
+
+
+def _hit_ratio(stats):
+    if stats.get("hit_ratio") is not None:
+        return stats["hit_ratio"]
+    total = stats["hits"] + stats["misses"]
+    return stats["hits"] / total if total else None
+
+
+METRICS.counter(
+    "cache_hits_total",
+    "cache lookups answered from the cache",
+    ("cache",),
+    callback=lambda: {(name,): stats["hits"] for name, stats in _cache_stats().items()},
+)
+METRICS.counter(
+    "cache_misses_total",
+    "cache lookups that went to algod (or argon2)",
+    ("cache",),
+    callback=lambda: {(name,): stats["misses"] for name, stats in _cache_stats().items()},
+)
+METRICS.gauge(
+    "cache_hit_ratio",
+    "share of cache lookups answered from the cache",
+    ("cache",),
+    callback=lambda: {(name,): _hit_ratio(stats) for name, stats in _cache_stats().items()},
+)
+
+
+@app.on_event("startup")
+def start_algo_service():
+    registry.start()
+
+
+@app.on_event("shutdown")
+async def stop_algo_service():
+    await registry.close()
+    shutdown_logging()
 
 
 @app.get("/", tags=["health"])
 def read_root():
     return {"Hello": "World"}
+
+
+@app.get("/health", tags=["health"])
+def read_health():
+    health = registry.health()
+    status_code = HTTP_200_OK if health["status"] == STATUS_HEALTHY else HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(content=health, status_code=status_code)
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def read_metrics():
+    """ metrics of the service in the Prometheus text format """
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
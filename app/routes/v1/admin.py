@@ -1,7 +1,8 @@
 from typing import Dict
 
-from algo_service import AlgoService, get_algo_client
+from algo_service import AsyncAlgoService
 from fastapi import APIRouter, Depends
+from service_registry import get_algo_service
 from utils.types import CamelModel
 
 admin_app = APIRouter()
@@ -12,17 +13,14 @@ class AssetTxResponse(CamelModel):
     data: Dict
 
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
-
-
 @admin_app.post("/clawback/{asset_id}/{receiver_address}", response_model=AssetTxResponse, tags=["admin"])
-def _create_new_asset_log_entry(
+async def _create_new_asset_log_entry(
     asset_id: int,
     receiver_address: str,
-    algo: AlgoService = Depends(get_algo_service),
+    wait: bool = True,
+    algo: AsyncAlgoService = Depends(get_algo_service),
 ):
     # TODO this is a pretty hefty endpoint and the security should be better (jwt-tokens with role)
     # ideally comment it out if constantly deployed
-    return AssetTxResponse(**algo.clawback_asset_transfer(asset_id, receiver_address))
+    return AssetTxResponse(**await algo.clawback_asset_transfer(asset_id, receiver_address, wait=wait))
     # raise NotImplementedError
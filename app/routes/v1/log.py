@@ -1,15 +1,36 @@
-from typing import Dict, List
-
-from algo_service import AlgoService, get_algo_client
-from fastapi import APIRouter, Depends
-from utils.types import AssetLog, CamelModel, NewLogAssetInput
+from typing import Dict, List, Optional
+
+from algo_service import MAX_LOG_BATCH_ENTRIES, AsyncAlgoService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from service_registry import get_algo_service
+from starlette.responses import StreamingResponse
+from starlette.status import HTTP_400_BAD_REQUEST
+from utils.note_index import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.notes import NoteFormat
+from utils.types import (AssetLog, AssetLogEntry, CamelModel,
+                         InvalidAssetIDException, InvalidCursorException,
+                         LogTooLargeException, NewLogAssetInput)
 
 log_app = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 class NewAssetResponse(CamelModel):
-    asset_id: int
+    # not known yet when called with wait=false
+    asset_id: Optional[int]
+    tx_id: str
+
+
+class BulkNewAssetResult(CamelModel):
+    loan_id: str
+    asset_name: str
+    # None if the group of the loan failed
+    asset_id: Optional[int]
     tx_id: str
+    group_id: str
+    confirmed_round: Optional[int]
+    error: Optional[str]
 
 
 class AssetLogResponse(CamelModel):
@@ -17,29 +38,114 @@ class AssetLogResponse(CamelModel):
     data: Dict
 
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
+class LoggedNote(CamelModel):
+    tx_id: str
+    round: int
+    log: Dict
+
+
+class AssetLogPage(CamelModel):
+    logs: List[LoggedNote]
+    # None on the last page
+    next_cursor: Optional[str]
+    indexed_round: Optional[int]
+
+
+class BatchLogResult(CamelModel):
+    asset_id: int
+    tx_id: str
+    group_id: str
+    confirmed_round: Optional[int]
+    error: Optional[str]
 
 
 @log_app.post("/log/new", response_model=NewAssetResponse, tags=["log"])
-def _create_new_asset(input: NewLogAssetInput, algo: AlgoService = Depends(get_algo_service)):
-    return NewAssetResponse(**algo.create_new_asset(input))
+async def _create_new_asset(
+    input: NewLogAssetInput, wait: bool = True, algo: AsyncAlgoService = Depends(get_algo_service)
+):
+    """ with wait=false the txId is returned right after submission, see /v1/tx/status/{txId} for its progress """
+    return NewAssetResponse(**await algo.create_new_asset(input, wait=wait))
+
+
+@log_app.post("/log/new/bulk", response_model=List[BulkNewAssetResult], tags=["log"])
+async def _create_new_assets(inputs: List[NewLogAssetInput], algo: AsyncAlgoService = Depends(get_algo_service)):
+    """
+    mints the assets of many loans in atomic groups of up to 16 asset-config transactions, submitted in parallel.
+    Results are returned in the order of the input, loans whose group failed have an `error` and no `assetId`.
+    """
+    return [BulkNewAssetResult(**r) for r in await algo.create_new_assets(inputs)]
+
+
+@log_app.post("/log/batch", response_model=List[BatchLogResult], tags=["log"])
+async def _create_asset_log_entries(
+    entries: List[AssetLogEntry],
+    note_format: NoteFormat = NoteFormat.json,
+    algo: AsyncAlgoService = Depends(get_algo_service),
+):
+    """
+    writes up to 1024 logs in atomic groups of up to 16 transactions, results are returned in the order of the input
+    """
+    if len(entries) > MAX_LOG_BATCH_ENTRIES:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail=f"at most {MAX_LOG_BATCH_ENTRIES} entries per request"
+        )
+    try:
+        return [BatchLogResult(**r) for r in await algo.asset_tx_with_logs(entries, note_format)]
+    except (InvalidAssetIDException, LogTooLargeException) as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=e.msg)
 
 
 @log_app.post("/log/{asset_id}", response_model=AssetLogResponse, tags=["log"])
-def _create_new_asset_log_entry(
+async def _create_new_asset_log_entry(
     asset_id: int,
     log_data: AssetLog,
     # log_data: AssetLog = Body(..., embed=True),
-    algo: AlgoService = Depends(get_algo_service),
+    wait: bool = True,
+    # json (default) or the more compact msgpack / msgpack-zlib, readers detect the format by the note-prefix
+    note_format: NoteFormat = NoteFormat.json,
+    algo: AsyncAlgoService = Depends(get_algo_service),
 ):
-    return AssetLogResponse(**algo.asset_tx_with_log(asset_id, log_data))
+    """ logs that are too large for one note are split into chunks, sent as one atomic group """
+    try:
+        return AssetLogResponse(**await algo.asset_tx_with_log(asset_id, log_data, wait=wait, note_format=note_format))
+    except LogTooLargeException as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=e.msg)
 
 
 # TODO
 # @log_app.post("/log/{assetId}/close", tags=['log'])
 
 
-@log_app.get("/log/{asset_id}", response_model=List[Dict], tags=["log"])
-def _get_asset_logs(asset_id: int, algo: AlgoService = Depends(get_algo_service)):
-    return []
+@log_app.get("/log/export", tags=["log"])
+async def _export_asset_logs(
+    asset_id: List[int] = Query(None),
+    min_round: Optional[int] = None,
+    max_round: Optional[int] = None,
+    algo: AsyncAlgoService = Depends(get_algo_service),
+):
+    """
+    streams the logs of the given assets (repeat asset_id for several, none for all assets) within the optional
+    round-range as newline-delimited json: one {"assetId", "txId", "round", "log"} per line, by asset and round
+    """
+    try:
+        lines = await algo.export_asset_logs(asset_id, min_round, max_round)
+    except InvalidAssetIDException as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=e.msg)
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
+@log_app.get("/log/{asset_id}", response_model=AssetLogPage, tags=["log"])
+async def _get_asset_logs(
+    asset_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    algo: AsyncAlgoService = Depends(get_algo_service),
+):
+    """
+    logs of the asset in chain-order, read from the local note index (complete up to `indexedRound`).
+    To page through all logs pass the `nextCursor` of the previous page as `cursor`.
+    """
+    try:
+        return AssetLogPage(**await algo.get_asset_logs(asset_id, cursor, limit))
+    except (InvalidAssetIDException, InvalidCursorException) as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=e.msg)
@@ -1,9 +1,10 @@
-from test.test_helpers import has_opted_in_to_app
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 
-from algo_service import AlgoService, get_algo_client
-from fastapi import APIRouter, Depends, HTTPException
-from starlette.status import HTTP_400_BAD_REQUEST
+from algo_service import AsyncAlgoService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from service_registry import get_algo_service
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from utils.profiles import MAX_PROFILE_PAGE_SIZE, PROFILE_PAGE_SIZE
 from utils.types import CamelModel, ProfileUpdate
 
 profile_app = APIRouter()
@@ -13,17 +14,33 @@ class CompletedTransactionInfo(CamelModel):
     tx_id: str
 
 
-NewProfileResponse = CompletedTransactionInfo
-ProfileUpdateResponse = CompletedTransactionInfo
+class CreditProfileRecord(CamelModel):
+    address: str
+    # from the "credit"-entry of the local state, None if it has none
+    loan_state: Optional[str]
+    active_loan: Optional[Union[int, str]]
+    # the whole (decoded) local state
+    state: Dict
+    # round of the last change
+    round: int
+
 
+class CreditProfilePage(CamelModel):
+    profiles: List[CreditProfileRecord]
+    # None on the last page
+    next_cursor: Optional[str]
+    indexed_round: Optional[int]
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
+
+NewProfileResponse = CompletedTransactionInfo
+ProfileUpdateResponse = CompletedTransactionInfo
 
 
 @profile_app.post("/profile/new", response_model=NewProfileResponse, tags=["profile"])
-def _create_new_profile(input: ProfileUpdate, algo: AlgoService = Depends(get_algo_service)):
-    success, msg = algo.create_new_profile(input)
+async def _create_new_profile(
+    input: ProfileUpdate, wait: bool = True, algo: AsyncAlgoService = Depends(get_algo_service)
+):
+    success, msg = await algo.create_new_profile(input, wait=wait)
     if success:
         return NewProfileResponse(tx_id=msg)
     else:
@@ -31,14 +48,40 @@ def _create_new_profile(input: ProfileUpdate, algo: AlgoService = Depends(get_al
 
 
 @profile_app.post("/profile/update", response_model=ProfileUpdateResponse, tags=["profile"])
-def _update_profile(
+async def _update_profile(
     update: ProfileUpdate,
     # update: ProfileUpdate = Body(..., embed=True),
-    algo: AlgoService = Depends(get_algo_service),
+    algo: AsyncAlgoService = Depends(get_algo_service),
 ):
-    return ProfileUpdateResponse(**algo.update_profile(update))
+    return ProfileUpdateResponse(**await algo.update_profile(update))
+
+
+@profile_app.get("/profile/optIn/status/{address}", response_model=bool, tags=["profile"])
+async def _is_opted_in(address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    return await algo.has_opted_in_to_app(address)
 
 
-@profile_app.get("/profile/optIn/status/{address}", response_model=List[Dict], tags=["profile"])
-def _is_opted_in(address: str, algo: AlgoService = Depends(get_algo_service)):
-    return has_opted_in_to_app(algo.algod_client, address, algo.profile_contract_id)
+@profile_app.get("/profile/{address}", response_model=CreditProfileRecord, tags=["profile"])
+async def _get_profile(address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    """
+    the credit profile of the address from the local profile table (see indexedRound of /v1/profiles), read from the
+    chain instead while the table is not complete (PROFILE_INDEX_START_ROUND is not the creation round of the contract)
+    """
+    profile = await algo.get_profile(address)
+    if profile is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=f"no profile for {address}")
+    return CreditProfileRecord(**profile)
+
+
+@profile_app.get("/profiles", response_model=CreditProfilePage, tags=["profile"])
+async def _query_profiles(
+    loan_state: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PROFILE_PAGE_SIZE, ge=1, le=MAX_PROFILE_PAGE_SIZE),
+    algo: AsyncAlgoService = Depends(get_algo_service),
+):
+    """
+    all credit profiles (e.g. loan_state=defaulted) ordered by address, read from the local profile table
+    (complete up to `indexedRound`). To page through all profiles pass the `nextCursor` of the previous page.
+    """
+    return CreditProfilePage(**await algo.query_profiles(loan_state, cursor, limit))
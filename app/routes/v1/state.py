@@ -1,11 +1,11 @@
-from test.test_helpers import has_opted_in_to_app, has_opted_in_to_asset
-from typing import Dict
+from typing import Dict, List, Optional
 
-from algo_service import AlgoService, get_algo_client
+from algo_service import MAX_OPT_IN_QUERIES, AsyncAlgoService
 from fastapi import APIRouter, Depends, HTTPException
-from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
-from utils.types import CamelModel
-from utils.utils import read_local_state
+from service_registry import get_algo_service
+from starlette.status import (HTTP_400_BAD_REQUEST,
+                              HTTP_500_INTERNAL_SERVER_ERROR)
+from utils.types import CamelModel, OptInQuery
 
 state_app = APIRouter()
 
@@ -14,28 +14,46 @@ class LocalState(CamelModel):
     state: Dict
 
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
+class OptInStatus(CamelModel):
+    address: str
+    # None: the profile-contract
+    asset_id: Optional[int]
+    # None if the account could not be read
+    opted_in: Optional[bool]
+    error: Optional[str]
 
 
 @state_app.get("/local/now/{address}", response_model=LocalState, tags=["state"])
-def _read_local(address: str, algo: AlgoService = Depends(get_algo_service)):
+async def _read_local(address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
     """ returning the current local state of the given addresss """
-    state = read_local_state(algo.algod_client, address, algo.profile_contract_id)
+    state = await algo.read_local_state(address)
     return LocalState(state=state)
 
 
 @state_app.get("/optIn/asset/{asset_id}/{address}", response_model=bool, tags=["state"])
-def _check_asset_opt_in(asset_id: int, address: str, algo: AlgoService = Depends(get_algo_service)):
+async def _check_asset_opt_in(asset_id: int, address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
     try:
-        return has_opted_in_to_asset(algo.algod_client, address, asset_id)
+        return await algo.has_opted_in_to_asset(address, asset_id)
     except Exception as e:
         raise HTTPException(HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
 @state_app.get("/optIn/profile/{address}", response_model=bool, tags=["profile"])
-def _check_profile_opt_in(address: str, algo: AlgoService = Depends(get_algo_service)):
+async def _check_profile_opt_in(address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
     try:
-        return has_opted_in_to_app(algo.algod_client, address, algo.profile_contract_id)
+        return await algo.has_opted_in_to_app(address)
     except Exception as e:
         raise HTTPException(HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+
+
+@state_app.post("/optIn", response_model=List[OptInStatus], tags=["state"])
+async def _check_opt_ins(queries: List[OptInQuery], algo: AsyncAlgoService = Depends(get_algo_service)):
+    """
+    opt-in status of many addresses at once (up to 256 checks): one {"address", "assetId"} per check, without assetId
+    the opt-in to the profile-contract is checked. Results are returned in the order of the queries.
+    """
+    if len(queries) > MAX_OPT_IN_QUERIES:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail=f"at most {MAX_OPT_IN_QUERIES} queries per request"
+        )
+    return [OptInStatus(**s) for s in await algo.opt_in_statuses(queries)]
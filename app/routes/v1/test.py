@@ -1,10 +1,14 @@
-from test.test_helpers import opt_in_to_app, opt_out_of_app
+from test.test_helpers import opt_out_of_app
 
-from algo_service import AlgoService, get_algo_client
-from algosdk import account, mnemonic
+from algo_service import AsyncAlgoService
+from algosdk import account, encoding, mnemonic
 from fastapi import APIRouter, Body, Depends
+from service_registry import get_algo_service
+from starlette.concurrency import run_in_threadpool
+from utils.logger import get_logger
 from utils.types import CamelModel, UnlockedAccount
-from utils.utils import get_asset_holding
+
+logger = get_logger(__name__)
 
 test_app = APIRouter()
 
@@ -14,31 +18,31 @@ class NewSampleOptIn(CamelModel):
     address: str
 
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
-
-
 @test_app.get("/optIn/new", response_model=NewSampleOptIn, tags=["profile"])
-def _create_new_and_opt_in(algo: AlgoService = Depends(get_algo_service)):
+async def _create_new_and_opt_in(algo: AsyncAlgoService = Depends(get_algo_service)):
     # create new address
     private_key, address = account.generate_account()
-    print("new account created", address)
+    logger.info("new account created", extra={"address": address})
 
     # fund with some microAlgos
-    tx_id = algo.fund_account(address)
-    print("new account funded")
+    tx_id = await algo.fund_account(address)
+    logger.info("new account funded", extra={"address": address, "txid": tx_id})
     # passphrase = mnemonic.from_private_key(private_key)
 
-    opt_in_to_app(algo, UnlockedAccount(public_key=address, private_key=private_key), algo.profile_contract_id)
-    print("new account opted in")
+    unsigned_encoded_tx = await algo.create_opt_in_tx_to_profile_contract(address)
+    await algo.sign_and_send(encoding.future_msgpack_decode(unsigned_encoded_tx), private_key)
+    logger.info("new account opted in", extra={"address": address})
 
     return NewSampleOptIn(address=address, tx_id=tx_id)
 
 
 @test_app.get("/optOut/profile/{address}", tags=["profile"])
-def _opt_out(address: str, passphrase: str = Body(..., embed=True), algo: AlgoService = Depends(get_algo_service)):
+async def _opt_out(
+    address: str, passphrase: str = Body(..., embed=True), algo: AsyncAlgoService = Depends(get_algo_service)
+):
 
-    return opt_out_of_app(
+    return await run_in_threadpool(
+        opt_out_of_app,
         algo.algod_client,
         UnlockedAccount(public_key=address, private_key=mnemonic.to_private_key(passphrase)),
         algo.profile_contract_id,
@@ -46,5 +50,5 @@ def _opt_out(address: str, passphrase: str = Body(..., embed=True), algo: AlgoSe
 
 
 @test_app.get("/balance/{asset_id}/{address}", tags=["balance"])
-def get_asset_balance(asset_id: int, address: str, algo: AlgoService = Depends(get_algo_service)):
-    return get_asset_holding(algo.algod_client, address, asset_id)
+async def get_asset_balance(asset_id: int, address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    return await algo.get_asset_holding(address, asset_id)
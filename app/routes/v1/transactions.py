@@ -1,6 +1,13 @@
-from algo_service import AlgoService, get_algo_client
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+
+from algo_service import AsyncAlgoService
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from service_registry import get_algo_service
+from starlette.status import HTTP_400_BAD_REQUEST
+from utils.tracker import MAX_STATUS_QUERIES
+from utils.types import (CamelModel, InvalidTransactionSpecException,
+                         UnsignedTransactionBatch)
 
 # from utils.types import AssetLog, CamelModel, NewLogAssetInput
 
@@ -12,34 +19,70 @@ class EncodedTransaction(BaseModel):
     blob: str
 
 
+class EncodedTransactionBatch(CamelModel):
+    # in the order of the requested transactions
+    blobs: List[str]
+    # None unless the transactions were grouped
+    group_id: Optional[str]
+
+
 class NodeInfo(BaseModel):
     name: str
 
 
-def get_algo_service():
-    return get_algo_client(node=".env-defined")
+class TransactionStatus(CamelModel):
+    tx_id: str
+    # pending | confirmed | rejected | unknown
+    status: str
+    confirmed_round: Optional[int]
+    error: Optional[str]
 
 
 @tx_app.get("/optIn/asset/{asset_id}/{address}", response_model=EncodedTransaction, tags=["transfer"])
-def _optin_asset(asset_id: int, address: str, algo: AlgoService = Depends(get_algo_service)):
-    msgPack = algo.create_opt_in_tx(asset_id, address)
+async def _optin_asset(asset_id: int, address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    msgPack = await algo.create_opt_in_tx(asset_id, address)
     return EncodedTransaction(blob=msgPack)
 
 
 @tx_app.get("/optIn/profile/{address}", response_model=EncodedTransaction, tags=["transfer"])
-def _optin_app(address: str, algo: AlgoService = Depends(get_algo_service)):
-    msgPack = algo.create_opt_in_tx_to_profile_contract(address)
+async def _optin_app(address: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    msgPack = await algo.create_opt_in_tx_to_profile_contract(address)
     return EncodedTransaction(blob=msgPack)
 
 
 @tx_app.get("/transfer/usdc/{sender}/{receiver}/{amount}", response_model=EncodedTransaction, tags=["transfer"])
-def _usdc_transfer(sender: str, receiver: str, amount: int, algo: AlgoService = Depends(get_algo_service)):
-    msgPack = algo.create_usdc_transfer(sender, receiver, amount)
+async def _usdc_transfer(sender: str, receiver: str, amount: int, algo: AsyncAlgoService = Depends(get_algo_service)):
+    msgPack = await algo.create_usdc_transfer(sender, receiver, amount)
     return EncodedTransaction(blob=msgPack)
 
 
+@tx_app.post("/batch", response_model=EncodedTransactionBatch, tags=["transfer"])
+async def _build_transactions(batch: UnsignedTransactionBatch, algo: AsyncAlgoService = Depends(get_algo_service)):
+    """
+    builds the unsigned transactions of e.g. an onboarding (optInAsset, optInProfile, usdcTransfer) in one call,
+    with group=true they are given a common group-id
+    """
+    try:
+        return EncodedTransactionBatch(**await algo.build_unsigned_txns(batch.transactions, batch.group))
+    except InvalidTransactionSpecException as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=e.msg)
+
+
+@tx_app.get("/status/{tx_id}", response_model=TransactionStatus, tags=["transfer"])
+async def _tx_status(tx_id: str, algo: AsyncAlgoService = Depends(get_algo_service)):
+    return TransactionStatus(**await algo.transaction_status(tx_id))
+
+
+@tx_app.post("/status", response_model=List[TransactionStatus], tags=["transfer"])
+async def _tx_statuses(tx_ids: List[str], algo: AsyncAlgoService = Depends(get_algo_service)):
+    """ status of up to 256 transactions at once, in the order of the txIds """
+    if len(tx_ids) > MAX_STATUS_QUERIES:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=f"at most {MAX_STATUS_QUERIES} txIds per request")
+    return [TransactionStatus(**s) for s in await algo.transaction_statuses(tx_ids)]
+
+
 @tx_app.get("/health/net", response_model=str, tags=["transfer"])
-def _get_net_name(algo: AlgoService = Depends(get_algo_service)):
+async def _get_net_name(algo: AsyncAlgoService = Depends(get_algo_service)):
     return NodeInfo(name=algo.net)
 
 
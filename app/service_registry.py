@@ -0,0 +1,206 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from algo_service import AlgoService, AsyncAlgoService, get_algo_client
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+from utils.logger import get_logger
+from utils.types import ServiceUnavailableException
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# how often the registrar-check is repeated in the background
+DEFAULT_REFRESH_SECONDS = int(os.getenv("ALGO_SERVICE_REFRESH_SECONDS", 300))
+# seconds without a new round after which the round-follower counts as stalled (0 disables the check)
+DEFAULT_MAX_ROUND_AGE_SECONDS = int(os.getenv("ALGO_SERVICE_MAX_ROUND_AGE_SECONDS", 60))
+
+STATUS_STOPPED = "stopped"
+STATUS_HEALTHY = "healthy"
+STATUS_DEGRADED = "degraded"
+
+
+class ServiceRegistry:
+    """
+    holds one process-wide AlgoService so that the setup cost (env lookup, key derivation, client creation and
+    the registrar-check against the profile-contract) is only paid once at startup instead of on every request.
+    A background thread repeats the registrar-check (against algod, not the cached global state) every
+    `refresh_seconds` and marks the registry as degraded whenever that check (or building the service) fails.
+    While started, the service also counts as degraded if its round-follower has not processed a round for
+    `max_round_age_seconds`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], AlgoService] = None,
+        refresh_seconds: int = DEFAULT_REFRESH_SECONDS,
+        max_round_age_seconds: int = DEFAULT_MAX_ROUND_AGE_SECONDS,
+    ):
+        self.factory = factory or (lambda: get_algo_client(node=".env-defined", service_class=AsyncAlgoService))
+        self.refresh_seconds = refresh_seconds
+        self.max_round_age_seconds = max_round_age_seconds
+        self.status = STATUS_STOPPED
+        self.last_error: Optional[str] = None
+        self.last_refresh: Optional[float] = None
+        self._service: Optional[AlgoService] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = False
+
+    def start(self):
+        """ build the service (if not yet done) and start the periodic refresh """
+        self._started = True
+        service = self._build()
+        if service is not None:
+            service.start()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name="algo-service-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._started = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._service is not None:
+            self._service.stop()
+        logger.info("algo service registry stopped", extra={"status": self.status, "error": self.last_error})
+        self.status = STATUS_STOPPED
+
+    async def close(self):
+        """ stop the refresh and release the connections of the async client """
+        self.stop()
+        service = self._service
+        if isinstance(service, AsyncAlgoService):
+            await service.close()
+
+    def get(self) -> AlgoService:
+        """
+        returns the shared service, building it lazily if startup has not run yet.
+        After a failed build, retries are left to the refresh loop so that requests fail fast.
+        """
+        service = self._service
+        if service is None and self.last_refresh is None:
+            service = self._build()
+        if service is None:
+            raise ServiceUnavailableException(f"algo service unavailable: {self.last_error}")
+        return service
+
+    async def get_async(self) -> AlgoService:
+        """ get() for the event loop: a lazy build (registrar-check at algod, opening the indexes) runs in a thread """
+        if self._service is None and self.last_refresh is None:
+            await run_in_threadpool(self._build)
+        return self.get()
+
+    def set(self, service: AlgoService):
+        """ replace the shared service, e.g. to inject a preconfigured one in tests """
+        with self._lock:
+            self._service = service
+            self._mark(STATUS_HEALTHY)
+
+    def refresh(self):
+        """ re-run the registrar-check of the current service or retry building it if that failed before """
+        service = self._service
+        if service is None:
+            service = self._build()
+            if service is not None and self._started:
+                service.start()
+            return
+        try:
+            service.verify_registrar(fresh=True)
+        except Exception as e:
+            self._mark(STATUS_DEGRADED, e)
+            return
+        follower_error = self._follower_error(service)
+        if follower_error is not None:
+            self._mark(STATUS_DEGRADED, ServiceUnavailableException(follower_error))
+        else:
+            self._mark(STATUS_HEALTHY)
+
+    def health(self):
+        status, error = self.status, self.last_error
+        # the follower can stall between two refreshes
+        follower_error = self._follower_error(self._service) if self._service is not None else None
+        if status == STATUS_HEALTHY and follower_error is not None:
+            status, error = STATUS_DEGRADED, follower_error
+        return {
+            "status": status,
+            "net": self._service.net if self._service is not None else None,
+            "last_refresh": self.last_refresh,
+            "error": error,
+            "round_follower": self._service.round_follower.stats() if self._service is not None else None,
+            "suggested_params": self._service.params.stats() if self._service is not None else None,
+            "confirmations": self._service.confirmations.stats() if self._service is not None else None,
+            "note_index": self._service.note_indexer.stats() if self._service is not None else None,
+            "profile_index": self._service.profile_indexer.stats() if self._service is not None else None,
+            "profile_app_state": self._service.global_state.stats() if self._service is not None else None,
+            "account_cache": self._service.accounts.stats() if self._service is not None else None,
+        }
+
+    def cache_stats(self):
+        """ stats of the caches of the current service (empty while there is none) """
+        service = self._service
+        if service is None:
+            return {}
+        return {"suggested_params": service.params.stats(), "account_info": service.accounts.stats()}
+
+    def _follower_error(self, service: AlgoService) -> Optional[str]:
+        """ why the round-follower of a started service counts as stalled, None if it does not """
+        if not self._started:
+            return None
+        follower = service.round_follower
+        if not follower.running:
+            return "round-follower is not running"
+        age = follower.round_age()
+        if self.max_round_age_seconds and age is not None and age > self.max_round_age_seconds:
+            return f"round-follower processed no round for {age:.0f}s (last round {follower.last_round})"
+        return None
+
+    def _build(self) -> Optional[AlgoService]:
+        with self._lock:
+            if self._service is not None:
+                return self._service
+            try:
+                self._service = self.factory()
+                self._mark(STATUS_HEALTHY)
+            except Exception as e:
+                self._mark(STATUS_DEGRADED, e)
+            return self._service
+
+    def _mark(self, status: str, error: Exception = None):
+        if status != self.status or error is not None:
+            logger.log(
+                logging.WARNING if error is not None else logging.INFO,
+                "algo service registry status changed",
+                extra={"previous_status": self.status, "status": status, "error": str(error) if error else None},
+            )
+        self.status = status
+        self.last_error = str(error) if error is not None else None
+        self.last_refresh = time.time()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_seconds):
+            self.refresh()
+
+
+registry = ServiceRegistry()
+
+
+async def get_algo_service() -> AlgoService:
+    """
+    dependency handing the shared AlgoService to the route handlers, async so that it does not take a threadpool-slot
+    (the service is built at startup, this only reads it)
+    """
+    try:
+        return await registry.get_async()
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=HTTP_503_SERVICE_UNAVAILABLE, detail=e.msg)
@@ -0,0 +1,371 @@
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import msgpack
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import SuggestedParams
+from utils.blocks import algod_json
+
+GENESIS_ID = "fake-v1"
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+
+
+class FakeAlgod:
+    """
+    in-memory stand-in for algod (the subset of the AlgodClient-api this service uses) for offline tests:
+    submitted transactions are collected in a pool and put into the next block on `status_after_block` (or
+    `produce_block`). Blocks are served as msgpack just like algod does (genesis-id/-hash stripped from the
+    transactions), so block-followers can be tested against it.
+    With a `block_time` blocks are produced by a background thread every `block_time` seconds instead, like on a real
+    network, and with a `latency` every api-call takes (at least) that many seconds.
+    """
+
+    def __init__(self, round: int = 1000, block_time: float = 0, latency: float = 0):
+        self.round = round
+        self.block_time = block_time
+        self.latency = latency
+        self.blocks: Dict[int, Dict] = {}
+        self.calls: Dict[str, int] = {}
+        self.assets: Dict[int, Dict] = {}
+        self.accounts: Dict[str, Dict] = {}
+        self.apps: Dict[int, Dict] = {}
+        self.next_asset_id = 1
+        self.rejected: Dict[str, str] = {}
+        # txids that are accepted but never make it into a block (like transactions dropped from the pool)
+        self.dropped: Set[str] = set()
+        # txid -> pool-error of transactions that are accepted but then rejected by the pool (never confirmed either)
+        self.pool_errors: Dict[str, str] = {}
+        # no blocks are produced while paused (with a block_time), transactions stay pending
+        self.paused = False
+        # txid -> eval-delta ("dt") of an app-call, as algod puts it into the apply-data of the block
+        self.eval_deltas: Dict[str, Dict] = {}
+        self._pool: List[Dict] = []
+        self._confirmed: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._new_block = threading.Condition(self._lock)
+        self._producer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def start(self):
+        """ produce a block every `block_time` seconds (started by the first wait for a block if not before) """
+        with self._lock:
+            if self._producer is not None or not self.block_time:
+                return
+            self._stop.clear()
+            self._producer = threading.Thread(target=self._produce, name="fake-algod-blocks", daemon=True)
+            self._producer.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._new_block:
+            self._new_block.notify_all()
+        if self._producer is not None:
+            self._producer.join(timeout=5)
+            self._producer = None
+
+    def _produce(self):
+        while not self._stop.wait(self.block_time):
+            # checked under the lock, so no transaction submitted after pausing gets into a block
+            with self._lock:
+                if not self.paused:
+                    self._produce_block()
+
+    def _account(self, address: str) -> Dict:
+        return self.accounts.setdefault(
+            address,
+            {
+                "address": address,
+                "amount": 0,
+                "assets": [],
+                "created-assets": [],
+                "apps-local-state": [],
+            },
+        )
+
+    # --- chain ---
+
+    def produce_block(self) -> int:
+        """ put all pooled transactions into a new block """
+        with self._lock:
+            return self._produce_block()
+
+    def _produce_block(self) -> int:
+        self.round += 1
+        txns = []
+        for entry in self._pool:
+            if entry["txid"] in self.dropped or entry["txid"] in self.pool_errors:
+                continue
+            stxn = dict(entry["stxn"])
+            txn = dict(stxn["txn"])
+            txn.pop("gh", None)
+            has_genesis_id = txn.pop("gen", None) is not None
+            stxn["txn"] = txn
+            if has_genesis_id:
+                stxn["hgi"] = True
+            stxn.update(self._apply(entry))
+            txns.append(stxn)
+            entry["info"]["confirmed-round"] = self.round
+            self._confirmed[entry["txid"]] = entry["info"]
+        self._pool = []
+        self._new_block.notify_all()
+        self.blocks[self.round] = {
+            "block": {
+                "rnd": self.round,
+                "gen": GENESIS_ID,
+                "gh": base64.b64decode(GENESIS_HASH),
+                "ts": 1600000000 + self.round,
+                "txns": txns,
+            }
+        }
+        return self.round
+
+    def _apply(self, entry: Dict) -> Dict:
+        """ minimal ledger-effects of a transaction, returns its apply-data for the block """
+        txn = entry["stxn"]["txn"]
+        if txn["type"] == "acfg" and not txn.get("caid"):
+            asset_id = self.next_asset_id
+            self.next_asset_id += 1
+            creator = encoding.encode_address(txn["snd"])
+            params = dict(algod_json(txn.get("apar", {})))
+            params["creator"] = creator
+            self.assets[asset_id] = {"index": asset_id, "params": params}
+            self._account(creator)["created-assets"].append(self.assets[asset_id])
+            entry["info"]["asset-index"] = asset_id
+            return {"caid": asset_id}
+        if txn["type"] == "axfer" and txn.get("arcv") == txn["snd"] and not txn.get("asnd"):
+            holder = self._account(encoding.encode_address(txn["snd"]))
+            if txn["xaid"] not in [a["asset-id"] for a in holder["assets"]]:
+                holder["assets"].append({"asset-id": txn["xaid"], "amount": 0, "is-frozen": False})
+        if txn["type"] == "appl" and txn.get("apan") == 1:
+            account = self._account(encoding.encode_address(txn["snd"]))
+            account["apps-local-state"].append({"id": txn["apid"], "key-value": []})
+        if entry["txid"] in self.eval_deltas:
+            return {"dt": self.eval_deltas[entry["txid"]]}
+        return {}
+
+    # --- AlgodClient-api ---
+
+    def status(self, **kwargs):
+        self._count("status")
+        return {"last-round": self.round}
+
+    def status_after_block(self, block_num: int, **kwargs):
+        """ without a block_time the fake chain advances whenever someone waits for it """
+        self._count("status_after_block")
+        if not self.block_time:
+            while self.round <= block_num:
+                self.produce_block()
+            return {"last-round": self.round}
+        self.start()
+        with self._new_block:
+            self._new_block.wait_for(lambda: self.round > block_num or self._stop.is_set())
+            return {"last-round": self.round}
+
+    def suggested_params(self, **kwargs):
+        self._count("suggested_params")
+        return SuggestedParams(
+            1000,
+            self.round,
+            self.round + 1000,
+            GENESIS_HASH,
+            GENESIS_ID,
+            False,
+            "fake",
+            1000,
+        )
+
+    def send_transaction(self, txn, **kwargs):
+        return self.send_transactions([txn])
+
+    def send_transactions(self, txns, **kwargs):
+        self._count("send_transactions")
+        with self._lock:
+            for stxn in txns:
+                txid = stxn.get_txid()
+                packed = msgpack.unpackb(base64.b64decode(encoding.msgpack_encode(stxn)), raw=False)
+                if txid in self.rejected:
+                    raise AlgodHTTPError(self.rejected[txid], 400)
+                info = {"pool-error": self.pool_errors.get(txid, ""), "txn": algod_json(packed)}
+                self._pool.append({"txid": txid, "stxn": packed, "info": info})
+            return txns[0].get_txid()
+
+    def pending_transaction_info(self, transaction_id: str, **kwargs):
+        self._count("pending_transaction_info")
+        if transaction_id in self._confirmed:
+            return dict(self._confirmed[transaction_id])
+        for entry in self._pool:
+            if entry["txid"] == transaction_id:
+                return dict(entry["info"])
+        raise AlgodHTTPError("txn does not exist", 404)
+
+    def block_info(self, block=None, response_format="json", **kwargs):
+        self._count("block_info")
+        if block > self.round:
+            raise AlgodHTTPError(f"failed to retrieve information from the ledger: round {block}", 404)
+        # rounds before the fake chain started are empty
+        empty = {"block": {"rnd": block, "gen": GENESIS_ID, "gh": base64.b64decode(GENESIS_HASH), "txns": []}}
+        return msgpack.packb(self.blocks.get(block, empty), use_bin_type=True)
+
+    def account_info(self, address: str, **kwargs):
+        self._count("account_info")
+        return self._account(address)
+
+    def asset_info(self, index: int, **kwargs):
+        self._count("asset_info")
+        if index not in self.assets:
+            raise AlgodHTTPError("asset does not exist", 404)
+        return self.assets[index]
+
+    def application_info(self, application_id: int, **kwargs):
+        self._count("application_info")
+        if application_id not in self.apps:
+            raise AlgodHTTPError("application does not exist", 404)
+        return self.apps[application_id]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # (pattern of the path, FakeAlgod-method, converter of the path-parameter)
+    routes = [
+        ("GET", r"/v2/status", "status", None),
+        ("GET", r"/v2/status/wait-for-block-after/(\d+)", "status_after_block", int),
+        ("GET", r"/v2/transactions/params", "suggested_params", None),
+        ("POST", r"/v2/transactions", "send_transactions", None),
+        ("GET", r"/v2/transactions/pending/(\w+)", "pending_transaction_info", str),
+        ("GET", r"/v2/accounts/(\w+)", "account_info", str),
+        ("GET", r"/v2/assets/(\d+)", "asset_info", int),
+        ("GET", r"/v2/applications/(\d+)", "application_info", int),
+        ("GET", r"/v2/blocks/(\d+)", "block_info", int),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        for route_method, pattern, name, convert in self.routes:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._reply(404, json.dumps({"message": f"unknown endpoint {url.path}"}).encode())
+        algod: FakeAlgod = self.server.algod
+        args = [convert(match.group(1))] if convert else []
+        try:
+            if name == "send_transactions":
+                unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+                unpacker.feed(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                # the body is the concatenation of the msgpack-encoded signed transactions
+                stxns = [
+                    encoding.future_msgpack_decode(base64.b64encode(msgpack.packb(stxn, use_bin_type=True)).decode())
+                    for stxn in unpacker
+                ]
+                return self._reply(200, json.dumps({"txId": algod.send_transactions(stxns)}).encode())
+            if name == "block_info":
+                return self._reply(200, algod.block_info(*args), "application/msgpack")
+            result = getattr(algod, name)(*args)
+        except AlgodHTTPError as e:
+            return self._reply(e.code or 500, json.dumps({"message": str(e)}).encode())
+        if name == "suggested_params":
+            result = {
+                "fee": result.fee,
+                "min-fee": result.min_fee,
+                "last-round": result.first,
+                "genesis-hash": result.gh,
+                "genesis-id": result.gen,
+                "consensus-version": result.consensus_version,
+            }
+        self._reply(200, json.dumps(result).encode())
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeAlgodServer:
+    """
+    serves a FakeAlgod over http (the algod v2 endpoints this service uses) from a background thread of this process,
+    so the sdk-client and the AsyncAlgodClient can be pointed at it:
+
+        server = FakeAlgodServer(FakeAlgod(block_time=0.5, latency=0.002))
+        client = algod.AlgodClient("token", server.start())
+    """
+
+    def __init__(self, algod: FakeAlgod = None, host: str = "127.0.0.1", port: int = 0):
+        self.algod = algod or FakeAlgod()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.algod = self.algod
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """ starts serving, returns the address for the clients """
+        self.algod.start()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-algod-http", daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        self.algod.stop()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def registrar_state(app_id: int, address: str) -> Dict:
+    """ application_info of a profile contract with `address` as registrar """
+    key = base64.b64encode(b"registrar").decode()
+    value = base64.b64encode(encoding.decode_address(address)).decode()
+    return {"id": app_id, "params": {"global-state": [{"key": key, "value": {"type": 1, "bytes": value}}]}}
+
+
+def fake_service(algod: FakeAlgod, app_id: int = 1):
+    """
+    a started AsyncAlgoService (with in-memory indexes and inline signing) whose master account is the registrar of
+    the profile contract `app_id` of `algod`, which is served over http. Returns (service, server), stop both when done.
+    """
+    import algo_service
+    from algosdk import account, mnemonic
+    from utils.note_index import NoteIndex
+    from utils.profiles import ProfileTable
+
+    private_key, master = account.generate_account()
+    algod.apps[app_id] = registrar_state(app_id, master)
+    server = FakeAlgodServer(algod)
+    address = server.start()
+    with patch.object(algo_service, "NoteIndex", lambda: NoteIndex(":memory:")), patch.object(
+        algo_service, "ProfileTable", lambda: ProfileTable(":memory:")
+    ), patch.object(algo_service, "SIGNING_PROCESSES", 0):
+        service = algo_service.AsyncAlgoService(
+            address, "a" * 64, "", "", mnemonic.from_private_key(private_key), app_id, "FAKE"
+        )
+    service.start()
+    return service, server
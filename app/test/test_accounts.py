@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from test.fake_algod import FakeAlgod
+
+from algosdk import account
+from algosdk.future.transaction import AssetTransferTxn
+from utils.accounts import AccountInfoCache, txn_addresses
+
+_, address = account.generate_account()
+_, other = account.generate_account()
+
+
+class SlowAlgod(FakeAlgod):
+    def account_info(self, address: str, **kwargs):
+        time.sleep(0.1)
+        return super().account_info(address)
+
+
+def test_account_info_is_cached_per_round():
+    algod = FakeAlgod()
+    cache = AccountInfoCache(algod)
+    cache.on_round(1000)
+
+    assert cache.account_info(address) is cache.account_info(address)
+    assert algod.calls["account_info"] == 1
+
+    cache.on_round(1001)
+    cache.account_info(address)
+    assert algod.calls["account_info"] == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_evicted_accounts_are_fetched_again():
+    algod = FakeAlgod()
+    cache = AccountInfoCache(algod)
+    cache.on_round(1000)
+    cache.account_info(address)
+    cache.account_info(other)
+
+    txn = AssetTransferTxn(other, algod.suggested_params(), other, 0, 5, revocation_target=address)
+    cache.evict(*txn_addresses([txn]))
+    cache.account_info(address)
+    assert algod.calls["account_info"] == 3
+    assert cache.evictions == 2
+
+
+def test_concurrent_misses_are_coalesced():
+    algod = SlowAlgod()
+    cache = AccountInfoCache(algod)
+    cache.on_round(1000)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.account_info(address))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 5
+    assert algod.calls["account_info"] == 1
+    assert cache.coalesced == 4
+
+
+def test_concurrent_async_misses_are_coalesced():
+    algod = SlowAlgod()
+    cache = AccountInfoCache(algod)
+    cache.on_round(1000)
+
+    async def lookups():
+        return await asyncio.gather(*[cache.account_info_async(address) for _ in range(5)])
+
+    results = asyncio.get_event_loop().run_until_complete(lookups())
+    assert all(r["address"] == address for r in results)
+    assert algod.calls["account_info"] == 1
+    assert cache.account_info(address) is results[0]
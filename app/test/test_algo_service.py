@@ -10,10 +10,12 @@ from algo_service import APP_PREFIX, AlgoService, get_algo_client
 from algosdk import mnemonic
 from algosdk.error import AlgodHTTPError
 from dotenv import load_dotenv
+from utils.constants import USDC_ID
 from utils.types import (AssetLog, CreditProfile, InvalidAssetIDException,
-                         NewLoanParams, NewLogAssetInput, ProfileUpdate,
-                         UnlockedAccount)
-from utils.utils import (call_app, get_arc3_nft_metadata, get_asset_holding,
+                         NewLoanParams, NewLogAssetInput, OptInQuery,
+                         ProfileUpdate, UnlockedAccount)
+from utils.utils import (call_app, get_arc3_nft_metadata,
+                         get_arc3_nft_metadata_batch, get_asset_holding,
                          get_note_from_tx, get_object_from_note,
                          read_local_state)
 
@@ -149,6 +151,20 @@ def test_asset_creation(algo: AlgoService):
     assert asset_info["metadata-hash"] == expected_metadata_hash
 
 
+def test_bulk_asset_creation(algo: AlgoService):
+    inputs = [TEST_ASSET.copy(update={"asset_name": f"bulkAsset{i}"}) for i in range(20)]
+    results = algo.create_new_assets(inputs)
+
+    assert [r["asset_name"] for r in results] == [i.asset_name for i in inputs]
+    assert all(r.get("error") is None for r in results)
+    # 20 asset-config transactions fit into 2 groups
+    assert len({r["group_id"] for r in results}) == 2
+    assets = [(i.asset_name, i.loan_params.dict()) for i in inputs]
+    expected_hashes = get_arc3_nft_metadata_batch(assets, return_type="base64")
+    for result, expected_hash in zip(results, expected_hashes):
+        assert algo.get_created_asset(result["asset_id"])["metadata-hash"] == expected_hash.decode("utf-8")
+
+
 def test_get_created_asset(test_asset: Tuple[AlgoService, int, Dict]):
     algo, asset_id, _ = test_asset
     asset_info = algo.get_created_asset(asset_id)
@@ -188,6 +204,21 @@ def test_opt_in(algo: AlgoService):
     assert has_opted_in_to_app(algo.algod_client, BORROWER.public_key, algo.profile_contract_id)
 
 
+def test_bulk_opt_in_status(borrower_ready: Tuple[AlgoService, UnlockedAccount]):
+    algo, borrower = borrower_ready
+    queries = [
+        OptInQuery(address=borrower.public_key),
+        OptInQuery(address=LENDER.public_key),
+        OptInQuery(address=borrower.public_key, asset_id=USDC_ID),
+    ]
+    statuses = algo.opt_in_statuses(queries)
+    assert [s["opted_in"] for s in statuses] == [
+        True,
+        has_opted_in_to_app(algo.algod_client, LENDER.public_key, algo.profile_contract_id),
+        algo.has_opted_in_to_asset(borrower.public_key, USDC_ID),
+    ]
+
+
 # def test_opt_out(algo: AlgoService):
 def test_opt_out(borrower_ready: Tuple[AlgoService, UnlockedAccount]):
     algo, borrower = borrower_ready
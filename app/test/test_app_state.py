@@ -0,0 +1,59 @@
+import base64
+from test.fake_algod import FakeAlgod
+
+from algosdk import account, encoding
+from algosdk.future.transaction import ApplicationNoOpTxn
+from utils.app_state import GlobalStateCache
+from utils.blocks import BlockSource
+from utils.rounds import RoundFollower
+from utils.utils import check_registrar_field_match
+
+APP_ID = 42
+
+private_key, registrar = account.generate_account()
+_, other = account.generate_account()
+
+
+def _global_state(registrar_address: str):
+    return {
+        "id": APP_ID,
+        "params": {
+            "global-state": [
+                {"key": base64.b64encode(b"count").decode(), "value": {"type": 2, "uint": 7}},
+                {
+                    "key": base64.b64encode(b"registrar").decode(),
+                    "value": {
+                        "type": 1,
+                        "bytes": base64.b64encode(encoding.decode_address(registrar_address)).decode(),
+                    },
+                },
+            ]
+        },
+    }
+
+
+def test_state_is_only_refetched_after_calls_to_the_app():
+    algod = FakeAlgod()
+    algod.apps[APP_ID] = _global_state(registrar)
+    changes = []
+    cache = GlobalStateCache(algod, APP_ID, BlockSource(algod), on_change=lambda *args: changes.append(args))
+    follower = RoundFollower(algod)
+    follower.subscribe(cache.on_round)
+
+    follower.poll()
+    state = cache.get()
+    assert state["count"] == 7
+    assert cache.registrar == registrar
+    assert check_registrar_field_match(state, registrar)
+    # rounds without calls to the app
+    follower.poll()
+    follower.poll()
+    assert algod.calls["application_info"] == 1
+
+    algod.apps[APP_ID] = _global_state(other)
+    algod.send_transaction(ApplicationNoOpTxn(registrar, algod.suggested_params(), APP_ID, [b"x"]).sign(private_key))
+    follower.poll()
+    assert algod.calls["application_info"] == 2
+    assert cache.registrar == other
+    assert [c[0] for c in changes] == [{"registrar"}]
+    assert not check_registrar_field_match(cache.get(), registrar)
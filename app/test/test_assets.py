@@ -0,0 +1,49 @@
+from utils.assets import CreatedAssetRegistry
+
+CREATOR = "CREATOR"
+
+
+class StubAlgod:
+    def __init__(self):
+        self.account_info_calls = 0
+        self.created = {1: {"creator": CREATOR, "name": "a@arc3"}}
+        self.foreign = {7: {"creator": "SOMEONE ELSE"}}
+
+    def account_info(self, address):
+        self.account_info_calls += 1
+        return {"created-assets": [{"index": i, "params": p} for i, p in self.created.items()]}
+
+    def asset_info(self, asset_id):
+        params = {**self.created, **self.foreign}.get(asset_id)
+        if params is None:
+            raise Exception("asset does not exist")
+        return {"index": asset_id, "params": params}
+
+
+def test_lookups_are_served_from_the_index():
+    algod = StubAlgod()
+    registry = CreatedAssetRegistry(algod, CREATOR)
+    assert registry.contains(1)
+    assert registry.get(1)["name"] == "a@arc3"
+    registry.add(2, {"creator": CREATOR})
+    assert registry.contains(2)
+    assert algod.account_info_calls == 1
+
+
+def test_unknown_and_foreign_assets_are_rejected():
+    registry = CreatedAssetRegistry(StubAlgod(), CREATOR)
+    assert not registry.contains(3)
+    assert not registry.contains(7)
+
+
+def test_assets_created_elsewhere_are_picked_up():
+    algod = StubAlgod()
+    registry = CreatedAssetRegistry(algod, CREATOR, reconcile_rounds=10)
+    registry.load()
+    algod.created[5] = {"creator": CREATOR}
+    assert registry.contains(5)
+
+    # reconciliation drops assets that are gone
+    del algod.created[5]
+    registry.on_round(20)
+    assert registry.asset_ids() == [1]
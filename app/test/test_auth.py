@@ -0,0 +1,36 @@
+import pytest
+from argon2 import PasswordHasher
+from utils.auth import TokenVerifier
+
+SECRET = "a secret"
+
+
+@pytest.fixture()
+def verifier(monkeypatch):
+    monkeypatch.setenv("HASHED_API_SECRET", PasswordHasher().hash(SECRET))
+    return TokenVerifier(ttl_seconds=60, max_size=2)
+
+
+def test_verify_caches_valid_token(verifier: TokenVerifier):
+    assert not verifier.lookup(SECRET)
+    assert verifier.verify(SECRET)
+    assert verifier.lookup(SECRET)
+    assert verifier.hits == 1
+
+
+def test_invalid_token_is_not_cached(verifier: TokenVerifier):
+    assert not verifier.verify("wrong")
+    assert not verifier.lookup("wrong")
+
+
+def test_cache_expires(verifier: TokenVerifier):
+    verifier.ttl_seconds = -1
+    assert verifier.verify(SECRET)
+    assert not verifier.lookup(SECRET)
+
+
+def test_cache_is_dropped_when_secret_changes(verifier: TokenVerifier, monkeypatch):
+    assert verifier.verify(SECRET)
+    monkeypatch.setenv("HASHED_API_SECRET", PasswordHasher().hash("another secret"))
+    assert not verifier.lookup(SECRET)
+    assert not verifier.verify(SECRET)
@@ -0,0 +1,210 @@
+import asyncio
+import base64
+from collections import Counter
+from test.fake_algod import FakeAlgod, fake_service
+
+import algo_service
+import pytest
+from algosdk import account, encoding
+from fastapi import FastAPI
+from routes.v1.log import log_app
+from routes.v1.state import state_app
+from routes.v1.transactions import tx_app
+from service_registry import get_algo_service
+from starlette.testclient import TestClient
+from utils.constants import MAX_GROUP_SIZE, USDC_ID
+from utils.types import (InvalidTransactionSpecException, NewLoanParams,
+                         NewLogAssetInput, OptInQuery, UnsignedTransactionSpec)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture()
+def algod():
+    return FakeAlgod(block_time=0.05)
+
+
+@pytest.fixture()
+def service(algod):
+    # a loop of its own, the TestClient of other tests leaves none behind
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    service, server = fake_service(algod)
+    yield service
+    service.stop()
+    run(service.close())
+    server.stop()
+
+
+def _client(service) -> TestClient:
+    app = FastAPI()
+    app.include_router(log_app, prefix="/v1")
+    app.include_router(state_app, prefix="/v1/state")
+    app.include_router(tx_app, prefix="/v1/tx")
+    app.dependency_overrides[get_algo_service] = lambda: service
+    return TestClient(app)
+
+
+def test_opt_in_queries_are_bounded(service, algod):
+    address = account.generate_account()[1]
+    queries = [{"address": address, "assetId": i} for i in range(algo_service.MAX_OPT_IN_QUERIES + 1)]
+    response = _client(service).post("/v1/state/optIn", json=queries)
+    assert response.status_code == 400 and "at most" in response.json()["detail"]
+    # not looked up at algod
+    assert address not in algod.accounts
+
+
+def _asset_input(name: str) -> NewLogAssetInput:
+    loan = NewLoanParams(
+        loan_id=name,
+        borrower_info="test",
+        principal=200000,
+        apr=0.13,
+        tenor_in_days=90,
+        start_date=1600942397,
+        compounding_frequency="daily",
+        data="[]",
+    )
+    return NewLogAssetInput(asset_name=name, loan_params=loan)
+
+
+def test_bulk_minting_packs_loans_into_groups_in_input_order(service, algod):
+    inputs = [_asset_input(f"loan-{i}") for i in range(MAX_GROUP_SIZE + 4)]
+    results = run(service.create_new_assets(inputs))
+
+    assert [r["loan_id"] for r in results] == [i.loan_params.loan_id for i in inputs]
+    assert list(Counter(r["group_id"] for r in results).values()) == [MAX_GROUP_SIZE, 4]
+    assert all(r["confirmed_round"] and "error" not in r for r in results)
+    # every loan got its own asset, which is known to the service right away
+    assert len({r["asset_id"] for r in results}) == len(inputs)
+    for r in results:
+        assert algod.assets[r["asset_id"]]["params"]["an"] == f"{r['loan_id']}@arc3"
+        assert service.assets.contains(r["asset_id"])
+
+
+def test_a_failing_mint_group_only_fails_its_own_loans(service, algod, monkeypatch):
+    signed_asset_groups = service._signed_asset_groups
+
+    def reject_first_group(*args):
+        groups = signed_asset_groups(*args)
+        algod.rejected[groups[0][0][1].get_txid()] = "overspend"
+        return groups
+
+    monkeypatch.setattr(service, "_signed_asset_groups", reject_first_group)
+    results = run(service.create_new_assets([_asset_input(f"loan-{i}") for i in range(MAX_GROUP_SIZE + 2)]))
+
+    assert all("overspend" in r["error"] and r.get("asset_id") is None for r in results[:MAX_GROUP_SIZE])
+    assert all(r["asset_id"] and "error" not in r for r in results[MAX_GROUP_SIZE:])
+
+
+def test_the_same_loan_twice_is_minted_twice(service):
+    params = service.params.get()
+    same = _asset_input("loan-1")
+    groups = service._signed_asset_groups([same, _asset_input("loan-2"), same, same], params)
+
+    # a repeat goes into the next group and gets a lease, the validity window stays the same
+    assert [[i for i, _ in group] for group in groups] == [[0, 1], [2], [3]]
+    txns = [stxn.transaction for group in groups for _, stxn in group]
+    assert [txn.lease is not None for txn in txns] == [False, False, True, True]
+    assert {(txn.first_valid_round, txn.last_valid_round) for txn in txns} == {(params.first, params.last)}
+
+    results = run(service.create_new_assets([same, same]))
+    assert len({r["tx_id"] for r in results}) == 2 and len({r["asset_id"] for r in results}) == 2
+
+
+def test_bulk_minting_route(service):
+    response = _client(service).post(
+        "/v1/log/new/bulk", json=[{"assetName": "loan-1", "loanParams": _asset_input("loan-1").loan_params.dict()}]
+    )
+    assert response.status_code == 200
+    [result] = response.json()
+    assert result["loanId"] == "loan-1" and result["assetId"] and result["error"] is None
+
+
+def _onboarding(address: str):
+    receiver = account.generate_account()[1]
+    return [
+        UnsignedTransactionSpec(type="optInProfile", address=address),
+        UnsignedTransactionSpec(type="optInAsset", address=address, asset_id=7),
+        UnsignedTransactionSpec(type="usdcTransfer", address=address, receiver=receiver, amount=3),
+    ]
+
+
+def test_unsigned_transactions_keep_the_order_of_the_specs(service):
+    address = account.generate_account()[1]
+    batch = run(service.build_unsigned_txns(_onboarding(address)))
+
+    assert batch["group_id"] is None
+    txns = [encoding.future_msgpack_decode(blob) for blob in batch["blobs"]]
+    assert [txn.type for txn in txns] == ["appl", "axfer", "axfer"]
+    assert txns[0].index == service.profile_contract_id
+    assert (txns[1].index, txns[1].amount, txns[1].receiver) == (7, 0, address)
+    assert (txns[2].index, txns[2].amount) == (USDC_ID, 3 * 10 ** 6)
+    assert all(txn.sender == address and txn.group is None for txn in txns)
+    # built from one set of suggested params
+    assert len({(txn.first_valid_round, txn.last_valid_round) for txn in txns}) == 1
+
+
+def test_grouped_unsigned_transactions_share_a_group_id(service):
+    batch = run(service.build_unsigned_txns(_onboarding(account.generate_account()[1]), group=True))
+
+    txns = [encoding.future_msgpack_decode(blob) for blob in batch["blobs"]]
+    assert {base64.b64encode(txn.group).decode() for txn in txns} == {batch["group_id"]}
+
+
+def test_invalid_unsigned_transaction_specs(service):
+    address = account.generate_account()[1]
+    with pytest.raises(InvalidTransactionSpecException):
+        run(service.build_unsigned_txns(_onboarding(address) * 6, group=True))
+    # ungrouped, there is no limit
+    assert len(run(service.build_unsigned_txns(_onboarding(address) * 6))["blobs"]) == 18
+    with pytest.raises(InvalidTransactionSpecException, match="assetId"):
+        run(service.build_unsigned_txns([UnsignedTransactionSpec(type="optInAsset", address=address)]))
+    with pytest.raises(InvalidTransactionSpecException, match="receiver"):
+        run(service.build_unsigned_txns([UnsignedTransactionSpec(type="usdcTransfer", address=address, amount=3)]))
+
+
+def test_unsigned_transactions_route(service):
+    address = account.generate_account()[1]
+    client = _client(service)
+    response = client.post(
+        "/v1/tx/batch", json={"transactions": [s.dict(by_alias=True) for s in _onboarding(address)], "group": True}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["blobs"]) == 3 and response.json()["groupId"]
+
+    response = client.post("/v1/tx/batch", json={"transactions": [{"type": "optInAsset", "address": address}]})
+    assert response.status_code == 400 and "assetId" in response.json()["detail"]
+
+
+def test_opt_in_statuses_in_query_order_with_one_fetch_per_account(service, algod, monkeypatch):
+    opted_in, other, failing = [account.generate_account()[1] for _ in range(3)]
+    algod._account(opted_in)["assets"].append({"asset-id": 7, "amount": 0, "is-frozen": False})
+    algod._account(opted_in)["apps-local-state"].append({"id": service.profile_contract_id})
+    account_info_async = service.accounts.account_info_async
+    fetched = []
+
+    async def account_info(address):
+        fetched.append(address)
+        if address == failing:
+            raise ConnectionError("algod unreachable")
+        return await account_info_async(address)
+
+    monkeypatch.setattr(service.accounts, "account_info_async", account_info)
+    queries = [
+        OptInQuery(address=opted_in, asset_id=7),
+        OptInQuery(address=other, asset_id=7),
+        OptInQuery(address=failing, asset_id=7),
+        OptInQuery(address=opted_in, asset_id=8),
+        OptInQuery(address=opted_in),
+        OptInQuery(address=other),
+    ]
+    results = run(service.opt_in_statuses(queries))
+
+    assert [(r["address"], r["asset_id"]) for r in results] == [(q.address, q.asset_id) for q in queries]
+    assert [r.get("opted_in") for r in results] == [True, False, None, False, True, False]
+    # only the queries of the account that could not be fetched fail
+    assert results[2]["error"] == "algod unreachable"
+    assert all("error" not in r for i, r in enumerate(results) if i != 2)
+    assert sorted(fetched) == sorted([opted_in, other, failing])
@@ -0,0 +1,186 @@
+import asyncio
+import base64
+from test.fake_algod import FakeAlgod
+
+import msgpack
+import pytest
+from algosdk import account, encoding
+from algosdk.future.transaction import (AssetConfigTxn, AssetTransferTxn,
+                                        PaymentTxn)
+from utils.blocks import BlockSource, compute_txid, decode_block
+from utils.confirmations import (ConfirmationEngine, ConfirmationTimeoutError,
+                                 TransactionExpiredError)
+from utils.rounds import RoundFollower
+from utils.utils import sign_and_send_tx
+
+private_key, address = account.generate_account()
+
+
+def _payment(algod: FakeAlgod, note: bytes = None, last_valid: int = None):
+    params = algod.suggested_params()
+    if last_valid is not None:
+        params.last = last_valid
+    return PaymentTxn(address, params, address, 0, note=note).sign(private_key)
+
+
+def _engine(algod: FakeAlgod):
+    follower = RoundFollower(algod)
+    engine = ConfirmationEngine(algod, follower, BlockSource(algod))
+    follower.subscribe(engine.on_round)
+    follower.poll()
+    return follower, engine
+
+
+def test_block_txids_match_sdk_txids():
+    algod = FakeAlgod()
+    stxns = [
+        _payment(algod, note=b"arboreum/v1:j{}"),
+        AssetTransferTxn(address, algod.suggested_params(), address, 0, 5, revocation_target=address).sign(private_key),
+    ]
+    algod.send_transactions(stxns)
+    round = algod.produce_block()
+
+    assert [tx["txid"] for tx in BlockSource(algod).transactions(round)] == [s.get_txid() for s in stxns]
+
+
+def test_txids_of_transactions_with_non_utf8_strings():
+    # anyone can create an asset whose name is not valid utf-8
+    name = b"\xffloan".decode(errors="surrogateescape")
+    raw = msgpack.packb(
+        {"apar": {"an": name}, "snd": bytes(32), "type": "acfg"}, use_bin_type=True, unicode_errors="surrogateescape"
+    )
+    assert b"\xffloan" in raw
+    txid = base64.b32encode(encoding.checksum(b"TX" + raw)).decode().strip("=")
+    assert compute_txid(decode_block(raw)) == txid
+
+
+def test_one_block_fetch_per_round_for_all_pending_transactions():
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+
+    stxns = [_payment(algod, note=str(i).encode()) for i in range(20)]
+    futures = [engine.register(stxn.get_txid(), stxn.transaction.last_valid_round) for stxn in stxns]
+    algod.send_transactions(stxns[:10])
+    follower.poll()
+    algod.send_transactions(stxns[10:])
+    follower.poll()
+
+    rounds = [future.result(timeout=1)["confirmed-round"] for future in futures]
+    assert rounds == [1001] * 10 + [1002] * 10
+    # the blocks of the new rounds and the one of the registration round (for late registrations), no lookups per txid
+    assert algod.calls["block_info"] == 3
+    assert "pending_transaction_info" not in algod.calls
+    assert engine.pending_count == 0
+    assert engine.stats()["confirmed"] == 20
+
+
+def test_transactions_confirmed_before_registration_are_found():
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+    stxn = _payment(algod)
+    algod.send_transaction(stxn)
+    algod.produce_block()
+
+    future = engine.register(stxn.get_txid())
+    follower.poll()
+    assert future.result(timeout=1)["confirmed-round"] == 1001
+
+
+def test_txinfo_is_built_from_the_block():
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+    stxn = AssetConfigTxn(
+        address,
+        algod.suggested_params(),
+        total=1,
+        asset_name="loan@arc3",
+        manager=address,
+        strict_empty_address_check=False,
+    ).sign(private_key)
+    future = engine.register(stxn.get_txid())
+    algod.send_transaction(stxn)
+    follower.poll()
+
+    txinfo = future.result(timeout=1)
+    expected = algod.pending_transaction_info(stxn.get_txid())
+    assert txinfo["confirmed-round"] == expected["confirmed-round"] == 1001
+    assert txinfo["asset-index"] == expected["asset-index"]
+    assert txinfo["txn"] == expected["txn"]
+    assert algod.calls["pending_transaction_info"] == 1
+
+
+def test_registrations_before_the_first_round_are_looked_up():
+    algod = FakeAlgod()
+    follower = RoundFollower(algod)
+    engine = ConfirmationEngine(algod, follower, BlockSource(algod))
+    follower.subscribe(engine.on_round)
+    stxn = _payment(algod)
+    algod.send_transaction(stxn)
+    algod.produce_block()
+
+    # the follower has not seen a round yet, so there is no block to look in
+    future = engine.register(stxn.get_txid())
+    follower.poll()
+    assert future.result(timeout=1)["confirmed-round"] == 1001
+
+
+def test_expired_transactions_fail():
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+    stxn = _payment(algod, last_valid=1001)
+
+    # never submitted, so it can not be confirmed anymore once the chain is past its last valid round
+    future = engine.register(stxn.get_txid(), stxn.transaction.last_valid_round)
+    follower.poll()
+    follower.poll()
+    with pytest.raises(TransactionExpiredError):
+        future.result(timeout=1)
+    assert engine.expired == 1
+
+
+def test_rounds_whose_block_could_not_be_fetched_are_scanned_again(monkeypatch):
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+    stxn = _payment(algod)
+    future = engine.register(stxn.get_txid(), stxn.transaction.last_valid_round)
+    algod.send_transaction(stxn)
+    block_info = algod.block_info
+    monkeypatch.setattr(algod, "block_info", lambda *args, **kwargs: 1 / 0)
+    follower.poll()
+    assert not future.done() and engine.processed_round == 1000
+
+    monkeypatch.setattr(algod, "block_info", block_info)
+    follower.poll()
+    assert future.result(timeout=1)["confirmed-round"] == 1001
+    assert engine.processed_round == 1002
+
+
+def test_waiting_gives_up_when_no_rounds_come_in(monkeypatch):
+    algod = FakeAlgod()
+    follower, engine = _engine(algod)
+    engine.timeout_seconds = 0.05
+    # a follower that is running, but does not deliver new rounds
+    monkeypatch.setattr(RoundFollower, "running", True)
+    stxn = _payment(algod)
+
+    with pytest.raises(ConfirmationTimeoutError):
+        engine.wait(stxn.get_txid())
+    loop = asyncio.new_event_loop()
+    with pytest.raises(ConfirmationTimeoutError):
+        loop.run_until_complete(engine.wait_async(stxn.get_txid()))
+    loop.close()
+    # the registration is kept (and can still be confirmed) for the others waiting for the same transaction
+    assert engine.pending_count == 1 and engine.timed_out == 2
+
+
+def test_polling_fallback_fails_rejected_transactions():
+    algod = FakeAlgod()
+    follower = RoundFollower(algod)
+    engine = ConfirmationEngine(algod, follower, BlockSource(algod))
+    params = algod.suggested_params()
+    assert sign_and_send_tx(algod, PaymentTxn(address, params, address, 0), private_key, engine)["confirmed-round"]
+
+    txn = PaymentTxn(address, params, address, 1)
+    algod.pool_errors[txn.get_txid()] = "overspend"
+    with pytest.raises(AssertionError, match="overspend"):
+        sign_and_send_tx(algod, txn, private_key, engine)
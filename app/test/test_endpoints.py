@@ -1,35 +1,40 @@
+import asyncio
 from test.test_helpers import has_opted_in_to_app
 
 import pytest
-from algo_service import get_algo_client
+from algo_service import AsyncAlgoService, get_algo_client
+from algosdk import account
 from main import app
-from routes.v1.log import get_algo_service
-from starlette.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED
+from service_registry import registry
+from starlette.status import (HTTP_200_OK, HTTP_400_BAD_REQUEST,
+                              HTTP_401_UNAUTHORIZED)
 from starlette.testclient import TestClient
 from utils.constants import API_SECRET
 
 
-def override_get_algo_service():
-    return get_algo_client(node="LOCAL")
+@pytest.fixture(scope="module")
+def client():
+    # one service for all requests, its indexes, signing pool and round-follower are released in the teardown
+    service = get_algo_client(node="LOCAL", service_class=AsyncAlgoService)
+    registry.set(service)
+    yield TestClient(app)
+    service.stop()
+    asyncio.get_event_loop().run_until_complete(service.close())
 
 
-app.dependency_overrides[get_algo_service] = override_get_algo_service
-
-client = TestClient(app)
-
 auth_header = {"Authorization": f"Bearer {API_SECRET}"}
 
 # TODO get this from fixture
 created_asset_id = 105
 
 
-def test_auth_success():
+def test_auth_success(client):
     res = client.get(f"v1/log/{created_asset_id}", headers=auth_header)
     assert res.status_code == HTTP_200_OK
-    assert res.json() == []
+    assert "logs" in res.json()
 
 
-def test_auth_failure():
+def test_auth_failure(client):
     res = client.post(f"v1/log/{created_asset_id}")
     assert res.status_code == HTTP_401_UNAUTHORIZED
 
@@ -59,9 +64,29 @@ def test_update_profile():
     pass
 
 
-def test_sampleOptIn():
+def test_sampleOptIn(client):
     res = client.get("v1/test/optIn/new", headers=auth_header)
     assert res.status_code == HTTP_200_OK
     data = res.json()
     algo = get_algo_client(node="LOCAL")
     assert has_opted_in_to_app(algo.algod_client, data["address"], algo.profile_contract_id)
+
+
+def test_build_transaction_batch(client):
+    _, address = account.generate_account()
+    batch = {
+        "transactions": [
+            {"type": "optInProfile", "address": address},
+            {"type": "optInAsset", "address": address, "assetId": created_asset_id},
+        ],
+        "group": True,
+    }
+    res = client.post("v1/tx/batch", json=batch, headers=auth_header)
+    assert res.status_code == HTTP_200_OK
+    data = res.json()
+    assert len(data["blobs"]) == 2
+    assert data["groupId"] is not None
+
+    batch["transactions"].append({"type": "usdcTransfer", "address": address})
+    res = client.post("v1/tx/batch", json=batch, headers=auth_header)
+    assert res.status_code == HTTP_400_BAD_REQUEST
@@ -0,0 +1,52 @@
+import asyncio
+from test.fake_algod import FakeAlgod, FakeAlgodServer
+
+import pytest
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import PaymentTxn
+from algosdk.v2client import algod
+from utils.async_algod import AsyncAlgodClient
+
+TOKEN = "a" * 64
+private_key, address = account.generate_account()
+
+
+@pytest.fixture()
+def server():
+    server = FakeAlgodServer(FakeAlgod(block_time=0.05))
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_sdk_client_against_served_fake(server: FakeAlgodServer):
+    client = algod.AlgodClient(TOKEN, server.address)
+    params = client.suggested_params()
+    txid = client.send_transaction(PaymentTxn(address, params, address, 0).sign(private_key))
+    assert "confirmed-round" not in client.pending_transaction_info(txid)
+
+    # blocks come with the block time, waiting does not produce them
+    status = client.status_after_block(client.status()["last-round"])
+    assert server.algod.calls["status_after_block"] == 1
+    assert params.first < client.pending_transaction_info(txid)["confirmed-round"] <= status["last-round"]
+    assert client.block_info(status["last-round"], response_format="msgpack")
+    with pytest.raises(AlgodHTTPError):
+        client.asset_info(404)
+
+
+def test_async_client_against_served_fake(server: FakeAlgodServer):
+    async def lookups():
+        client = AsyncAlgodClient(TOKEN, server.address)
+        try:
+            params = await client.suggested_params()
+            txid = await client.send_transaction(PaymentTxn(address, params, address, 0).sign(private_key))
+            # the next block after sending, a block since the params were fetched might not contain the transaction
+            await client.status_after_block((await client.status())["last-round"])
+            return await client.pending_transaction_info(txid), await client.account_info(address)
+        finally:
+            await client.close()
+
+    txinfo, account_info = asyncio.get_event_loop().run_until_complete(lookups())
+    assert txinfo["confirmed-round"] > 0
+    assert account_info["address"] == address
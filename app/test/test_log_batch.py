@@ -0,0 +1,204 @@
+import asyncio
+import time
+from test.fake_algod import FakeAlgod, fake_service
+
+import algo_service
+import pytest
+from fastapi import FastAPI
+from routes.v1.log import log_app
+from service_registry import get_algo_service
+from starlette.testclient import TestClient
+from utils.constants import MAX_GROUP_SIZE
+from utils.types import AssetLogEntry, NewLoanParams, NewLogAssetInput
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture()
+def algod():
+    return FakeAlgod(block_time=0.05)
+
+
+@pytest.fixture()
+def service(algod):
+    # a loop of its own, the TestClient of other tests leaves none behind
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    service, server = fake_service(algod)
+    yield service
+    service.stop()
+    run(service.close())
+    server.stop()
+
+
+def _asset_input() -> NewLogAssetInput:
+    loan = NewLoanParams(
+        loan_id="loan-1",
+        borrower_info="test",
+        principal=200000,
+        apr=0.13,
+        tenor_in_days=90,
+        start_date=1600942397,
+        compounding_frequency="daily",
+        data="[]",
+    )
+    return NewLogAssetInput(asset_name="loan-1", loan_params=loan)
+
+
+def _asset(service) -> int:
+    return run(service.create_new_asset(_asset_input()))["asset_id"]
+
+
+def _large_log(n: int, invoices: int):
+    return {"log": n, "invoices": [{"id": f"{n}-{i}", "amount": i} for i in range(invoices)]}
+
+
+def _indexed_logs(service, asset_id: int, round: int, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while (service.note_indexer.indexed_round or 0) < round and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return [entry["log"]["data"] for entry in service._asset_log_page(asset_id, None, 100)["logs"]]
+
+
+def test_chunked_logs_sharing_a_group_are_all_read_back(service):
+    asset_id = _asset(service)
+    logs = [_large_log(0, 50), _large_log(1, 80)]
+
+    results = run(service.asset_tx_with_logs([AssetLogEntry(asset_id=asset_id, data=log) for log in logs]))
+
+    assert len({r["group_id"] for r in results}) == 1
+    assert all("error" not in r for r in results)
+    assert _indexed_logs(service, asset_id, results[0]["confirmed_round"]) == logs
+
+
+def _entries(asset_id: int, count: int):
+    return [AssetLogEntry(asset_id=asset_id, data={"repaid": i}) for i in range(count)]
+
+
+def test_log_transactions_are_packed_into_full_groups(service):
+    asset_id = _asset(service)
+    groups = service._signed_log_groups(_entries(asset_id, 40), service.params.get())
+
+    assert [len(group) for group in groups] == [MAX_GROUP_SIZE, MAX_GROUP_SIZE, 8]
+    assert [i for group in groups for i, _ in group] == list(range(40))
+    for group in groups:
+        assert len({stxn.transaction.group for _, stxn in group}) == 1
+
+    # the chunks of a large log are not split across groups, it starts a new one if it does not fit
+    entries = _entries(asset_id, 15) + [AssetLogEntry(asset_id=asset_id, data=_large_log(0, 50))]
+    groups = service._signed_log_groups(entries, service.params.get())
+    assert [len(group) for group in groups] == [15, 2]
+    assert {i for i, _ in groups[1]} == {15}
+
+
+def test_identical_logs_go_into_separate_groups(service):
+    asset_id = _asset(service)
+    same = AssetLogEntry(asset_id=asset_id, data={"repaid": 100})
+    groups = service._signed_log_groups(
+        [same, same, AssetLogEntry(asset_id=asset_id, data={"repaid": 1})], service.params.get()
+    )
+
+    assert [[i for i, _ in group] for group in groups] == [[0], [1, 2]]
+    results = run(service.asset_tx_with_logs([same, same]))
+    assert len({r["tx_id"] for r in results}) == 2
+    assert all(r["confirmed_round"] for r in results)
+
+    # the same for minting
+    groups = service._signed_asset_groups([_asset_input(), _asset_input()], service.params.get())
+    assert len(groups) == 2 and groups[0][0][1].get_txid() != groups[1][0][1].get_txid()
+
+
+def test_any_number_of_identical_logs_stay_valid(service):
+    asset_id = _asset(service)
+    params = service.params.get()
+    # more repeats than rounds in the validity window
+    count = params.last - params.first + 100
+    entries = [AssetLogEntry(asset_id=asset_id, data={"repaid": 100})] * count
+    txns = [stxn for group in service._signed_log_groups(entries, params) for _, stxn in group]
+
+    assert len({stxn.get_txid() for stxn in txns}) == count
+    assert {(stxn.transaction.first_valid_round, stxn.transaction.last_valid_round) for stxn in txns} == {
+        (params.first, params.last)
+    }
+
+    # of large logs only the first chunk gets a lease
+    entries = [AssetLogEntry(asset_id=asset_id, data=_large_log(0, 50))] * 2
+    groups = service._signed_log_groups(entries, params)
+    assert [[stxn.transaction.lease is not None for _, stxn in group] for group in groups] == [
+        [False, False],
+        [True, False],
+    ]
+
+
+def test_results_are_in_input_order(service):
+    asset_id = _asset(service)
+    entries = _entries(asset_id, 20)
+    entries.insert(3, AssetLogEntry(asset_id=asset_id, data=_large_log(0, 50)))
+
+    results = run(service.asset_tx_with_logs(entries))
+
+    assert [r["asset_id"] for r in results] == [asset_id] * len(entries)
+    assert len({r["group_id"] for r in results}) == 2
+    assert all("error" not in r for r in results)
+    logs = _indexed_logs(service, asset_id, max(r["confirmed_round"] for r in results))
+    assert sorted(logs, key=str) == sorted([e.data for e in entries], key=str)
+
+
+def test_a_failing_group_only_fails_its_own_entries(service, algod, monkeypatch):
+    asset_id = _asset(service)
+    signed_log_groups = service._signed_log_groups
+
+    def reject_second_group(*args):
+        groups = signed_log_groups(*args)
+        algod.rejected[groups[1][0][1].get_txid()] = "overspend"
+        return groups
+
+    monkeypatch.setattr(service, "_signed_log_groups", reject_second_group)
+    results = run(service.asset_tx_with_logs(_entries(asset_id, MAX_GROUP_SIZE + 2)))
+
+    assert all(r["confirmed_round"] and "error" not in r for r in results[:MAX_GROUP_SIZE])
+    assert all("overspend" in r["error"] and r.get("confirmed_round") is None for r in results[MAX_GROUP_SIZE:])
+
+
+def test_groups_in_flight_are_bounded(service, monkeypatch):
+    asset_id = _asset(service)
+    monkeypatch.setattr(algo_service, "MAX_GROUPS_IN_FLIGHT", 2)
+    submit = service._submit
+    in_flight, peak = 0, 0
+
+    async def counted(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await submit(*args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(service, "_submit", counted)
+    results = run(service.asset_tx_with_logs(_entries(asset_id, 5 * MAX_GROUP_SIZE)))
+    assert all(r["confirmed_round"] for r in results)
+    assert peak == 2
+
+
+def test_batch_route(service):
+    asset_id = _asset(service)
+    app = FastAPI()
+    app.include_router(log_app, prefix="/v1")
+    app.dependency_overrides[get_algo_service] = lambda: service
+    client = TestClient(app)
+
+    entries = [{"assetId": asset_id, "data": {"repaid": i}} for i in range(3)]
+    response = client.post("/v1/log/batch", json=entries)
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["assetId"] for r in results] == [asset_id] * 3
+    assert all(r["confirmedRound"] and r["error"] is None for r in results)
+
+    response = client.post("/v1/log/batch", json=[{"assetId": asset_id + 100, "data": {}}])
+    assert response.status_code == 400
+
+    entries = [{"assetId": asset_id, "data": {"repaid": i}} for i in range(algo_service.MAX_LOG_BATCH_ENTRIES + 1)]
+    response = client.post("/v1/log/batch", json=entries)
+    assert response.status_code == 400 and "at most" in response.json()["detail"]
@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+
+from utils.logger import (ROOT_LOGGER, JsonFormatter, _QueueHandler,
+                          get_logger, parse_levels)
+
+
+def _pipeline(name: str, level=logging.INFO):
+    """ a logger writing through the queue-handler of the service into a buffer """
+    events, buffer = queue.SimpleQueue(), io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger(f"{ROOT_LOGGER}.test.{name}")
+    logger.handlers = [_QueueHandler(events)]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger, QueueListener(events, handler), buffer
+
+
+def test_events_are_json_with_extra_fields():
+    logger, listener, buffer = _pipeline("json")
+    listener.start()
+    logger.info("transaction %s", "confirmed", extra={"txid": "TX", "asset_id": 42, "duration_ms": 3.5})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed", extra={"txid": "TX"})
+    listener.stop()
+
+    confirmed, failed = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert confirmed["message"] == "transaction confirmed"
+    assert confirmed["logger"] == "test.json"
+    assert confirmed["level"] == "INFO"
+    assert (confirmed["txid"], confirmed["asset_id"], confirmed["duration_ms"]) == ("TX", 42, 3.5)
+    assert failed["level"] == "ERROR" and "ValueError: boom" in failed["exception"]
+
+
+def test_disabled_debug_payloads_are_not_formatted():
+    class Payload:
+        formatted = False
+
+        def __str__(self):
+            Payload.formatted = True
+            return "payload"
+
+    logger, listener, buffer = _pipeline("levels")
+    listener.start()
+    logger.debug("payload %s", Payload(), extra={"metadata": Payload()})
+    listener.stop()
+
+    assert buffer.getvalue() == ""
+    assert not Payload.formatted
+
+
+def test_per_module_levels():
+    assert parse_levels("utils.utils=debug, algo_service=WARNING,unknown=LOUD,") == {
+        "utils.utils": logging.DEBUG,
+        "algo_service": logging.WARNING,
+    }
+    assert get_logger("utils.utils").name == f"{ROOT_LOGGER}.utils.utils"
@@ -0,0 +1,55 @@
+import asyncio
+from test.fake_algod import FakeAlgod
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from utils.metrics import Histogram, InstrumentedAlgod, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    metrics = MetricsRegistry()
+    histogram = metrics.histogram("latency_seconds", "latency", ("method",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value, method="status")
+    metrics.counter("lookups_total", "lookups", ("cache",), callback=lambda: {("params",): 3})
+
+    lines = metrics.render().splitlines()
+    assert 'latency_seconds_bucket{method="status",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{method="status",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{method="status",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{method="status"} 4' in lines
+    assert 'lookups_total{cache="params"} 3' in lines
+    with pytest.raises(ValueError):
+        metrics.counter("lookups_total", "again")
+
+
+def test_instrumented_algod_times_every_method():
+    class FailingAlgod(FakeAlgod):
+        def account_info(self, address: str, **kwargs):
+            raise AlgodHTTPError("not found", 404)
+
+    histogram = Histogram("algod_seconds", "algod", ("method", "outcome"))
+    algod = FailingAlgod()
+    client = InstrumentedAlgod(algod, histogram)
+
+    assert client.status()["last-round"] == algod.round
+    client.status()
+    with pytest.raises(AlgodHTTPError):
+        client.account_info("address")
+    assert client.calls is algod.calls
+
+    lines = histogram.render()
+    assert 'algod_seconds_count{method="status",outcome="ok"} 2' in lines
+    assert 'algod_seconds_count{method="account_info",outcome="error"} 1' in lines
+
+
+def test_instrumented_algod_awaits_async_methods():
+    class AsyncAlgod:
+        async def status(self):
+            return {"last-round": 1}
+
+    histogram = Histogram("async_algod_seconds", "algod", ("method", "outcome"))
+    client = InstrumentedAlgod(AsyncAlgod(), histogram)
+
+    assert asyncio.get_event_loop().run_until_complete(client.status()) == {"last-round": 1}
+    assert 'async_algod_seconds_count{method="status",outcome="ok"} 1' in histogram.render()
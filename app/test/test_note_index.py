@@ -0,0 +1,132 @@
+import json
+from test.fake_algod import FakeAlgod
+
+from algosdk import account
+from algosdk.future.transaction import (AssetTransferTxn, PaymentTxn,
+                                        assign_group_id)
+from utils.blocks import BlockSource
+from utils.note_index import NoteIndex, NoteIndexer
+from utils.notes import NOTE_PREFIX, split_note
+from utils.rounds import RoundFollower
+
+PREFIX = b"arboreum/v1:j"
+
+private_key, address = account.generate_account()
+other_key, other_address = account.generate_account()
+
+
+def _log(algod: FakeAlgod, asset_id: int, i: int, key=private_key, sender=address, prefix=PREFIX):
+    note = prefix + json.dumps({"data": {"i": i}}).encode()
+    return AssetTransferTxn(
+        sender, algod.suggested_params(), sender, 0, asset_id, revocation_target=sender, note=note
+    ).sign(key)
+
+
+def _i(row) -> int:
+    return json.loads(row["note"].replace(PREFIX, b"", 1))["data"]["i"]
+
+
+def _indexer(algod: FakeAlgod):
+    follower = RoundFollower(algod)
+    indexer = NoteIndexer(NoteIndex(":memory:"), BlockSource(algod), NOTE_PREFIX, senders={address})
+    follower.subscribe(indexer.on_round)
+    follower.poll()
+    return follower, indexer
+
+
+def test_only_our_logs_are_indexed():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+    algod.send_transactions(
+        [
+            _log(algod, 1, 0),
+            _log(algod, 1, 1, prefix=b"someone/else:j"),
+            _log(algod, 1, 2, key=other_key, sender=other_address),
+            PaymentTxn(address, algod.suggested_params(), address, 0, note=PREFIX + b"{}").sign(private_key),
+            _log(algod, 2, 3),
+        ]
+    )
+    follower.poll()
+    indexer.catch_up()
+
+    assert indexer.indexed_round == 1001
+    assert [_i(r) for r in indexer.index.query(1)] == [0]
+    assert indexer.index.count(2) == 1
+
+
+def test_logs_are_paged_in_chain_order():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+    for round in range(3):
+        algod.send_transactions([_log(algod, 1, round * 10 + i) for i in range(4)])
+        follower.poll()
+    indexer.catch_up()
+
+    pages, after = [], None
+    while True:
+        rows = indexer.index.query(1, after, limit=5)
+        if not rows:
+            break
+        pages.append([_i(r) for r in rows])
+        after = rows[-1]["round"], rows[-1]["offset"]
+    assert pages == [[0, 1, 2, 3, 10], [11, 12, 13, 20, 21], [22, 23]]
+
+
+def test_indexer_catches_up_from_start_round():
+    algod = FakeAlgod()
+    algod.send_transactions([_log(algod, 1, 0)])
+    algod.produce_block()
+    algod.produce_block()
+
+    follower = RoundFollower(algod)
+    indexer = NoteIndexer(NoteIndex(":memory:"), BlockSource(algod), PREFIX, start_round=1001)
+    follower.subscribe(indexer.on_round)
+    follower.poll()
+    indexer.catch_up()
+
+    assert indexer.indexed_round == 1002
+    assert indexer.index.count(1) == 1
+
+
+def test_export_iterates_in_batches_with_filters():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+    for round in range(4):
+        algod.send_transactions([_log(algod, asset_id, round * 10 + asset_id) for asset_id in (1, 2, 3)])
+        follower.poll()
+    indexer.catch_up()
+
+    rows = list(indexer.index.iter_notes([1, 3], min_round=1002, max_round=1003, batch_size=1))
+    assert [(r["asset_id"], _i(r)) for r in rows] == [(1, 11), (1, 21), (3, 13), (3, 23)]
+    assert len(list(indexer.index.iter_notes(batch_size=5))) == 12
+
+
+def test_chunked_logs_are_indexed_joined():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+    note = PREFIX + json.dumps({"data": {"i": 7, "invoices": ["x" * 100] * 30}}).encode()
+    txns = [
+        AssetTransferTxn(address, algod.suggested_params(), address, 0, 1, revocation_target=address, note=chunk)
+        for chunk in split_note(note)
+    ]
+    algod.send_transactions([txn.sign(private_key) for txn in assign_group_id(txns)] + [_log(algod, 1, 8)])
+    follower.poll()
+    indexer.catch_up()
+
+    assert [_i(r) for r in indexer.index.query(1)] == [7, 8]
+
+
+def test_an_index_of_another_chain_is_reset(tmp_path):
+    path = str(tmp_path / "note_index.db")
+    index = NoteIndex(path)
+    assert not index.bind_to_chain("local-genesis")
+    row = {"asset_id": 1, "round": 5, "offset": 0, "tx_id": "TX", "sender": address, "note": b"note"}
+    index.add_round(5, [row])
+
+    same = NoteIndex(path)
+    assert not same.bind_to_chain("local-genesis")
+    assert same.last_round == 5 and len(same.query(1)) == 1
+
+    other = NoteIndex(path)
+    assert other.bind_to_chain("testnet-genesis")
+    assert other.last_round is None and other.query(1) == []
@@ -0,0 +1,90 @@
+import base64
+import json
+
+import pytest
+from utils import notes
+from utils.utils import (get_note_bytes_from_tx, get_note_from_tx,
+                         get_object_from_note)
+
+PREFIX = b"arboreum/v1:j"
+
+
+def _tx(note: bytes = None):
+    txn = {"type": "axfer"}
+    if note is not None:
+        txn["note"] = base64.b64encode(note).decode()
+    return {"txn": {"txn": txn}}
+
+
+def test_only_notes_starting_with_the_prefix_are_decoded():
+    log = {"data": {"repaid": 100}}
+    txs = [
+        _tx(PREFIX + json.dumps(log).encode()),
+        _tx(b"other/v1:j" + PREFIX + b"{}"),
+        _tx(b"\xff\xfe binary"),
+        _tx(PREFIX + b"{broken"),
+        _tx(),
+    ]
+    assert notes.decode_tx_notes(txs) == [log, None, None, None, None]
+
+
+def test_stdlib_fallback_decodes_the_same():
+    raw = [PREFIX + json.dumps({"data": {"i": i, "s": "ü"}}).encode() for i in range(3)]
+    loads, notes.json_loads = notes.json_loads, notes._stdlib_json_loads
+    try:
+        assert notes.decode_notes(raw) == [{"data": {"i": i, "s": "ü"}} for i in range(3)]
+    finally:
+        notes.json_loads = loads
+
+
+def test_readers_detect_all_formats():
+    log = {"data": {"loanId": "loan-1", "repaid": [100] * 50, "note": "ü"}}
+    encoded = {format: notes.encode_note(log, format) for format in notes.NoteFormat}
+
+    assert encoded[notes.NoteFormat.json] == PREFIX + json.dumps(log).encode()
+    assert encoded[notes.NoteFormat.msgpack].startswith(b"arboreum/v1:m")
+    assert len(encoded[notes.NoteFormat.msgpack_zlib]) < len(encoded[notes.NoteFormat.msgpack])
+    assert notes.decode_notes(encoded.values()) == [log] * 3
+    assert notes.decode_note(b"arboreum/v1:x{}") is None
+
+
+def test_large_notes_are_split_and_joined():
+    log = {"data": {"invoices": [{"id": f"inv-{i}", "amount": i} for i in range(200)]}}
+    note = notes.encode_note(log)
+    chunks = notes.split_note(note)
+
+    assert len(chunks) > 1 and all(len(chunk) <= 1024 for chunk in chunks)
+    assert notes.join_chunks(chunks[::-1]) == note
+    assert notes.join_chunks(chunks[1:]) is None
+    # chunks of one group are decoded into one log, at the position of the first chunk
+    txs = [_tx(chunk) for chunk in chunks]
+    for tx in txs:
+        tx["txn"]["txn"]["grp"] = "g1"
+    assert notes.decode_tx_notes([_tx()] + txs) == [None, log] + [None] * (len(chunks) - 1)
+
+
+def test_chunked_notes_sharing_a_group_are_joined_separately():
+    logs = [
+        {"data": {"invoices": [{"id": f"{n}-{i}", "amount": i} for i in range(size)]}}
+        for n, size in enumerate((50, 80))
+    ]
+    chunks = [notes.split_note(notes.encode_note(log)) for log in logs]
+    assert [len(c) for c in chunks] == [2, 3]
+
+    raw = [PREFIX + b"{}"] + chunks[0] + chunks[1]
+    merged = notes.merge_chunks(raw, [b"g1"] * len(raw))
+    assert notes.decode_notes(n for n in merged if n is not None) == [{}] + logs
+    assert merged[1:] == [notes.encode_note(logs[0]), None, notes.encode_note(logs[1]), None, None]
+
+
+def test_per_transaction_helpers_detect_all_formats():
+    log = {"data": {"repaid": 100, "note": "ü"}}
+    for format in notes.NoteFormat:
+        tx = _tx(notes.encode_note(log, format))
+        assert get_object_from_note(get_note_from_tx(tx), prefix=PREFIX.decode()) == log
+        assert get_object_from_note(get_note_bytes_from_tx(tx), prefix=PREFIX.decode()) == log
+    # json notes are still plain text
+    note = get_note_from_tx(_tx(notes.encode_note(log)))
+    assert note == "arboreum/v1:j" + json.dumps(log)
+    with pytest.raises(AssertionError):
+        get_object_from_note(get_note_from_tx(_tx(b"other-app/v2:j{}")), prefix=PREFIX.decode())
@@ -0,0 +1,68 @@
+import asyncio
+
+from algosdk.future.transaction import SuggestedParams
+from utils.params import SuggestedParamsProvider
+from utils.rounds import RoundFollower
+
+
+class StubAlgod:
+    """ answers status and params-requests for a chain that advances one round per status_after_block-call """
+
+    def __init__(self, round: int = 10):
+        self.round = round
+        self.params_calls = 0
+
+    def status(self):
+        return {"last-round": self.round}
+
+    def status_after_block(self, round: int):
+        self.round = round + 1
+        return self.status()
+
+    def suggested_params(self):
+        self.params_calls += 1
+        return SuggestedParams(1000, self.round, self.round + 1000, "gh", "gid", False, "v", 1000)
+
+
+def test_params_are_served_from_memory():
+    algod = StubAlgod()
+    provider = SuggestedParamsProvider(algod)
+
+    first = provider.get()
+    second = provider.get()
+    assert algod.params_calls == 1
+    assert first.first == second.first == 10
+    assert provider.hits == 1 and provider.misses == 1
+
+    # callers get copies
+    first.fee = 5
+    assert provider.get().fee == 1000
+
+
+def test_params_follow_rounds():
+    algod = StubAlgod()
+    provider = SuggestedParamsProvider(algod)
+    follower = RoundFollower(algod)
+    follower.subscribe(provider.on_round)
+
+    follower.poll()
+    follower.poll()
+    assert provider.get().first == 11
+    assert provider.misses == 0
+
+
+def test_stale_params_are_refetched():
+    algod = StubAlgod()
+    provider = SuggestedParamsProvider(algod, max_stale_rounds=2)
+    provider.get()
+    provider.current_round = 13
+    algod.round = 13
+    assert provider.get().first == 13
+    assert algod.params_calls == 2
+
+
+def test_async_get_without_async_client():
+    algod = StubAlgod()
+    provider = SuggestedParamsProvider(algod)
+    params = asyncio.run(provider.get_async())
+    assert params.first == 10
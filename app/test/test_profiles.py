@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import json
+from test.fake_algod import FakeAlgod, fake_service
+
+from algosdk import account
+from algosdk.future.transaction import (ApplicationCloseOutTxn,
+                                        ApplicationNoOpTxn,
+                                        ApplicationOptInTxn)
+from utils.blocks import BlockSource
+from utils.profiles import ProfileIndexer, ProfileTable
+from utils.rounds import RoundFollower
+from utils.utils import parse_local_state
+
+APP_ID = 42
+
+registrar_key, registrar = account.generate_account()
+borrowers = [account.generate_account() for _ in range(3)]
+
+
+def _indexer(algod: FakeAlgod):
+    follower = RoundFollower(algod)
+    indexer = ProfileIndexer(ProfileTable(":memory:"), BlockSource(algod), APP_ID)
+    follower.subscribe(indexer.on_round)
+    follower.poll()
+    return follower, indexer
+
+
+def _set_profile(algod: FakeAlgod, borrower: str, loan_state: str, active_loan: int):
+    credit = json.dumps({"activeLoan": active_loan, "loanState": loan_state})
+    stxn = ApplicationNoOpTxn(
+        registrar, algod.suggested_params(), APP_ID, [b"new_profile", credit.encode()], [borrower]
+    ).sign(registrar_key)
+    # the borrower is the first entry of the accounts-array: account-index 1
+    algod.eval_deltas[stxn.get_txid()] = {"ld": {1: {"credit": {"at": 1, "bs": credit}}}}
+    return stxn
+
+
+def test_profiles_follow_opt_ins_calls_and_close_outs():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+
+    algod.send_transactions([ApplicationOptInTxn(a, algod.suggested_params(), APP_ID).sign(k) for k, a in borrowers])
+    follower.poll()
+    algod.send_transactions(
+        [
+            _set_profile(algod, borrowers[0][1], "live", 1),
+            _set_profile(algod, borrowers[1][1], "live", 2),
+            # calls to other apps are ignored
+            ApplicationNoOpTxn(registrar, algod.suggested_params(), APP_ID + 1, [b"x"]).sign(registrar_key),
+        ]
+    )
+    follower.poll()
+    algod.send_transactions(
+        [
+            _set_profile(algod, borrowers[1][1], "defaulted", 2),
+            ApplicationCloseOutTxn(borrowers[0][1], algod.suggested_params(), APP_ID).sign(borrowers[0][0]),
+        ]
+    )
+    follower.poll()
+    indexer.catch_up()
+
+    table = indexer.table
+    assert indexer.indexed_round == algod.round
+    assert table.get(borrowers[0][1]) is None
+    profile = table.get(borrowers[1][1])
+    assert (profile["loan_state"], profile["active_loan"], profile["round"]) == ("defaulted", 2, algod.round)
+    assert json.loads(profile["state"]["credit"]) == {"activeLoan": 2, "loanState": "defaulted"}
+    # opted in, but no profile yet
+    assert table.get(borrowers[2][1])["state"] == {}
+
+    assert [p["address"] for p in table.query(loan_state="defaulted")] == [borrowers[1][1]]
+    assert table.count() == 2 and table.count("live") == 0
+
+
+def test_profile_pages():
+    table = ProfileTable(":memory:")
+    credit = json.dumps({"activeLoan": 1, "loanState": "live"})
+    table.apply_round(1, {a: {"credit": credit} for _, a in borrowers})
+
+    first = table.query(loan_state="live", limit=2)
+    rest = table.query(loan_state="live", after=first[-1]["address"], limit=2)
+    assert [p["address"] for p in first + rest] == sorted(a for _, a in borrowers)
+
+
+def test_local_state_of_our_app_is_found_among_others():
+    credit = json.dumps({"activeLoan": 1, "loanState": "live"}).encode()
+    info = {
+        "address": registrar,
+        "apps-local-state": [
+            {"id": APP_ID + 1, "key-value": []},
+            {
+                "id": APP_ID,
+                "key-value": [
+                    {"key": base64.b64encode(b"credit").decode(), "value": {"bytes": base64.b64encode(credit).decode()}}
+                ],
+            },
+        ],
+    }
+    assert parse_local_state(info, APP_ID) == {"credit": credit.decode()}
+
+
+def test_a_table_of_another_chain_is_reset(tmp_path):
+    path = str(tmp_path / "profiles.db")
+    table = ProfileTable(path)
+    # a table from before the genesis hash was stored can not be told apart from one of another chain
+    table.apply_round(1, {borrowers[0][1]: {"credit": json.dumps({"activeLoan": 1, "loanState": "live"})}})
+    assert table.bind_to_chain("local-genesis")
+    assert table.last_round is None and table.count() == 0
+
+    table.apply_round(2, {borrowers[0][1]: {"credit": json.dumps({"activeLoan": 1, "loanState": "live"})}})
+    assert not ProfileTable(path).bind_to_chain("local-genesis")
+    assert ProfileTable(path).count() == 1
+
+
+def test_the_table_is_seeded_only_from_the_configured_start_round():
+    algod = FakeAlgod()
+    follower, indexer = _indexer(algod)
+    indexer.catch_up()
+    # started at the current round, profiles set before are missing
+    assert indexer.indexed_round == algod.round and not indexer.seeded
+
+    indexer = ProfileIndexer(ProfileTable(":memory:"), BlockSource(algod), APP_ID, start_round=algod.round - 5)
+    follower.subscribe(indexer.on_round)
+    follower.poll()
+    assert not indexer.seeded
+    indexer.catch_up()
+    assert indexer.seeded and indexer.stats()["seeded"]
+
+
+def test_profiles_missing_from_an_unseeded_table_are_read_from_the_chain():
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    algod = FakeAlgod()
+    service, server = fake_service(algod)
+    try:
+        borrower = borrowers[0][1]
+        credit = json.dumps({"activeLoan": 7, "loanState": "live"})
+        key_value = [
+            {
+                "key": base64.b64encode(b"credit").decode(),
+                "value": {"bytes": base64.b64encode(credit.encode()).decode()},
+            }
+        ]
+        algod._account(borrower)["apps-local-state"].append({"id": service.profile_contract_id, "key-value": key_value})
+        loop = asyncio.get_event_loop()
+
+        profile = loop.run_until_complete(service.get_profile(borrower))
+        assert (profile["loan_state"], profile["active_loan"]) == ("live", 7)
+        assert profile["state"] == {"credit": credit}
+        assert loop.run_until_complete(service.get_profile(borrowers[1][1])) is None
+    finally:
+        service.stop()
+        asyncio.get_event_loop().run_until_complete(service.close())
+        server.stop()
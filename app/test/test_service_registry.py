@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from test.fake_algod import FakeAlgod, fake_service, registrar_state
+
+import pytest
+import service_registry
+from algosdk import account
+from fastapi import HTTPException
+from service_registry import (STATUS_DEGRADED, STATUS_HEALTHY, STATUS_STOPPED,
+                              ServiceRegistry, get_algo_service)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture()
+def algod():
+    return FakeAlgod(block_time=0.05)
+
+
+@pytest.fixture()
+def service(algod):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    service, server = fake_service(algod)
+    yield service
+    service.stop()
+    run(service.close())
+    server.stop()
+
+
+@pytest.fixture()
+def registry(service):
+    registry = ServiceRegistry(factory=lambda: service)
+    registry.start()
+    yield registry
+    registry.stop()
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_refresh_checks_the_registrar_at_algod(registry, algod):
+    loads = algod.calls["application_info"]
+    registry.refresh()
+    assert registry.status == STATUS_HEALTHY
+    assert algod.calls["application_info"] == loads + 1
+
+    # a new registrar in a round without a call to the app (that the cache would have missed)
+    algod.apps[1] = registrar_state(1, account.generate_account()[1])
+    registry.refresh()
+    assert registry.status == STATUS_DEGRADED and "not registered as registrar" in registry.last_error
+
+    del algod.apps[1]
+    registry.refresh()
+    assert registry.status == STATUS_DEGRADED and "could not read global state" in registry.last_error
+
+
+def test_health_reports_a_stalled_round_follower(registry, service, algod):
+    _wait_for(lambda: service.round_follower.last_round is not None)
+    assert registry.health()["status"] == STATUS_HEALTHY
+    assert registry.health()["round_follower"]["running"]
+
+    registry.max_round_age_seconds = 0.2
+    algod.paused = True
+    _wait_for(lambda: registry.health()["status"] == STATUS_DEGRADED)
+    assert "processed no round" in registry.health()["error"]
+    registry.refresh()
+    assert registry.status == STATUS_DEGRADED
+
+    # recovered with the next refresh once rounds come in again
+    algod.paused = False
+    _wait_for(lambda: service.round_follower.round_age() < 0.1)
+    registry.refresh()
+    assert registry.health()["status"] == STATUS_HEALTHY
+    service.round_follower.stop()
+    health = registry.health()
+    assert health["status"] == STATUS_DEGRADED and health["error"] == "round-follower is not running"
+
+
+def test_a_failed_build_is_retried_by_the_refresh(service, monkeypatch):
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("algod unreachable")
+        return service
+
+    registry = ServiceRegistry(factory=factory)
+    monkeypatch.setattr(service_registry, "registry", registry)
+    registry.start()
+    try:
+        health = registry.health()
+        assert health["status"] == STATUS_DEGRADED and health["error"] == "algod unreachable"
+        assert health["net"] is None and health["round_follower"] is None
+        # requests fail fast with a 503 instead of retrying the build themselves
+        with pytest.raises(HTTPException) as e:
+            run(get_algo_service())
+        assert e.value.status_code == 503 and "algod unreachable" in e.value.detail
+        assert len(attempts) == 1
+
+        registry.refresh()
+        assert registry.status == STATUS_HEALTHY and registry.last_error is None
+        assert run(get_algo_service()) is service
+        assert registry.health()["net"] == "FAKE"
+    finally:
+        registry.stop()
+    assert registry.status == STATUS_STOPPED
+
+
+def test_the_lazy_build_runs_off_the_event_loop(service, monkeypatch):
+    threads = []
+
+    def factory():
+        threads.append(threading.current_thread())
+        return service
+
+    monkeypatch.setattr(service_registry, "registry", ServiceRegistry(factory=factory))
+    assert run(get_algo_service()) is service
+    assert run(get_algo_service()) is service
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+
+
+def test_set_replaces_the_service(service, monkeypatch):
+    registry = ServiceRegistry(factory=lambda: 1 / 0)
+    monkeypatch.setattr(service_registry, "registry", registry)
+    registry.set(service)
+
+    assert run(get_algo_service()) is service
+    health = registry.health()
+    assert health["status"] == STATUS_HEALTHY and health["net"] == "FAKE"
+    assert health["confirmations"]["pending"] == 0
+    assert registry.cache_stats().keys() == {"suggested_params", "account_info"}
@@ -0,0 +1,23 @@
+from algosdk import account
+from algosdk.future.transaction import (PaymentTxn, SuggestedParams,
+                                        assign_group_id)
+from utils.signing import SigningPool, sign_transactions
+
+private_key, address = account.generate_account()
+
+
+def test_pool_signs_in_order_and_keeps_group_ids():
+    params = SuggestedParams(1000, 1, 1000, "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", "testnet-v1.0", False)
+    txns = assign_group_id([PaymentTxn(address, params, address, i) for i in range(12)])
+    txns += [PaymentTxn(address, params, address, 100 + i) for i in range(30)]
+
+    pool = SigningPool(private_key, processes=2)
+    try:
+        signed = sign_transactions(txns, private_key, pool)
+    finally:
+        pool.close()
+
+    assert [s.transaction.amt for s in signed] == [txn.amt for txn in txns]
+    assert [s.transaction.group for s in signed] == [txn.group for txn in txns]
+    assert [s.signature for s in signed] == [txn.sign(private_key).signature for txn in txns]
+    assert pool.signed == len(txns)
@@ -0,0 +1,66 @@
+import json
+from test.fake_algod import FakeAlgod
+
+import utils.tracing as tracing
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from utils.metrics import Histogram, InstrumentedAlgod
+from utils.tracing import (FileSpanExporter, TracingMiddleware,
+                           parse_traceparent, span)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+def _app(sample_rate: float):
+    app = FastAPI()
+    algod = InstrumentedAlgod(FakeAlgod(), Histogram("traced_algod_seconds", "algod", ("method", "outcome")))
+
+    @app.get("/item/{item_id}")
+    async def _item(item_id: int):
+        with span("lookup", item_id=item_id) as s:
+            algod.status()
+            return {"traced": s is not None}
+
+    app.add_middleware(TracingMiddleware, sample_rate=sample_rate)
+    return app
+
+
+def test_traced_request_has_server_timing_and_is_exported(tmp_path, monkeypatch):
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+
+    response = TestClient(_app(sample_rate=1)).get("/item/7")
+    exporter.shutdown()
+
+    assert response.json() == {"traced": True}
+    timing = response.headers["server-timing"]
+    assert timing.startswith("total;dur=") and "lookup;dur=" in timing and "algod.status;dur=" in timing
+
+    [line] = (tmp_path / "traces.jsonl").read_text().splitlines()
+    spans = {s["name"]: s for s in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    assert set(spans) == {"GET /item/{item_id}", "lookup", "algod.status"}
+    root = spans["GET /item/{item_id}"]
+    assert "parentSpanId" not in root
+    assert spans["lookup"]["parentSpanId"] == root["spanId"]
+    assert spans["algod.status"]["parentSpanId"] == spans["lookup"]["spanId"]
+    assert {"key": "item_id", "value": {"intValue": "7"}} in spans["lookup"]["attributes"]
+
+
+def test_unsampled_requests_are_not_traced(monkeypatch):
+    monkeypatch.setattr(tracing, "_exporter", None)
+    client = TestClient(_app(sample_rate=0))
+
+    response = client.get("/item/7")
+    assert response.json() == {"traced": False}
+    assert "server-timing" not in response.headers
+
+    # the sampled-flag of the caller decides
+    response = client.get("/item/7", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"})
+    assert response.json() == {"traced": True}
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-01") == (TRACE_ID, "00f067aa0ba902b7", True)
+    assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00")[2] is False
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
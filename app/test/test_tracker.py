@@ -0,0 +1,180 @@
+import asyncio
+import time
+from test.fake_algod import FakeAlgod, fake_service
+
+import algo_service
+import pytest
+from algosdk import account
+from algosdk.future.transaction import PaymentTxn
+from fastapi import FastAPI
+from routes.v1.admin import admin_app
+from routes.v1.log import log_app
+from routes.v1.profile import profile_app
+from routes.v1.transactions import tx_app
+from service_registry import get_algo_service
+from starlette.testclient import TestClient
+from utils.tracker import (MAX_STATUS_QUERIES, TX_CONFIRMED, TX_PENDING,
+                           TX_REJECTED, TX_UNKNOWN, TransactionTracker)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture()
+def algod():
+    return FakeAlgod(block_time=0.05)
+
+
+@pytest.fixture()
+def service(algod):
+    # a loop of its own, the TestClient of other tests leaves none behind
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    service, server = fake_service(algod)
+    yield service
+    service.stop()
+    run(service.close())
+    server.stop()
+
+
+def test_bulk_status_requests_are_bounded(service, monkeypatch):
+    app = FastAPI()
+    app.include_router(tx_app, prefix="/v1/tx")
+    app.dependency_overrides[get_algo_service] = lambda: service
+    response = TestClient(app).post("/v1/tx/status", json=["TX"] * (MAX_STATUS_QUERIES + 1))
+    assert response.status_code == 400
+
+    in_flight, peak = 0, 0
+
+    async def transaction_status(txid):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return {"tx_id": txid}
+
+    monkeypatch.setattr(service, "transaction_status", transaction_status)
+    statuses = run(service.transaction_statuses([f"TX{i}" for i in range(MAX_STATUS_QUERIES)]))
+    assert [s["tx_id"] for s in statuses] == [f"TX{i}" for i in range(MAX_STATUS_QUERIES)]
+    assert peak == algo_service.MAX_PARALLEL_STATUS_LOOKUPS
+
+
+def _client(service) -> TestClient:
+    app = FastAPI()
+    app.include_router(log_app, prefix="/v1")
+    app.include_router(profile_app, prefix="/v1")
+    app.include_router(admin_app, prefix="/v1/admin")
+    app.include_router(tx_app, prefix="/v1/tx")
+    app.dependency_overrides[get_algo_service] = lambda: service
+    return TestClient(app)
+
+
+def _wait_for(condition, timeout: float = 5):
+    """ runs the loop (and with it the background confirmations) until the condition holds """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        run(asyncio.sleep(0.01))
+
+
+def _asset_input(name: str):
+    loan = {
+        "loanId": name,
+        "borrowerInfo": "test",
+        "principal": 200000,
+        "apr": 0.13,
+        "tenorInDays": 90,
+        "startDate": 1600942397,
+        "compoundingFrequency": "daily",
+        "data": "[]",
+    }
+    return {"assetName": name, "loanParams": loan}
+
+
+def _asset(client: TestClient) -> int:
+    return client.post("/v1/log/new", json=_asset_input("loan-1")).json()["assetId"]
+
+
+def test_tracker_transitions():
+    tracker = TransactionTracker(max_size=2)
+    tracker.track("A")
+    assert tracker.get("A")["status"] == TX_PENDING
+    tracker.confirm("A", 1001)
+    assert tracker.get("A")["status"] == TX_CONFIRMED and tracker.get("A")["confirmed_round"] == 1001
+
+    tracker.track("B")
+    tracker.reject("B", "expired")
+    assert tracker.get("B")["status"] == TX_REJECTED and tracker.get("B")["error"] == "expired"
+
+    # the oldest transactions are forgotten first
+    tracker.track("C")
+    assert tracker.get("A") is None and tracker.get("C") is not None
+
+
+@pytest.mark.parametrize("write", ["asset", "log", "profile", "clawback"])
+def test_writes_without_waiting_are_confirmed_in_the_background(service, algod, monkeypatch, write):
+    client = _client(service)
+    asset_id = _asset(client)
+    receiver = account.generate_account()[1]
+    requests = {
+        "asset": ("/v1/log/new", _asset_input("loan-2")),
+        "log": (f"/v1/log/{asset_id}", {"data": {"repaid": 1}}),
+        "profile": ("/v1/profile/new", {"userAddress": receiver, "loanState": "live", "activeLoan": asset_id}),
+        "clawback": (f"/v1/admin/clawback/{asset_id}/{receiver}", None),
+    }
+    path, body = requests[write]
+    evicted = []
+    evict = service.accounts.evict
+    monkeypatch.setattr(service.accounts, "evict", lambda *addresses: evicted.extend(addresses) or evict(*addresses))
+
+    algod.paused = True
+    response = client.post(path, params={"wait": "false"}, json=body)
+    assert response.status_code == 200
+    txid = response.json()["txId"]
+    assert client.get(f"/v1/tx/status/{txid}").json()["status"] == TX_PENDING
+
+    algod.paused = False
+    _wait_for(lambda: service.tracker.get(txid)["status"] != TX_PENDING)
+    status = client.get(f"/v1/tx/status/{txid}").json()
+    assert status["status"] == TX_CONFIRMED and status["confirmedRound"] > 0
+    assert evicted
+    if write == "asset":
+        assert response.json()["assetId"] is None
+        assert service.assets.contains(algod.pending_transaction_info(txid)["asset-index"])
+
+
+def test_writes_that_are_never_confirmed_are_rejected_in_the_background(service, algod, monkeypatch):
+    client = _client(service)
+    asset_id = _asset(client)
+    service.confirmations.timeout_rounds = 2
+    signed_log_txns = service._signed_log_txns
+
+    def dropped(*args):
+        stxns = signed_log_txns(*args)
+        algod.dropped.update(stxn.get_txid() for stxn in stxns)
+        return stxns
+
+    monkeypatch.setattr(service, "_signed_log_txns", dropped)
+    txid = client.post(f"/v1/log/{asset_id}", params={"wait": "false"}, json={"data": {}}).json()["txId"]
+
+    _wait_for(lambda: service.tracker.get(txid)["status"] != TX_PENDING)
+    status = client.get(f"/v1/tx/status/{txid}").json()
+    assert status["status"] == TX_REJECTED and "not confirmed in time" in status["error"]
+
+
+def test_unknown_txids_are_looked_up_at_algod(service, algod):
+    client = _client(service)
+    private_key, address = account.generate_account()
+    stxn = PaymentTxn(address, algod.suggested_params(), address, 0).sign(private_key)
+    algod.paused = True
+    algod.send_transaction(stxn)
+
+    statuses = client.post("/v1/tx/status", json=[stxn.get_txid(), "UNKNOWN"]).json()
+    assert [s["status"] for s in statuses] == [TX_PENDING, TX_UNKNOWN]
+    assert statuses[1]["error"]
+
+    algod.paused = False
+    _wait_for(lambda: algod.pending_transaction_info(stxn.get_txid()).get("confirmed-round"))
+    status = client.get(f"/v1/tx/status/{stxn.get_txid()}").json()
+    assert status["status"] == TX_CONFIRMED and service.tracker.get(stxn.get_txid()) is None
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+# without a round follower, cached account_info is only handed out for this many seconds (about one block)
+ACCOUNT_CACHE_MAX_AGE_SECONDS = float(os.getenv("ACCOUNT_CACHE_MAX_AGE_SECONDS", 4))
+
+# attributes of sdk-transactions that name accounts whose state the transaction changes
+ADDRESS_ATTRIBUTES = ("sender", "receiver", "close_remainder_to", "revocation_target", "close_assets_to")
+
+
+def txn_addresses(txns: Iterable) -> Set[str]:
+    """ all accounts a (confirmed) transaction may have changed: sender, receivers and the accounts of app-calls """
+    addresses = set()
+    for txn in txns:
+        for attribute in ADDRESS_ATTRIBUTES:
+            address = getattr(txn, attribute, None)
+            if address:
+                addresses.add(address)
+        addresses.update(getattr(txn, "accounts", None) or [])
+    return addresses
+
+
+class AccountInfoCache:
+    """
+    shared cache of account_info, keyed by (address, round): entries are only handed out in the round they were
+    fetched in and dropped as soon as the RoundFollower reports a new round (`on_round`). Without a follower they
+    expire after ACCOUNT_CACHE_MAX_AGE_SECONDS.
+    Concurrent misses for the same address and round are coalesced into a single fetch. Our own writes `evict`
+    the accounts they touched right away.
+    It has the account_info-method of the algod clients, so it can be handed to helpers that expect a client.
+    The returned dicts are shared between callers and must not be modified.
+    """
+
+    def __init__(self, client, async_client=None, max_age_seconds: float = ACCOUNT_CACHE_MAX_AGE_SECONDS):
+        self.client = client
+        self.async_client = async_client
+        self.max_age_seconds = max_age_seconds
+        self.current_round: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        # address -> (round, fetched_at, account_info)
+        self._entries: Dict[str, Tuple[Optional[int], float, Dict]] = {}
+        # bumped on every eviction, so that fetches started before it do not put stale state back into the cache
+        self._epochs: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[str, Optional[int]], Future] = {}
+        self._inflight_async: Dict[Tuple[str, Optional[int]], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, address: str) -> Optional[Dict]:
+        entry = self._entries.get(address)
+        if entry is None:
+            return None
+        round, fetched_at, info = entry
+        if round != self.current_round:
+            return None
+        if round is None and time.monotonic() - fetched_at >= self.max_age_seconds:
+            return None
+        return info
+
+    def _store(self, address: str, round: Optional[int], epoch: int, info: Dict):
+        with self._lock:
+            if self._epochs.get(address, 0) == epoch and round == self.current_round:
+                self._entries[address] = (round, time.monotonic(), info)
+
+    def account_info(self, address: str, **kwargs) -> Dict:
+        with self._lock:
+            info = self._cached(address)
+            if info is not None:
+                self.hits += 1
+                return info
+            key = (address, self.current_round)
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                epoch = self._epochs.get(address, 0)
+                future = self._inflight[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        try:
+            info = self.client.account_info(address)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+        self._store(address, key[1], epoch, info)
+        future.set_result(info)
+        return info
+
+    async def account_info_async(self, address: str) -> Dict:
+        with self._lock:
+            info = self._cached(address)
+            if info is not None:
+                self.hits += 1
+                return info
+            key = (address, self.current_round)
+            task = self._inflight_async.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                task = asyncio.ensure_future(self._fetch_async(address, key, self._epochs.get(address, 0)))
+                self._inflight_async[key] = task
+        # shielded, so that a cancelled caller does not cancel the fetch of the others
+        return await asyncio.shield(task)
+
+    async def _fetch_async(self, address: str, key: Tuple[str, Optional[int]], epoch: int) -> Dict:
+        try:
+            if self.async_client is not None:
+                info = await self.async_client.account_info(address)
+            else:
+                info = await run_in_threadpool(self.client.account_info, address)
+        finally:
+            with self._lock:
+                if self._inflight_async.get(key) is asyncio.current_task():
+                    del self._inflight_async[key]
+        self._store(address, key[1], epoch, info)
+        return info
+
+    def evict(self, *addresses: str):
+        with self._lock:
+            for address in addresses:
+                self._epochs[address] = self._epochs.get(address, 0) + 1
+                if self._entries.pop(address, None) is not None:
+                    self.evictions += 1
+                for inflight in (self._inflight, self._inflight_async):
+                    for key in [k for k in inflight if k[0] == address]:
+                        del inflight[key]
+
+    def on_round(self, round: int):
+        with self._lock:
+            self.current_round = round
+            self._entries = {a: entry for a, entry in self._entries.items() if entry[0] == round}
+
+    def stats(self):
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / total if total else None,
+            "size": len(self._entries),
+            "round": self.current_round,
+        }
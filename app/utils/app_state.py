@@ -0,0 +1,114 @@
+import base64
+import threading
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from algosdk import encoding
+from utils.blocks import BlockSource
+from utils.profiles import decode_state_value
+
+# types of TealValues in the state of an app
+BYTES_TYPE = 1
+UINT_TYPE = 2
+
+# the key of the registrar (32 address-bytes) in the global state of the profile contract
+REGISTRAR_KEY = "registrar"
+
+StateValue = Union[bytes, int]
+
+
+def decode_state(key_values: List[Dict]) -> Dict[str, StateValue]:
+    """ the (base64-)key-value-list of algod as {key: bytes or int} """
+    state = {}
+    for kv in key_values:
+        key = decode_state_value(base64.b64decode(kv["key"]))
+        value = kv["value"]
+        if value.get("type") == UINT_TYPE:
+            state[key] = value.get("uint", 0)
+        else:
+            state[key] = base64.b64decode(value.get("bytes", ""))
+    return state
+
+
+def state_address(state: Dict[str, StateValue], key: str) -> Optional[str]:
+    """ the address stored (as 32 bytes) under `key`, None if there is none """
+    value = state.get(key)
+    if not isinstance(value, bytes) or len(value) != 32:
+        return None
+    return encoding.encode_address(value)
+
+
+def calls_app(txs: List[Dict], app_id: int) -> bool:
+    return any(tx["txn"].get("type") == "appl" and tx["txn"].get("apid") == app_id for tx in txs)
+
+
+class GlobalStateCache:
+    """
+    the decoded global state of one app, fetched with a direct application-lookup. As RoundFollower-subscriber it
+    is only re-fetched after rounds whose block contains a call to the app (without a BlockSource: every round).
+    Changed keys are reported to `on_change(changed_keys, previous, current)`.
+    """
+
+    def __init__(
+        self,
+        client,
+        app_id: int,
+        blocks: BlockSource = None,
+        async_client=None,
+        on_change: Callable[[Set[str], Dict[str, StateValue], Dict[str, StateValue]], None] = None,
+    ):
+        self.client = client
+        self.app_id = app_id
+        self.blocks = blocks
+        self.async_client = async_client
+        self.on_change = on_change
+        self.loads = 0
+        self.changes = 0
+        self.loaded_round: Optional[int] = None
+        self._state: Optional[Dict[str, StateValue]] = None
+        self._lock = threading.Lock()
+
+    def _replace(self, app_info: Dict, round: int = None):
+        state = decode_state(app_info.get("params", {}).get("global-state", []))
+        with self._lock:
+            previous, self._state = self._state, state
+            self.loaded_round = round
+            self.loads += 1
+        if previous is None:
+            return
+        changed = {key for key in previous.keys() | state.keys() if previous.get(key) != state.get(key)}
+        if changed:
+            self.changes += 1
+            if self.on_change is not None:
+                self.on_change(changed, previous, state)
+
+    def load(self, round: int = None):
+        self._replace(self.client.application_info(self.app_id), round)
+
+    async def load_async(self):
+        self._replace(await self.async_client.application_info(self.app_id))
+
+    def get(self) -> Dict[str, StateValue]:
+        if self._state is None:
+            self.load()
+        return dict(self._state)
+
+    async def get_async(self) -> Dict[str, StateValue]:
+        if self._state is None:
+            await self.load_async()
+        return dict(self._state)
+
+    @property
+    def registrar(self) -> Optional[str]:
+        return state_address(self.get(), REGISTRAR_KEY)
+
+    def on_round(self, round: int):
+        if self._state is None or self.blocks is None or calls_app(self.blocks.transactions(round), self.app_id):
+            self.load(round)
+
+    def stats(self):
+        return {
+            "loads": self.loads,
+            "changes": self.changes,
+            "loaded_round": self.loaded_round,
+            "registrar": self.registrar if self._state is not None else None,
+        }
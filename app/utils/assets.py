@@ -0,0 +1,114 @@
+import base64
+import os
+import threading
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# every this many rounds the registry is reconciled against the account_info of the creator
+ASSET_RECONCILE_ROUNDS = int(os.getenv("ASSET_RECONCILE_ROUNDS", 200))
+
+
+def asset_params_from_txn(txn) -> Dict:
+    """ the asset-params (in the format algod returns them) of an asset created by the given AssetConfigTxn """
+    params = {
+        "creator": txn.sender,
+        "decimals": txn.decimals,
+        "default-frozen": txn.default_frozen,
+        "name": txn.asset_name,
+        "unit-name": txn.unit_name,
+        "total": txn.total,
+        "url": txn.url,
+    }
+    for key, address in [
+        ("manager", txn.manager),
+        ("reserve", txn.reserve),
+        ("freeze", txn.freeze),
+        ("clawback", txn.clawback),
+    ]:
+        if address:
+            params[key] = address
+    if txn.metadata_hash:
+        params["metadata-hash"] = base64.b64encode(txn.metadata_hash).decode("utf-8")
+    return params
+
+
+class CreatedAssetRegistry:
+    """
+    in-memory index (asset_id -> asset-params) of all assets created by `creator`, so that validating an asset-id
+    is a dict-lookup instead of downloading the (ever growing) account_info of the creator.
+    It is loaded once, extended by `add` whenever we create an asset and reconciled against the chain every
+    `reconcile_rounds` rounds (as RoundFollower-subscriber).
+    Unknown ids are double-checked with a single asset_info-lookup to cover assets created elsewhere since the last
+    reconciliation.
+    """
+
+    def __init__(self, client, creator: str, async_client=None, reconcile_rounds: int = ASSET_RECONCILE_ROUNDS):
+        self.client = client
+        self.async_client = async_client
+        self.creator = creator
+        self.reconcile_rounds = reconcile_rounds
+        self.loaded = False
+        self._assets: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _replace(self, account_info: Dict):
+        assets = {a["index"]: a["params"] for a in account_info.get("created-assets", [])}
+        with self._lock:
+            self._assets = assets
+            self.loaded = True
+
+    def load(self):
+        """ (re-)load all created assets from the account_info of the creator """
+        self._replace(self.client.account_info(self.creator))
+
+    async def load_async(self):
+        self._replace(await self.async_client.account_info(self.creator))
+
+    def add(self, asset_id: int, params: Dict):
+        with self._lock:
+            self._assets[asset_id] = params
+
+    def on_round(self, round: int):
+        if round % self.reconcile_rounds == 0:
+            self.load()
+
+    def _known(self, asset_id: int, asset_info: Dict) -> bool:
+        params = asset_info.get("params", {})
+        if params.get("creator") != self.creator:
+            return False
+        self.add(asset_id, params)
+        return True
+
+    def contains(self, asset_id: int) -> bool:
+        if not self.loaded:
+            self.load()
+        if asset_id in self._assets:
+            return True
+        try:
+            return self._known(asset_id, self.client.asset_info(asset_id))
+        except Exception:
+            return False
+
+    async def contains_async(self, asset_id: int) -> bool:
+        if not self.loaded:
+            await self.load_async()
+        if asset_id in self._assets:
+            return True
+        try:
+            return self._known(asset_id, await self.async_client.asset_info(asset_id))
+        except Exception:
+            return False
+
+    def get(self, asset_id: int) -> Optional[Dict]:
+        return self._assets.get(asset_id) if self.contains(asset_id) else None
+
+    async def get_async(self, asset_id: int) -> Optional[Dict]:
+        return self._assets.get(asset_id) if await self.contains_async(asset_id) else None
+
+    def asset_ids(self) -> List[int]:
+        if not self.loaded:
+            self.load()
+        return list(self._assets)
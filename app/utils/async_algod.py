@@ -0,0 +1,111 @@
+import base64
+import json
+from typing import Dict, List
+
+import httpx
+from algosdk import constants, encoding, error
+from algosdk.future import transaction
+
+API_VERSION_PREFIX = "/v2"
+
+
+class AsyncAlgodClient:
+    """
+    asyncio counterpart of `algosdk.v2client.algod.AlgodClient` covering the algod v2 endpoints used by this service.
+    Method names, arguments and return values mirror the sdk-client so that both can be used interchangeably
+    (apart from the `await`), errors are raised as `AlgodHTTPError` just like in the sdk.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Dict = None, timeout: float = 30.0):
+        self.algod_token = algod_token
+        self.algod_address = algod_address.rstrip("/")
+        self.headers = {"User-Agent": "py-algorand-sdk", constants.algod_auth_header: algod_token}
+        if headers:
+            self.headers.update(headers)
+        self._http = httpx.AsyncClient(headers=self.headers, timeout=timeout)
+
+    async def algod_request(
+        self,
+        method: str,
+        requrl: str,
+        params: Dict = None,
+        data: bytes = None,
+        headers: Dict = None,
+        response_format="json",
+    ):
+        url = self.algod_address + API_VERSION_PREFIX + requrl
+        try:
+            resp = await self._http.request(method, url, params=params, content=data, headers=headers)
+        except httpx.HTTPError as e:
+            raise error.AlgodHTTPError(str(e))
+
+        if resp.status_code >= 400:
+            msg = resp.text
+            try:
+                msg = json.loads(msg)["message"]
+            except Exception:
+                pass
+            raise error.AlgodHTTPError(msg, resp.status_code)
+
+        if response_format == "json":
+            try:
+                return resp.json()
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return resp.content
+
+    async def status(self):
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int):
+        return await self.algod_request("GET", f"/status/wait-for-block-after/{block_num}")
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def send_raw_transaction(self, txn: str) -> str:
+        """ txn: base64-encoded (concatenation of) signed transactions """
+        res = await self.algod_request(
+            "POST", "/transactions", data=base64.b64decode(txn), headers={"Content-Type": "application/x-binary"}
+        )
+        return res["txId"]
+
+    async def send_transaction(self, txn) -> str:
+        return await self.send_transactions([txn])
+
+    async def send_transactions(self, txns: List) -> str:
+        serialized = []
+        for txn in txns:
+            assert not isinstance(txn, transaction.Transaction), f"Attempt to send UNSIGNED transaction {txn}"
+            serialized.append(base64.b64decode(encoding.msgpack_encode(txn)))
+        return await self.send_raw_transaction(base64.b64encode(b"".join(serialized)))
+
+    async def pending_transaction_info(self, transaction_id: str):
+        return await self.algod_request("GET", f"/transactions/pending/{transaction_id}", params={"format": "json"})
+
+    async def account_info(self, address: str):
+        return await self.algod_request("GET", f"/accounts/{address}")
+
+    async def asset_info(self, asset_id: int):
+        return await self.algod_request("GET", f"/assets/{asset_id}")
+
+    async def application_info(self, application_id: int):
+        return await self.algod_request("GET", f"/applications/{application_id}")
+
+    async def block_info(self, block: int, response_format="json"):
+        return await self.algod_request(
+            "GET", f"/blocks/{block}", params={"format": response_format}, response_format=response_format
+        )
+
+    async def close(self):
+        await self._http.aclose()
@@ -0,0 +1,88 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from argon2 import PasswordHasher
+from dotenv import load_dotenv
+from utils.metrics import AUTH_VERIFY_SECONDS
+
+load_dotenv()
+
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 300))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 1024))
+
+
+class TokenVerifier:
+    """
+    verifies bearer tokens against the argon2-hash in HASHED_API_SECRET and remembers successful verifications.
+    Tokens are never stored: the cache is keyed by an HMAC of the token under a random per-process key, entries
+    expire after `ttl_seconds` and the least recently used ones are dropped beyond `max_size`.
+    Failed verifications are not cached, so a wrong token always pays the full argon2-cost.
+    The cache is a plain dict-lookup by digest: without the per-process key nobody can compute a digest, so timing
+    the lookup reveals nothing about the token (no constant-time comparison needed).
+    """
+
+    def __init__(self, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS, max_size: int = AUTH_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._hasher = PasswordHasher()
+        self._key = secrets.token_bytes(32)
+        self._cache = OrderedDict()  # digest -> expires_at
+        self._hashed_secret = None
+        self._lock = threading.Lock()
+
+    def _digest(self, token: str) -> bytes:
+        return hmac.new(self._key, token.encode("utf-8"), hashlib.sha256).digest()
+
+    def _current_secret(self) -> str:
+        """ the secret is read from the env on every call, if it changes all cached verifications are dropped """
+        hashed_secret = os.getenv("HASHED_API_SECRET")
+        if hashed_secret != self._hashed_secret:
+            with self._lock:
+                self._cache.clear()
+                self._hashed_secret = hashed_secret
+        return hashed_secret
+
+    def lookup(self, token: str) -> bool:
+        """ cheap check: True if the token has been verified within the last `ttl_seconds` """
+        self._current_secret()
+        digest = self._digest(token)
+        with self._lock:
+            expires_at = self._cache.get(digest)
+            if expires_at is None or expires_at < time.monotonic():
+                if expires_at is not None:
+                    del self._cache[digest]
+                self.misses += 1
+                return False
+            self._cache.move_to_end(digest)
+            self.hits += 1
+            return True
+
+    def verify(self, token: str) -> bool:
+        """ full argon2-verification, remembering the token on success """
+        hashed_secret = self._current_secret()
+        start = time.perf_counter()
+        try:
+            self._hasher.verify(hashed_secret, token)
+        except Exception:
+            AUTH_VERIFY_SECONDS.observe(time.perf_counter() - start, valid=False)
+            return False
+        AUTH_VERIFY_SECONDS.observe(time.perf_counter() - start, valid=True)
+
+        digest = self._digest(token)
+        with self._lock:
+            self._cache[digest] = time.monotonic() + self.ttl_seconds
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,105 @@
+import base64
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import msgpack
+from algosdk import encoding
+
+# how many decoded blocks are kept, so that all block-consumers of a round share one fetch
+BLOCK_CACHE_SIZE = 8
+
+# fields of (msgpack-)transactions that hold addresses, algod returns them as base32-strings in json
+ADDRESS_FIELDS = {"snd", "rcv", "close", "arcv", "asnd", "aclose", "fadd", "m", "r", "f", "c", "rekey", "sgnr"}
+
+
+def compute_txid(txn: Dict) -> str:
+    """ txid of a (msgpack-decoded, canonical) transaction dict """
+    # strings that are not utf-8 (asset names, urls, ... of anyone) are re-encoded to their original bytes
+    to_sign = b"TX" + msgpack.packb(txn, use_bin_type=True, unicode_errors="surrogateescape")
+    return base64.b32encode(encoding.checksum(to_sign)).decode().strip("=")
+
+
+def decode_block(raw: bytes) -> Dict:
+    # state-keys and -values are msgpack-strings that need not be utf-8, surrogateescape keeps their bytes
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False, unicode_errors="surrogateescape")
+
+
+def block_transactions(block: Dict) -> List[Dict]:
+    """
+    the transactions of a msgpack-decoded block as [{"txid", "offset", "txn", "stxn"}, ...] where `stxn` is the
+    SignedTxnInBlock (including the apply-data like `caid` or `dt`) and `offset` the intra-round position.
+    Genesis-id and -hash are stripped from transactions in blocks and have to be put back to compute the txid.
+    """
+    header = block["block"]
+    txs = []
+    for offset, stxn in enumerate(header.get("txns", [])):
+        txn = dict(stxn["txn"])
+        txn["gh"] = header["gh"]
+        if stxn.get("hgi"):
+            txn["gen"] = header["gen"]
+        txn = dict(sorted(txn.items()))
+        txs.append({"txid": compute_txid(txn), "offset": offset, "txn": txn, "stxn": stxn})
+    return txs
+
+
+def algod_json(value, key: str = None):
+    """ msgpack-transaction-values in the json-format of algod (base64 bytes and base32 addresses) """
+    if isinstance(value, dict):
+        return {k: algod_json(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [algod_json(v, "apat" if key == "apat" else None) for v in value]
+    if isinstance(value, bytes):
+        if key in ADDRESS_FIELDS or key == "apat":
+            return encoding.encode_address(value)
+        return base64.b64encode(value).decode()
+    return value
+
+
+def confirmed_txinfo(tx: Dict, round: int) -> Dict:
+    """
+    the pending_transaction_info of a transaction confirmed in `round`, built from its entry in the block (see
+    block_transactions): the signed transaction and the ids of a created asset or application.
+    State-deltas and logs are left out, whoever needs them asks algod.
+    """
+    stxn = tx["stxn"]
+    signed = {key: stxn[key] for key in ("sig", "msig", "lsig", "sgnr") if key in stxn}
+    signed["txn"] = tx["txn"]
+    txinfo = {"confirmed-round": round, "pool-error": "", "txn": algod_json(signed)}
+    if stxn.get("caid"):
+        txinfo["asset-index"] = stxn["caid"]
+    if stxn.get("apid"):
+        txinfo["application-index"] = stxn["apid"]
+    return txinfo
+
+
+class BlockSource:
+    """
+    fetches (msgpack) blocks from algod and keeps the last few decoded ones, so that all consumers of a round
+    (confirmations, indexers, caches) share a single fetch and txid-computation per block
+    """
+
+    def __init__(self, client, cache_size: int = BLOCK_CACHE_SIZE):
+        self.client = client
+        self.cache_size = cache_size
+        self.fetches = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, round: int):
+        with self._lock:
+            entry = self._blocks.get(round)
+            if entry is None:
+                block = decode_block(self.client.block_info(round, response_format="msgpack"))
+                entry = (block, block_transactions(block))
+                self.fetches += 1
+                self._blocks[round] = entry
+                while len(self._blocks) > self.cache_size:
+                    self._blocks.popitem(last=False)
+            return entry
+
+    def get(self, round: int) -> Dict:
+        return self._get(round)[0]
+
+    def transactions(self, round: int) -> List[Dict]:
+        return self._get(round)[1]
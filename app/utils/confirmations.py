@@ -0,0 +1,210 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from utils.blocks import BlockSource, confirmed_txinfo
+from utils.metrics import (CONFIRMATION_ROUNDS, CONFIRMATION_SECONDS,
+                           CONFIRMATIONS, CONFIRMATIONS_IN_FLIGHT)
+from utils.rounds import RoundFollower
+from utils.tracing import span
+from utils.utils import wait_for_confirmation, wait_for_confirmation_async
+
+load_dotenv()
+
+# a transaction that is not confirmed within this many rounds after it was registered fails with a timeout
+CONFIRMATION_TIMEOUT_ROUNDS = int(os.getenv("CONFIRMATION_TIMEOUT_ROUNDS", 20))
+# waiting for a confirmation gives up after this many seconds, also when no new rounds come in (0: no limit)
+CONFIRMATION_TIMEOUT_SECONDS = float(os.getenv("CONFIRMATION_TIMEOUT_SECONDS", 120))
+
+
+class TransactionExpiredError(Exception):
+    """ the chain moved past the last valid round of a transaction that was not confirmed """
+
+
+class ConfirmationTimeoutError(TimeoutError):
+    pass
+
+
+class _Pending:
+    def __init__(self, future: Future, last_valid: Optional[int], deadline: Optional[int], round: Optional[int]):
+        self.future = future
+        self.last_valid = last_valid
+        self.deadline = deadline
+        # when (and in which round) the wait started, for the confirmation-metrics
+        self.registered_at = time.perf_counter()
+        self.registered_round = round
+        # each newly registered txid is looked for once in the blocks since its registration round, in case it was
+        # confirmed before it was registered
+        self.checked = False
+
+
+class ConfirmationEngine:
+    """
+    one watcher for all pending transactions of the service: it follows new rounds (as RoundFollower-subscriber),
+    fetches each block once and resolves every registered txid found in it, with a txinfo built from the block
+    (see confirmed_txinfo). So the load on algod is one block per round no matter how many transactions are in flight.
+    Transactions that pass their last valid round fail with TransactionExpiredError, transactions that are not
+    confirmed within `timeout_rounds` with ConfirmationTimeoutError. Waiting callers also get a
+    ConfirmationTimeoutError after `timeout_seconds`, so they do not hang while the chain (or algod) stalls.
+    Rounds whose block could not be fetched are scanned again with the next round.
+    Without a running follower (e.g. in scripts), waiting falls back to polling per transaction.
+    """
+
+    def __init__(
+        self,
+        client,
+        follower: RoundFollower,
+        blocks: BlockSource = None,
+        async_client=None,
+        timeout_rounds: int = CONFIRMATION_TIMEOUT_ROUNDS,
+        timeout_seconds: float = CONFIRMATION_TIMEOUT_SECONDS,
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.follower = follower
+        self.blocks = blocks or BlockSource(client)
+        self.timeout_rounds = timeout_rounds
+        self.timeout_seconds = timeout_seconds
+        # the last round whose block was scanned (the rounds after it are scanned with the next one)
+        self.processed_round: Optional[int] = None
+        self.confirmed = 0
+        self.expired = 0
+        self.timed_out = 0
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def register(self, txid: str, last_valid: int = None, timeout_rounds: int = None) -> Future:
+        """ returns a future that resolves to the txinfo of the confirmed transaction (see confirmed_txinfo) """
+        timeout_rounds = timeout_rounds if timeout_rounds is not None else self.timeout_rounds
+        current_round = self.follower.last_round
+        deadline = current_round + timeout_rounds if current_round is not None and timeout_rounds else None
+        with self._lock:
+            pending = self._pending.get(txid)
+            if pending is None:
+                pending = _Pending(Future(), last_valid, deadline, current_round)
+                self._pending[txid] = pending
+                CONFIRMATIONS_IN_FLIGHT.inc()
+            return pending.future
+
+    def wait(self, txid: str, last_valid: int = None, timeout_rounds: int = None) -> Dict:
+        with span("confirmation", txid=txid):
+            if not self.follower.running:
+                return wait_for_confirmation(self.client, txid)
+            # (not future.result(timeout) since ConfirmationTimeoutError is a TimeoutError itself)
+            future = self.register(txid, last_valid, timeout_rounds)
+            done, _ = concurrent.futures.wait([future], self.timeout_seconds or None)
+            if not done:
+                raise self._timeout_error(txid)
+            return future.result()
+
+    async def wait_async(self, txid: str, last_valid: int = None, timeout_rounds: int = None) -> Dict:
+        with span("confirmation", txid=txid):
+            if not self.follower.running:
+                return await wait_for_confirmation_async(self.async_client, txid)
+            # asyncio.wait does not cancel the future (other callers of the same txid might wait for) on a timeout
+            future = asyncio.wrap_future(self.register(txid, last_valid, timeout_rounds))
+            done, _ = await asyncio.wait({future}, timeout=self.timeout_seconds or None)
+            if not done:
+                raise self._timeout_error(txid)
+            return future.result()
+
+    def _timeout_error(self, txid: str) -> ConfirmationTimeoutError:
+        self.timed_out += 1
+        CONFIRMATIONS.inc(outcome="timed_out")
+        return ConfirmationTimeoutError(f"transaction {txid} not confirmed within {self.timeout_seconds:g}s")
+
+    def on_round(self, round: int):
+        if self.processed_round is None:
+            self.processed_round = round - 1
+        # the rounds since the last one that was scanned, more than one if fetching a block failed before
+        rounds = set(range(self.processed_round + 1, round + 1))
+        if not self._pending:
+            self.processed_round = round
+            return
+        with self._lock:
+            pending = dict(self._pending)
+
+        # late registrations: the transaction might be in a block that was processed before it was registered
+        unchecked = []
+        for txid, p in pending.items():
+            if p.checked:
+                continue
+            if p.registered_round is not None and round - p.registered_round <= self.blocks.cache_size:
+                rounds.update(range(p.registered_round, round))
+                unchecked.append(p)
+                continue
+            p.checked = True
+            # too long ago (or before the first round was seen): one direct lookup
+            try:
+                txinfo = self.client.pending_transaction_info(txid)
+            except Exception:
+                # unknown to the pool (yet), the blocks will tell
+                continue
+            if txinfo.get("confirmed-round"):
+                self._resolve(txid, txinfo=txinfo)
+            elif txinfo.get("pool-error"):
+                self._resolve(txid, error=AssertionError(f"transaction {txid} rejected: {txinfo['pool-error']}"))
+
+        # a failing block-fetch raises before anything is marked as scanned or expired, the next round retries
+        for block_round in sorted(rounds):
+            for tx in self.blocks.transactions(block_round):
+                if tx["txid"] in pending and tx["txid"] in self._pending:
+                    self._resolve(tx["txid"], txinfo=confirmed_txinfo(tx, block_round))
+        for p in unchecked:
+            p.checked = True
+        self.processed_round = round
+
+        for txid, p in pending.items():
+            if txid not in self._pending:
+                continue
+            if p.last_valid is not None and round > p.last_valid:
+                self.expired += 1
+                self._resolve(
+                    txid,
+                    error=TransactionExpiredError(f"transaction {txid} expired in round {round}"),
+                    outcome="expired",
+                )
+            elif p.deadline is not None and round > p.deadline:
+                self.timed_out += 1
+                self._resolve(
+                    txid,
+                    error=ConfirmationTimeoutError(f"transaction {txid} not confirmed in time"),
+                    outcome="timed_out",
+                )
+
+    def _resolve(self, txid: str, txinfo: Dict = None, error: Exception = None, outcome: str = "failed"):
+        with self._lock:
+            p = self._pending.pop(txid, None)
+        if p is None:
+            return
+        CONFIRMATIONS_IN_FLIGHT.dec()
+        if p.future.done():
+            return
+        if error is not None:
+            CONFIRMATIONS.inc(outcome=outcome)
+            p.future.set_exception(error)
+        else:
+            self.confirmed += 1
+            CONFIRMATIONS.inc(outcome="confirmed")
+            CONFIRMATION_SECONDS.observe(time.perf_counter() - p.registered_at)
+            if p.registered_round is not None and txinfo.get("confirmed-round"):
+                CONFIRMATION_ROUNDS.observe(txinfo["confirmed-round"] - p.registered_round)
+            p.future.set_result(txinfo)
+
+    def stats(self):
+        return {
+            "pending": self.pending_count,
+            "confirmed": self.confirmed,
+            "expired": self.expired,
+            "timed_out": self.timed_out,
+            "blocks_fetched": self.blocks.fetches,
+        }
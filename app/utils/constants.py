@@ -1,9 +1,12 @@
 import os
 
 from dotenv import load_dotenv
+from utils.logger import get_logger
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 LOG_TOKEN_DESCRIPTION = """
     This token is used to track all transactions related to a given loan.
     Basic terms are in the token metadata.
@@ -27,7 +30,7 @@ def usdc_asset_id():
 
     if env == "LOCAL":
         # raise NotImplementedError()
-        print("WANRING this is not actually a token matching USDC specs")
+        logger.warning("the USDC-token of the LOCAL network is not actually a token matching USDC specs")
         return 261
 
     else:
@@ -37,3 +40,7 @@ def usdc_asset_id():
 USDC_ID = usdc_asset_id()
 # minimum an account must hold to be valid (and additionally for each asset or app they opt into!)
 MIN_PARTICIPATION_AMOUNT = 100000
+# maximum number of transactions in an atomic transaction group
+MAX_GROUP_SIZE = 16
+# maximum size of a transaction note in bytes
+MAX_NOTE_SIZE = 1024
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+from typing import List, Optional
+
+from utils.blocks import BlockSource
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# seconds to wait before retrying after a failed block
+RETRY_SECONDS = 2
+
+
+def bind_to_chain(db: sqlite3.Connection, lock: threading.Lock, genesis_hash: str, tables: List[str]) -> bool:
+    """
+    ties a local (sqlite) index with a `meta`-table to the chain of `genesis_hash`, which is stored on first use.
+    An index of another chain - or one from before the hash was stored - is emptied (`tables` and its meta-data),
+    since the same file may have been used with another network. Returns whether it was reset.
+    """
+    with lock, db:
+        stored = db.execute("SELECT value FROM meta WHERE key = 'genesis_hash'").fetchone()
+        if stored is not None and stored[0] == genesis_hash:
+            return False
+        indexed = db.execute("SELECT value FROM meta WHERE key = 'last_round'").fetchone()
+        for table in tables:
+            db.execute(f"DELETE FROM {table}")
+        db.execute("DELETE FROM meta")
+        db.execute("INSERT INTO meta VALUES ('genesis_hash', ?)", (genesis_hash,))
+    if indexed is not None:
+        logger.warning(
+            "local index of another chain was reset",
+            extra={"tables": tables, "genesis_hash": genesis_hash, "previous_genesis_hash": stored and stored[0]},
+        )
+    return indexed is not None
+
+
+class BlockIndexer:
+    """
+    base of the local indexes that follow the chain block by block: woken up by the RoundFollower through
+    `on_round`, it calls `index_round` for every round from `start_round` (default: the first round seen) on.
+    Indexing runs on its own thread, so catching up on many rounds does not hold up the other round-subscribers.
+    Subclasses implement `index_round` and `indexed_round` (the last round that was completely indexed).
+    """
+
+    def __init__(self, blocks: BlockSource, start_round: int = None, name: str = "block-indexer"):
+        self.blocks = blocks
+        self.start_round = start_round
+        self.name = name
+        self.target_round: Optional[int] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def indexed_round(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def index_round(self, round: int):
+        raise NotImplementedError
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def on_round(self, round: int):
+        if self.start_round is None:
+            self.start_round = round
+        self.target_round = round
+        self._wake.set()
+
+    def catch_up(self):
+        """ index all rounds up to the last round seen by the follower """
+        if self.target_round is None:
+            return
+        indexed = self.indexed_round
+        if indexed is None:
+            indexed = self.start_round - 1
+        while indexed < self.target_round and not self._stop.is_set():
+            indexed += 1
+            self.index_round(indexed)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.catch_up()
+            except Exception:
+                logger.exception("indexing failed", extra={"indexer": self.name, "indexed_round": self.indexed_round})
+                self._stop.wait(RETRY_SECONDS)
+                self._wake.set()
+
+    def stats(self):
+        return {"indexed_round": self.indexed_round, "target_round": self.target_round, "running": self.running}
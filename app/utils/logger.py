@@ -0,0 +1,109 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# level of all loggers of the service
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# per-module levels on top of LOG_LEVEL, e.g. "utils.utils=DEBUG,algo_service=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# all loggers of the service live below this one, so their levels and handlers do not touch those of uvicorn etc.
+ROOT_LOGGER = "loan_logger"
+
+# attributes every LogRecord has, everything else on a record was passed as `extra` and becomes a field of the event
+_RECORD_FIELDS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def parse_levels(levels: str) -> Dict[str, int]:
+    """ "module=LEVEL,..." as {module: level}, entries without a known level are ignored """
+    parsed = {}
+    for entry in levels.split(","):
+        module, _, level = entry.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if module.strip() and isinstance(level, int):
+            parsed[module.strip()] = level
+    return parsed
+
+
+class JsonFormatter(logging.Formatter):
+    """ one json-object per event: time, level, logger, message and the fields passed as `extra` (txid, ...) """
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name.replace(ROOT_LOGGER + ".", "", 1),
+            "message": record.getMessage(),
+        }
+        event.update((key, value) for key, value in record.__dict__.items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            event["exception"] = record.exc_text
+        return json.dumps(event, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # unlike the default, only the message is merged on the calling thread, the json is built by the listener
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, stream=None):
+    """
+    routes the loggers of the service through a queue to a listener-thread that writes the json-events to `stream`
+    (default: stdout), so logging never blocks a request on I/O. Only the first call has an effect.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        events = queue.SimpleQueue()
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(JsonFormatter())
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers = [_QueueHandler(events)]
+        root.setLevel(level)
+        root.propagate = False
+        for module, module_level in parse_levels(levels).items():
+            logging.getLogger(f"{ROOT_LOGGER}.{module}").setLevel(module_level)
+
+        _listener = QueueListener(events, handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """ stops the listener-thread after it wrote all queued events """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """ the logger of a module (pass __name__), its level can be set through LOG_LEVELS """
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,281 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from utils.tracing import route_template, span
+
+# default buckets (seconds) of latency histograms, from a cached lookup to a confirmation
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROUND_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    base of the metrics: a name, a help-text and the names of its labels, values are kept per tuple of label values.
+    With a `callback` ({label values: value}, or a plain value without labels) the values are read at scrape time.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), callback: Callable = None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self) -> Iterable[Tuple[LabelValues, float]]:
+        if self.callback is None:
+            with self._lock:
+                return list(self._values.items())
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(key, value) for key, value in values.items() if value is not None]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in self._samples():
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: [count per bucket (not cumulative, the last one is +Inf), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """ context manager observing the seconds spent in its block """
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """ the metrics of the service, rendered in the Prometheus text format (0.0.4) behind /metrics """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), callback: Callable = None) -> Counter:
+        return self.register(Counter(name, help, labels, callback))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), callback: Callable = None) -> Gauge:
+        return self.register(Gauge(name, help, labels, callback))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+ALGOD_REQUEST_SECONDS = METRICS.histogram(
+    "algod_request_duration_seconds", "duration of algod calls by client-method", ("method", "outcome")
+)
+HTTP_REQUEST_SECONDS = METRICS.histogram(
+    "http_request_duration_seconds", "duration of http requests by route", ("method", "route", "status")
+)
+CONFIRMATION_SECONDS = METRICS.histogram(
+    "confirmation_duration_seconds", "seconds from waiting for a transaction to its confirmation"
+)
+CONFIRMATION_ROUNDS = METRICS.histogram(
+    "confirmation_rounds", "rounds from waiting for a transaction to its confirmation", buckets=ROUND_BUCKETS
+)
+CONFIRMATIONS_IN_FLIGHT = METRICS.gauge("confirmations_in_flight", "transactions currently awaiting confirmation")
+CONFIRMATIONS = METRICS.counter("confirmations_total", "finished confirmation waits by outcome", ("outcome",))
+AUTH_VERIFY_SECONDS = METRICS.histogram(
+    "auth_verify_duration_seconds", "duration of argon2 token verifications", ("valid",)
+)
+
+
+class InstrumentedAlgod:
+    """
+    wraps an algod client (sdk or AsyncAlgodClient) and times every method call into ALGOD_REQUEST_SECONDS,
+    labelled with the method name, and into an algod.<method> span of the current trace (if any).
+    Attributes that are not methods are passed through.
+    """
+
+    def __init__(self, client, histogram: Histogram = ALGOD_REQUEST_SECONDS):
+        self._client = client
+        self._histogram = histogram
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        wrapped = self._timed_async(name, attr) if inspect.iscoroutinefunction(attr) else self._timed(name, attr)
+        # cached on the instance, so __getattr__ is only hit once per method
+        setattr(self, name, wrapped)
+        return wrapped
+
+    def _timed(self, name: str, method):
+        histogram = self._histogram
+
+        span_name = f"algod.{name}"
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start, outcome = time.perf_counter(), "error"
+            try:
+                with span(span_name):
+                    result = method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - start, method=name, outcome=outcome)
+
+        return timed
+
+    def _timed_async(self, name: str, method):
+        histogram = self._histogram
+
+        span_name = f"algod.{name}"
+
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            start, outcome = time.perf_counter(), "error"
+            try:
+                with span(span_name):
+                    result = await method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                histogram.observe(time.perf_counter() - start, method=name, outcome=outcome)
+
+        return timed
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI-middleware timing every http request (until its last body-chunk is sent) into HTTP_REQUEST_SECONDS,
+    labelled with the path-template of the route (e.g. /v1/profile/{address}) to keep the label values bounded
+    """
+
+    def __init__(self, app, histogram: Histogram = HTTP_REQUEST_SECONDS):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start, status = time.perf_counter(), 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.histogram.observe(
+                time.perf_counter() - start, method=scope["method"], route=route_template(scope), status=status
+            )
@@ -0,0 +1,203 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from algosdk import encoding
+from dotenv import load_dotenv
+from utils.blocks import BlockSource
+from utils.indexer import BlockIndexer, bind_to_chain
+from utils.notes import CHUNK_PREFIX, merge_chunks
+
+load_dotenv()
+
+# sqlite-file of the local note index (":memory:" keeps it in memory, e.g. for tests)
+NOTE_INDEX_PATH = os.getenv("NOTE_INDEX_PATH", "note_index.db")
+# round to start indexing from when the index is empty (default: the current round). Older rounds are only
+# available on archival nodes.
+NOTE_INDEX_START_ROUND = int(os.getenv("NOTE_INDEX_START_ROUND") or 0) or None
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# rows read from the index per query while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+
+def encode_cursor(round: int, offset: int) -> str:
+    return f"{round}.{offset}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        round, offset = cursor.split(".")
+        return int(round), int(offset)
+    except ValueError:
+        raise ValueError(f"invalid cursor {cursor}")
+
+
+class NoteIndex:
+    """
+    embedded (sqlite) store of the notes of log-transactions, keyed by (asset_id, round, intra-round offset),
+    so that reading the logs of an asset is a range-scan on the primary key
+    """
+
+    def __init__(self, path: str = NOTE_INDEX_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS notes (
+                    asset_id INTEGER NOT NULL,
+                    round INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    tx_id TEXT NOT NULL,
+                    sender TEXT NOT NULL,
+                    note BLOB NOT NULL,
+                    PRIMARY KEY (asset_id, round, offset)
+                ) WITHOUT ROWID
+                """
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def bind_to_chain(self, genesis_hash: str) -> bool:
+        """ empties the index if it holds the notes of another chain (see indexer.bind_to_chain) """
+        return bind_to_chain(self._db, self._lock, genesis_hash, ["notes"])
+
+    @property
+    def last_round(self) -> Optional[int]:
+        """ the last round that was completely indexed """
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_round'").fetchone()
+        return row[0] if row else None
+
+    def add_round(self, round: int, rows: Iterable[Dict]):
+        """ stores the notes of a round and marks the round as indexed (atomically) """
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO notes VALUES (:asset_id, :round, :offset, :tx_id, :sender, :note)", rows
+            )
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('last_round', ?)", (round,))
+
+    def query(self, asset_id: int, after: Tuple[int, int] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[Dict]:
+        """ notes of an asset in chain-order, starting after the (round, offset)-position `after` """
+        round, offset = after or (-1, -1)
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT round, offset, tx_id, sender, note FROM notes
+                WHERE asset_id = ? AND (round, offset) > (?, ?)
+                ORDER BY round, offset LIMIT ?
+                """,
+                (asset_id, round, offset, limit),
+            ).fetchall()
+        return [
+            {"asset_id": asset_id, "round": r[0], "offset": r[1], "tx_id": r[2], "sender": r[3], "note": r[4]}
+            for r in rows
+        ]
+
+    def iter_notes(
+        self,
+        asset_ids: List[int] = None,
+        min_round: int = None,
+        max_round: int = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[Dict]:
+        """
+        all notes (of `asset_ids` if given, within the round-range if given) ordered by asset and chain-order.
+        Rows are read in batches of `batch_size` with a key-seek, so memory stays constant no matter how many
+        notes there are and writers are only blocked for a single batch.
+        """
+        conditions = ["(asset_id, round, offset) > (?, ?, ?)"]
+        args: List = []
+        if asset_ids:
+            conditions.append(f"asset_id IN ({', '.join('?' * len(asset_ids))})")
+            args += asset_ids
+        if min_round is not None:
+            conditions.append("round >= ?")
+            args.append(min_round)
+        if max_round is not None:
+            conditions.append("round <= ?")
+            args.append(max_round)
+        sql = f"""
+            SELECT asset_id, round, offset, tx_id, sender, note FROM notes
+            WHERE {' AND '.join(conditions)}
+            ORDER BY asset_id, round, offset LIMIT ?
+        """
+
+        after = (-1, -1, -1)
+        while True:
+            with self._lock:
+                rows = self._db.execute(sql, (*after, *args, batch_size)).fetchall()
+            for r in rows:
+                yield {"asset_id": r[0], "round": r[1], "offset": r[2], "tx_id": r[3], "sender": r[4], "note": r[5]}
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][:3]
+
+    def count(self, asset_id: int) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM notes WHERE asset_id = ?", (asset_id,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def log_notes(txs: List[Dict], round: int, prefix: bytes, senders: Set[str] = None) -> List[Dict]:
+    """
+    the rows for the index: asset transfers (of `senders` if given) whose note starts with `prefix`.
+    Chunked notes are stored joined, in the row of their first chunk.
+    """
+    rows, groups = [], []
+    for tx in txs:
+        txn = tx["txn"]
+        if txn.get("type") != "axfer" or not txn.get("note", b"").startswith(prefix):
+            continue
+        sender = encoding.encode_address(txn["snd"])
+        if senders is not None and sender not in senders:
+            continue
+        rows.append(
+            {
+                "asset_id": txn.get("xaid", 0),
+                "round": round,
+                "offset": tx["offset"],
+                "tx_id": tx["txid"],
+                "sender": sender,
+                "note": txn["note"],
+            }
+        )
+        groups.append(txn.get("grp"))
+    if any(row["note"].startswith(CHUNK_PREFIX) for row in rows):
+        notes = merge_chunks([row["note"] for row in rows], groups)
+        rows = [dict(row, note=note) for row, note in zip(rows, notes) if note is not None]
+    return rows
+
+
+class NoteIndexer(BlockIndexer):
+    """ writes the notes of our log-transactions into a NoteIndex, block by block (see BlockIndexer) """
+
+    def __init__(
+        self,
+        index: NoteIndex,
+        blocks: BlockSource,
+        prefix: bytes,
+        senders: Set[str] = None,
+        start_round: int = NOTE_INDEX_START_ROUND,
+        name: str = "note-indexer",
+    ):
+        super().__init__(blocks, start_round, name)
+        self.index = index
+        self.prefix = prefix
+        self.senders = senders
+
+    @property
+    def indexed_round(self) -> Optional[int]:
+        return self.index.last_round
+
+    def index_round(self, round: int) -> int:
+        rows = log_notes(self.blocks.transactions(round), round, self.prefix, self.senders)
+        self.index.add_round(round, rows)
+        return len(rows)
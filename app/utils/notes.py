@@ -0,0 +1,162 @@
+import base64
+import json
+import zlib
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import msgpack
+from utils.constants import MAX_NOTE_SIZE
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# all our notes start with NOTE_PREFIX followed by one byte naming the format of the rest of the note
+# (note-field-conventions: <dapp-name>/v<version>:<format>)
+NOTE_PREFIX = b"arboreum/v1:"
+# "arboreum/v1:j": json
+JSON_FORMAT = b"j"
+# "arboreum/v1:m": msgpack, optionally zlib-compressed (recognized by the zlib-header, a msgpack-map never starts
+# with 0x78)
+MSGPACK_FORMAT = b"m"
+ZLIB_HEADER = 0x78
+# "arboreum/v1:c" + <sequence-byte> + <total-byte>: one chunk of a note that is too large for a single transaction.
+# The chunks are sent in one atomic group, joined they give the (prefix-less) note.
+CHUNK_FORMAT = b"c"
+CHUNK_PREFIX = NOTE_PREFIX + CHUNK_FORMAT
+CHUNK_HEADER_SIZE = len(CHUNK_PREFIX) + 2
+
+
+class NoteFormat(str, Enum):
+    json = "json"
+    msgpack = "msgpack"
+    # msgpack, zlib-compressed whenever that makes the note smaller
+    msgpack_zlib = "msgpack-zlib"
+
+
+def _stdlib_json_loads(raw: bytes, _decoder=json.JSONDecoder()):
+    # skips the type- and encoding-detection of json.loads, notes are utf-8 by convention
+    return _decoder.decode(raw.decode())
+
+
+# orjson is optional, it parses notes about twice as fast as the json-module
+json_loads = orjson.loads if orjson is not None else _stdlib_json_loads
+
+
+def _msgpack_loads(raw: bytes):
+    if raw[:1] == bytes([ZLIB_HEADER]):
+        raw = zlib.decompress(raw)
+    return msgpack.unpackb(raw, raw=False)
+
+
+def encode_note(obj: Dict, format: NoteFormat = NoteFormat.json) -> bytes:
+    """ the note for `obj` in the given format (json-notes are the same as (APP_PREFIX + json.dumps(obj))) """
+    if format == NoteFormat.json:
+        return NOTE_PREFIX + JSON_FORMAT + json.dumps(obj).encode()
+    payload = msgpack.packb(obj, use_bin_type=True)
+    if format == NoteFormat.msgpack_zlib:
+        compressed = zlib.compress(payload, 9)
+        if len(compressed) < len(payload):
+            payload = compressed
+    return NOTE_PREFIX + MSGPACK_FORMAT + payload
+
+
+def decode_note(raw: bytes, prefix: bytes = NOTE_PREFIX) -> Optional[Any]:
+    """
+    the object in one of our notes (any format), None for all other notes.
+    Foreign notes are rejected by a startswith on the bytes, before anything is decoded or copied.
+    """
+    if not raw.startswith(prefix):
+        return None
+    start = len(prefix)
+    body = start + 1
+    format = raw[start:body]
+    try:
+        if format == JSON_FORMAT:
+            return json_loads(raw[body:])
+        if format == MSGPACK_FORMAT:
+            return _msgpack_loads(raw[body:])
+    except (ValueError, zlib.error, msgpack.UnpackException):
+        pass
+    return None
+
+
+def split_note(note: bytes, max_size: int = MAX_NOTE_SIZE) -> List[bytes]:
+    """ the note itself if it fits into one transaction, otherwise its chunks (in order) """
+    if len(note) <= max_size:
+        return [note]
+    start = len(NOTE_PREFIX)
+    body = note[start:]
+    size = max_size - CHUNK_HEADER_SIZE
+    parts = []
+    for start in range(0, len(body), size):
+        end = start + size
+        parts.append(body[start:end])
+    if len(parts) > 255:
+        raise ValueError(f"note of {len(note)} bytes is too large")
+    return [CHUNK_PREFIX + bytes([seq, len(parts)]) + part for seq, part in enumerate(parts)]
+
+
+def join_chunks(chunks: Sequence[bytes]) -> Optional[bytes]:
+    """ the note the chunks were split from, None if they are incomplete """
+    parts, totals = {}, set()
+    for chunk in chunks:
+        if not chunk.startswith(CHUNK_PREFIX) or len(chunk) < CHUNK_HEADER_SIZE:
+            return None
+        parts[chunk[CHUNK_HEADER_SIZE - 2]] = chunk[CHUNK_HEADER_SIZE:]
+        totals.add(chunk[CHUNK_HEADER_SIZE - 1])
+    if len(totals) != 1:
+        return None
+    total = totals.pop()
+    if sorted(parts) != list(range(total)):
+        return None
+    return NOTE_PREFIX + b"".join(parts[seq] for seq in range(total))
+
+
+def merge_chunks(notes: Sequence[Optional[bytes]], groups: Sequence[Optional[bytes]]) -> List[Optional[bytes]]:
+    """
+    for the notes of consecutive transactions (and their group-ids): the chunks of a note are replaced by the
+    joined note at the position of the first chunk and None at the others. Incomplete chunks become None.
+    A group can hold the chunks of several notes (see AlgoService._signed_log_groups), they are sent one after the
+    other: a run of chunks ends where the group changes or the next note starts (sequence 0).
+    """
+    merged = list(notes)
+    runs: List[List[int]] = []
+    run_group = None
+    for i, note in enumerate(notes):
+        if note is None or not note.startswith(CHUNK_PREFIX):
+            continue
+        merged[i] = None
+        group = groups[i] or b""
+        first = len(note) < CHUNK_HEADER_SIZE or note[CHUNK_HEADER_SIZE - 2] == 0
+        if not runs or first or group != run_group:
+            runs.append([])
+            run_group = group
+        runs[-1].append(i)
+    for positions in runs:
+        merged[positions[0]] = join_chunks([notes[i] for i in positions])
+    return merged
+
+
+def decode_notes(notes: Iterable[bytes], prefix: bytes = NOTE_PREFIX) -> List[Optional[Any]]:
+    """ decode_note for many raw notes at once, one result per note (None for foreign/broken ones) """
+    return [decode_note(raw, prefix) for raw in notes]
+
+
+def decode_tx_notes(txs: Iterable[Dict], prefix: bytes = NOTE_PREFIX) -> List[Optional[Any]]:
+    """
+    batch-version of get_object_from_note(get_note_from_tx(tx), prefix) for transactions in the json-format of
+    algod (base64-encoded notes): one result per transaction, None if it has no note of ours.
+    Chunked notes are joined, their object is returned for the first chunk.
+    """
+    raw, groups = [], []
+    b64decode = base64.b64decode
+    for tx in txs:
+        txn = tx["txn"]["txn"]
+        note = txn.get("note")
+        raw.append(b64decode(note) if note else None)
+        groups.append(txn.get("grp"))
+    if any(note is not None and note.startswith(CHUNK_PREFIX) for note in raw):
+        raw = merge_chunks(raw, groups)
+    return [decode_note(note, prefix) if note is not None else None for note in raw]
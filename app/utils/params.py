@@ -0,0 +1,117 @@
+import copy
+import os
+import threading
+import time
+from typing import Optional
+
+from algosdk.future.transaction import SuggestedParams
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from utils.tracing import span
+
+load_dotenv()
+
+# cached params are only handed out while the chain is at most this many rounds past their first valid round
+# (so every transaction built from them keeps nearly the full validity window) ...
+PARAMS_MAX_STALE_ROUNDS = int(os.getenv("PARAMS_MAX_STALE_ROUNDS", 10))
+# ... and, in case no round follower is running, for at most this many seconds
+PARAMS_MAX_AGE_SECONDS = float(os.getenv("PARAMS_MAX_AGE_SECONDS", 30))
+
+
+class SuggestedParamsProvider:
+    """
+    shared, in-memory source of SuggestedParams for all transaction builders.
+    Subscribed to a RoundFollower (`on_round`), the params are refreshed in the background as rounds advance so
+    that builders never wait for algod. Without a follower, params expire after PARAMS_MAX_AGE_SECONDS.
+    Every caller gets its own copy, so builders may modify the params (e.g. flat_fee) without side effects.
+    """
+
+    def __init__(
+        self,
+        client,
+        async_client=None,
+        max_stale_rounds: int = PARAMS_MAX_STALE_ROUNDS,
+        max_age_seconds: float = PARAMS_MAX_AGE_SECONDS,
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.max_stale_rounds = max_stale_rounds
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.current_round: Optional[int] = None
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def last_valid_round(self) -> Optional[int]:
+        return self._params.last if self._params is not None else None
+
+    def _is_valid(self) -> bool:
+        params = self._params
+        if params is None:
+            return False
+        if self.current_round is not None and self.current_round - params.first > self.max_stale_rounds:
+            return False
+        return time.monotonic() - self._fetched_at < self.max_age_seconds
+
+    def _store(self, params: SuggestedParams):
+        with self._lock:
+            self._params = params
+            self._fetched_at = time.monotonic()
+            self.current_round = max(self.current_round or 0, params.first)
+            self.refreshes += 1
+
+    def _hit(self) -> Optional[SuggestedParams]:
+        with self._lock:
+            if self._is_valid():
+                self.hits += 1
+                return copy.copy(self._params)
+            self.misses += 1
+            return None
+
+    def get(self) -> SuggestedParams:
+        with span("suggested_params") as s:
+            params = self._hit()
+            if s is not None:
+                s.set_attribute("cached", params is not None)
+            if params is None:
+                self.refresh()
+                params = copy.copy(self._params)
+        return params
+
+    async def get_async(self) -> SuggestedParams:
+        with span("suggested_params") as s:
+            params = self._hit()
+            if s is not None:
+                s.set_attribute("cached", params is not None)
+            if params is None:
+                if self.async_client is not None:
+                    self._store(await self.async_client.suggested_params())
+                else:
+                    await run_in_threadpool(self.refresh)
+                params = copy.copy(self._params)
+        return params
+
+    def refresh(self):
+        self._store(self.client.suggested_params())
+
+    def on_round(self, round: int):
+        """ RoundFollower-callback: refresh once the chain moved past the round the params were fetched in """
+        self.current_round = round
+        params = self._params
+        if params is None or round > params.first:
+            self.refresh()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_ratio": self.hits / total if total else None,
+            "first_valid_round": self._params.first if self._params is not None else None,
+            "last_valid_round": self.last_valid_round,
+        }
@@ -0,0 +1,243 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from algosdk import encoding
+from dotenv import load_dotenv
+from utils.blocks import BlockSource
+from utils.indexer import BlockIndexer, bind_to_chain
+
+load_dotenv()
+
+# sqlite-file of the materialized profile table (":memory:" keeps it in memory, e.g. for tests)
+PROFILE_TABLE_PATH = os.getenv("PROFILE_TABLE_PATH", "profiles.db")
+# round to start the block scan from when the table is empty, for a complete table this is the round the profile
+# contract was created in (default: the current round, so only profiles changed from then on are known)
+PROFILE_INDEX_START_ROUND = int(os.getenv("PROFILE_INDEX_START_ROUND") or 0) or None
+
+PROFILE_PAGE_SIZE = 100
+MAX_PROFILE_PAGE_SIZE = 1000
+
+# OnComplete-values of application-calls (apan)
+OPT_IN = 1
+CLOSE_OUT = 2
+CLEAR_STATE = 3
+# actions of a local-state delta (at)
+SET_BYTES = 1
+SET_UINT = 2
+DELETE = 3
+
+# the key of the credit profile in the local state of an account, a json-object {"activeLoan", "loanState"}
+CREDIT_KEY = "credit"
+
+
+def _raw(value) -> bytes:
+    # blocks are decoded with surrogateescape, so strings that were not valid utf-8 get their original bytes back
+    return value.encode("utf-8", "surrogateescape") if isinstance(value, str) else value
+
+
+def decode_state_value(value: bytes) -> str:
+    """ bytes of a state-value as text (like parse_local_state does), base64 if they are not valid utf-8 """
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return base64.b64encode(value).decode("utf-8")
+
+
+def local_state_changes(
+    txs: List[Dict], app_id: int, load: Callable[[str], Optional[Dict[str, Any]]]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    the local states (of `app_id`) changed by the transactions of a block: {address: state or None if the account
+    left the app}. The local-state deltas in the apply-data of the app-calls are applied on top of the states
+    returned by `load` (the state before this block).
+    """
+    states: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def current(address: str) -> Dict[str, Any]:
+        if address not in states:
+            states[address] = load(address)
+        return dict(states[address] or {})
+
+    for tx in txs:
+        txn = tx["txn"]
+        if txn.get("type") != "appl" or txn.get("apid") != app_id:
+            continue
+        sender = encoding.encode_address(txn["snd"])
+        on_complete = txn.get("apan", 0)
+        if on_complete == OPT_IN:
+            states[sender] = current(sender)
+        # account-index 0 is the sender, the others index into the accounts-array of the call
+        accounts = [sender] + [encoding.encode_address(a) for a in txn.get("apat", [])]
+        for index, delta in tx["stxn"].get("dt", {}).get("ld", {}).items():
+            address = accounts[int(index)]
+            state = current(address)
+            for key, value in delta.items():
+                key = decode_state_value(_raw(key))
+                action = value.get("at")
+                if action == SET_BYTES:
+                    state[key] = decode_state_value(_raw(value.get("bs", b"")))
+                elif action == SET_UINT:
+                    state[key] = value.get("ui", 0)
+                elif action == DELETE:
+                    state.pop(key, None)
+            states[address] = state
+        if on_complete in (CLOSE_OUT, CLEAR_STATE):
+            states[sender] = None
+    return states
+
+
+def credit_fields(state: Dict[str, Any]) -> Dict[str, Any]:
+    """ loanState and activeLoan of the credit profile in a local state (None if it has none / is not json) """
+    try:
+        credit = json.loads(state.get(CREDIT_KEY) or "{}")
+    except ValueError:
+        credit = {}
+    if not isinstance(credit, dict):
+        credit = {}
+    return {"loan_state": credit.get("loanState"), "active_loan": credit.get("activeLoan")}
+
+
+class ProfileTable:
+    """
+    materialized (sqlite) table of the local states of all accounts opted in to the profile contract: one row per
+    address (primary key) with the decoded local state and the fields of its credit profile, loanState indexed
+    """
+
+    def __init__(self, path: str = PROFILE_TABLE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profiles (
+                    address TEXT PRIMARY KEY,
+                    loan_state TEXT,
+                    active_loan,
+                    state TEXT NOT NULL,
+                    round INTEGER NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS profiles_loan_state ON profiles (loan_state, address)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def bind_to_chain(self, genesis_hash: str) -> bool:
+        """ empties the table if it holds the profiles of another chain (see indexer.bind_to_chain) """
+        return bind_to_chain(self._db, self._lock, genesis_hash, ["profiles"])
+
+    @property
+    def last_round(self) -> Optional[int]:
+        """ the last round that was completely applied """
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_round'").fetchone()
+        return row[0] if row else None
+
+    @property
+    def first_round(self) -> Optional[int]:
+        """ the round the table was started from (changes before it are not in the table) """
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'first_round'").fetchone()
+        return row[0] if row else None
+
+    def _row(self, r) -> Dict:
+        return {"address": r[0], "loan_state": r[1], "active_loan": r[2], "state": json.loads(r[3]), "round": r[4]}
+
+    def get(self, address: str) -> Optional[Dict]:
+        with self._lock:
+            r = self._db.execute(
+                "SELECT address, loan_state, active_loan, state, round FROM profiles WHERE address = ?", (address,)
+            ).fetchone()
+        return self._row(r) if r else None
+
+    def state(self, address: str) -> Optional[Dict[str, Any]]:
+        row = self.get(address)
+        return row["state"] if row else None
+
+    def apply_round(self, round: int, changes: Dict[str, Optional[Dict[str, Any]]]):
+        """ stores the changed local states of a round (None: removed) and marks the round as applied, atomically """
+        upserts = [
+            (address, *credit_fields(state).values(), json.dumps(state), round)
+            for address, state in changes.items()
+            if state is not None
+        ]
+        deletes = [(address,) for address, state in changes.items() if state is None]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)", upserts)
+            self._db.executemany("DELETE FROM profiles WHERE address = ?", deletes)
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES ('first_round', ?)", (round,))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('last_round', ?)", (round,))
+
+    def query(self, loan_state: str = None, after: str = None, limit: int = PROFILE_PAGE_SIZE) -> List[Dict]:
+        """ profiles (with the given loanState, through its index) ordered by address, starting after `after` """
+        conditions, args = ["address > ?"], [after or ""]
+        if loan_state is not None:
+            conditions.append("loan_state = ?")
+            args.append(loan_state)
+        with self._lock:
+            rows = self._db.execute(
+                f"""
+                SELECT address, loan_state, active_loan, state, round FROM profiles
+                WHERE {' AND '.join(conditions)}
+                ORDER BY address LIMIT ?
+                """,
+                (*args, limit),
+            ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def count(self, loan_state: str = None) -> int:
+        with self._lock:
+            if loan_state is None:
+                return self._db.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM profiles WHERE loan_state = ?", (loan_state,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ProfileIndexer(BlockIndexer):
+    """
+    keeps a ProfileTable current from the calls to the profile contract, block by block (see BlockIndexer).
+    The table is `seeded` (holds every profile) if it was started at the configured start round, which has to be
+    the creation round of the contract, and has caught up with the chain. Started from a later round, it only knows
+    the profiles changed since.
+    """
+
+    def __init__(
+        self,
+        table: ProfileTable,
+        blocks: BlockSource,
+        app_id: int,
+        start_round: int = PROFILE_INDEX_START_ROUND,
+        name: str = "profile-indexer",
+    ):
+        super().__init__(blocks, start_round, name)
+        self.table = table
+        self.app_id = app_id
+        # the configured start round (start_round itself becomes the first round seen if none is configured)
+        self.seed_round = start_round
+
+    @property
+    def seeded(self) -> bool:
+        first_round, indexed_round = self.table.first_round, self.indexed_round
+        if self.seed_round is None or first_round is None or first_round > self.seed_round:
+            return False
+        return self.target_round is not None and indexed_round >= self.target_round
+
+    def stats(self):
+        return {**super().stats(), "seeded": self.seeded}
+
+    @property
+    def indexed_round(self) -> Optional[int]:
+        return self.table.last_round
+
+    def index_round(self, round: int) -> int:
+        changes = local_state_changes(self.blocks.transactions(round), self.app_id, self.table.state)
+        self.table.apply_round(round, changes)
+        return len(changes)
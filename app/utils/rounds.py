@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# seconds to wait before asking algod again after a failed status-call
+RETRY_SECONDS = 2
+
+
+class RoundFollower:
+    """
+    follows the chain from a background thread using `status_after_block` (which blocks on algod until the next
+    round is available) and calls every subscriber once per new round, in order.
+    One follower per service is enough to drive all round-dependent caches and watchers.
+    """
+
+    def __init__(self, client, name: str = "round-follower"):
+        self.client = client
+        self.name = name
+        self.last_round: Optional[int] = None
+        # wall-clock time at which last_round was processed
+        self.last_round_time: Optional[float] = None
+        self._subscribers: List[Callable[[int], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """ callback(round) is called from the follower-thread for every new round """
+        self._subscribers.append(callback)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def poll(self):
+        """ wait for the next round (or get the current one on the first call) and notify the subscribers """
+        if self.last_round is None:
+            current_round = self.client.status()["last-round"]
+            self._notify(current_round)
+            return
+        current_round = self.client.status_after_block(self.last_round)["last-round"]
+        for round in range(self.last_round + 1, current_round + 1):
+            self._notify(round)
+
+    def round_age(self) -> Optional[float]:
+        """ seconds since the last round was processed, None before the first one """
+        if self.last_round_time is None:
+            return None
+        return time.time() - self.last_round_time
+
+    def stats(self):
+        return {"running": self.running, "last_round": self.last_round, "round_age": self.round_age()}
+
+    def _notify(self, round: int):
+        self.last_round = round
+        self.last_round_time = time.time()
+        for callback in self._subscribers:
+            try:
+                callback(round)
+            except Exception:
+                logger.exception("subscriber failed", extra={"follower": self.name, "round": round})
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning("could not get status from algod", extra={"follower": self.name, "error": str(e)})
+                self._stop.wait(RETRY_SECONDS)
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from algosdk.future.transaction import SignedTransaction, Transaction
+from dotenv import load_dotenv
+from utils.tracing import span
+
+load_dotenv()
+
+# number of signing processes (0 disables the pool, transactions are then signed inline)
+SIGNING_PROCESSES = int(os.getenv("SIGNING_PROCESSES", os.cpu_count() or 1))
+# smaller batches are signed inline, the round trip to the workers would cost more than it saves
+SIGNING_POOL_MIN_BATCH = int(os.getenv("SIGNING_POOL_MIN_BATCH", 32))
+
+# the key of the worker process, set once by the initializer of the pool
+_worker_key: Optional[str] = None
+
+
+def _init_worker(private_key: str):
+    global _worker_key
+    _worker_key = private_key
+
+
+def _sign_chunk(txns: List[Transaction]) -> List[SignedTransaction]:
+    return [txn.sign(_worker_key) for txn in txns]
+
+
+class SigningPool:
+    """
+    signs (large batches of) transactions with one key on a pool of worker processes, so that ed25519-signing and
+    msgpack-encoding of bulk operations are not serialized by the GIL.
+    The key is handed to the workers on startup and not kept by the pool itself. Group-ids have to be assigned
+    before signing, the signed transactions are returned in the order of the input.
+    Workers are spawned (not forked), since the service runs background threads.
+    """
+
+    def __init__(self, private_key: str, processes: int = SIGNING_PROCESSES):
+        self.processes = processes
+        self.signed = 0
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(private_key,),
+        )
+
+    def sign(self, txns: List[Transaction]) -> List[SignedTransaction]:
+        # one chunk per process (and not more than a few hundred transactions per pickle)
+        size = max(1, min(-(-len(txns) // self.processes), 512))
+        chunks = []
+        for start in range(0, len(txns), size):
+            end = start + size
+            chunks.append(txns[start:end])
+        signed = [stxn for chunk in self._executor.map(_sign_chunk, chunks) for stxn in chunk]
+        self.signed += len(signed)
+        return signed
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def sign_transactions(txns: List[Transaction], private_key: str, pool: SigningPool = None) -> List[SignedTransaction]:
+    """ signs on the pool if given and the batch is large enough, otherwise inline """
+    on_pool = pool is not None and len(txns) >= SIGNING_POOL_MIN_BATCH
+    with span("sign", count=len(txns), pool=on_pool):
+        if on_pool:
+            return pool.sign(txns)
+        return [txn.sign(private_key) for txn in txns]
@@ -0,0 +1,318 @@
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.routing import Match
+from utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# share of requests that are traced (0: tracing off), requests with a sampled traceparent-header are always traced
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+# file the finished traces are appended to in the OTLP/JSON format, empty: traces are not exported
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+SERVICE_NAME = "algo-loan-logger"
+# spans of one trace beyond this are dropped (and counted), e.g. in bulk operations
+MAX_SPANS_PER_TRACE = 1000
+SERVER_TIMING_MAX_ENTRIES = 20
+
+# SpanKind of OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+# StatusCode of OTLP
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_NOT_TCHAR = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def route_template(scope) -> str:
+    """ the path-template of the route (e.g. /v1/profile/{address}) that handles a request """
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class Trace:
+    """ the finished spans of one trace, spans that end after the trace was finished are dropped """
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            if self.finished or len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return
+            self.spans.append(span)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(
+        self, trace: Trace, name: str, parent_id: str = None, attributes: Dict = None, kind: int = SPAN_KIND_INTERNAL
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add(self)
+
+    def to_otlp(self) -> Dict:
+        otlp = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error is not None else {},
+        }
+        if self.parent_id is not None:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+class _SpanContext:
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+
+    def __enter__(self) -> Optional[Span]:
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        self._span = Span(parent.trace, self.name, parent.span_id, self.attributes)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return
+        if exc is not None:
+            self._span.error = f"{exc_type.__name__}: {exc}"
+        self._span.end()
+        _current_span.reset(self._token)
+
+
+def span(name: str, **attributes) -> _SpanContext:
+    """
+    context manager for a child span of the current span (`with span("sign", count=16) as s:`). Outside of a sampled
+    trace it does nothing and yields None, so spans cost next to nothing in requests that are not traced.
+    """
+    return _SpanContext(name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """ (trace_id, parent_id, sampled) of a w3c traceparent-header, None if it is missing or invalid """
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def start_trace(
+    name: str, traceparent: str = None, sample_rate: float = TRACE_SAMPLE_RATE, **attributes
+) -> Optional[Span]:
+    """
+    the root span of a new trace, or None if the request is not sampled. A traceparent-header continues the trace of
+    the caller and its sampled-flag decides, otherwise `sample_rate` does.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id, sampled = f"{random.getrandbits(128):032x}", None, random.random() < sample_rate
+    if not sampled:
+        return None
+    return Span(Trace(trace_id), name, parent_id, attributes, SPAN_KIND_SERVER)
+
+
+def finish_trace(root: Span):
+    """ ends the root span and hands the trace to the exporter (if TRACE_EXPORT_PATH is set) """
+    root.end()
+    trace = root.trace
+    with trace._lock:
+        trace.finished = True
+    if trace.dropped:
+        root.set_attribute("dropped_spans", trace.dropped)
+    if _exporter is not None:
+        _exporter.export(trace)
+
+
+def server_timing(root: Span) -> str:
+    """ value of the Server-Timing header: the total and the summed durations of the finished spans by name """
+    totals: Dict[str, float] = {}
+    for s in list(root.trace.spans):
+        totals[s.name] = totals.get(s.name, 0) + s.duration_ms
+    slowest = sorted(totals.items(), key=lambda item: -item[1])[:SERVER_TIMING_MAX_ENTRIES]
+    entries = [f"total;dur={root.duration_ms:.1f}"]
+    entries.extend(f"{_NOT_TCHAR.sub('_', name)};dur={ms:.1f}" for name, ms in slowest)
+    return ", ".join(entries)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def otlp_json(trace: Trace) -> Dict:
+    """ a trace as OTLP/JSON ExportTraceServiceRequest """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in trace.spans]}],
+            }
+        ]
+    }
+
+
+class FileSpanExporter:
+    """
+    appends finished traces to a file, one OTLP/JSON ExportTraceServiceRequest per line (the format of the
+    file-exporter and the otlpjsonfile-receiver of the OpenTelemetry collector). Writing happens on a background
+    thread, so finishing a trace never waits for the disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.exported = 0
+        self._queue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(trace)
+
+    def _run(self):
+        with open(self.path, "a") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    f.write(json.dumps(otlp_json(trace)) + "\n")
+                    f.flush()
+                    self.exported += 1
+                except Exception:
+                    logger.exception("could not export trace", extra={"trace_id": trace.trace_id})
+
+    def shutdown(self, timeout: float = 5):
+        """ stops the writer-thread after it wrote all queued traces """
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+_exporter: Optional[FileSpanExporter] = FileSpanExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+if _exporter is not None:
+    atexit.register(_exporter.shutdown)
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware starting a (sampled) trace per http request. The spans opened while handling it (see `span`) are
+    summarized in a Server-Timing response header and the finished trace goes to the exporter.
+    """
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = dict(scope["headers"]).get(b"traceparent")
+        root = start_trace(
+            scope["method"],
+            traceparent.decode("latin-1") if traceparent else None,
+            self.sample_rate,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                headers = list(message.get("headers", [])) + [(b"server-timing", server_timing(root).encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            route = route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.set_attribute("http.route", route)
+            finish_trace(root)
@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TX_PENDING = "pending"
+TX_CONFIRMED = "confirmed"
+TX_REJECTED = "rejected"
+TX_UNKNOWN = "unknown"
+
+# how many transactions are remembered (oldest ones are forgotten first)
+TX_TRACKER_SIZE = int(os.getenv("TX_TRACKER_SIZE", 10000))
+# most transactions per status-request (the status-routes need no auth, unknown txids are looked up at algod)
+MAX_STATUS_QUERIES = 256
+
+
+class TransactionTracker:
+    """
+    in-process record of the transactions this service submitted: pending until confirmed or rejected.
+    Used to answer status-requests for transactions that were submitted without waiting for their confirmation.
+    """
+
+    def __init__(self, max_size: int = TX_TRACKER_SIZE):
+        self.max_size = max_size
+        self._txs: Dict[str, Dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _set(self, txid: str, **status):
+        with self._lock:
+            entry = self._txs.setdefault(txid, {"tx_id": txid, "submitted_at": time.time()})
+            entry.update(status)
+            self._txs.move_to_end(txid)
+            while len(self._txs) > self.max_size:
+                self._txs.popitem(last=False)
+
+    def track(self, txid: str):
+        self._set(txid, status=TX_PENDING, confirmed_round=None, error=None)
+
+    def confirm(self, txid: str, confirmed_round: int):
+        self._set(txid, status=TX_CONFIRMED, confirmed_round=confirmed_round, error=None)
+
+    def reject(self, txid: str, error: str):
+        self._set(txid, status=TX_REJECTED, confirmed_round=None, error=error)
+
+    def get(self, txid: str) -> Optional[Dict]:
+        entry = self._txs.get(txid)
+        return dict(entry) if entry is not None else None
+
+
+def status_from_pending_info(txid: str, txinfo: Dict) -> Dict:
+    """ interpret the pending_transaction_info of algod for a transaction the tracker does not know """
+    if txinfo.get("confirmed-round"):
+        return {"tx_id": txid, "status": TX_CONFIRMED, "confirmed_round": txinfo["confirmed-round"], "error": None}
+    if txinfo.get("pool-error"):
+        return {"tx_id": txid, "status": TX_REJECTED, "confirmed_round": None, "error": txinfo["pool-error"]}
+    return {"tx_id": txid, "status": TX_PENDING, "confirmed_round": None, "error": None}
@@ -1,4 +1,5 @@
-from typing import Dict
+from enum import Enum
+from typing import Dict, List, Optional
 
 from humps import camelize
 from pydantic import BaseModel
@@ -71,6 +72,39 @@ class AssetLog(CamelModel):
     data: Dict
 
 
+class AssetLogEntry(AssetLog):
+    asset_id: int
+
+
+class UnsignedTransactionType(str, Enum):
+    opt_in_asset = "optInAsset"
+    opt_in_profile = "optInProfile"
+    usdc_transfer = "usdcTransfer"
+
+
+class UnsignedTransactionSpec(CamelModel):
+    type: UnsignedTransactionType
+    # the account that signs the transaction (the opting-in account, or the sender of a transfer)
+    address: str
+    # optInAsset only
+    asset_id: Optional[int]
+    # usdcTransfer only, amount in whole USDC
+    receiver: Optional[str]
+    amount: Optional[int]
+
+
+class UnsignedTransactionBatch(CamelModel):
+    transactions: List[UnsignedTransactionSpec]
+    # assign a group-id, so that the transactions can only be confirmed together
+    group: bool = False
+
+
+class OptInQuery(CamelModel):
+    address: str
+    # None: the opt-in to the profile-contract
+    asset_id: Optional[int]
+
+
 class CreditProfile(CamelModel):
     loan_state: str
     active_loan: int
@@ -92,3 +126,19 @@ class BaseException(Exception):
 
 class InvalidAssetIDException(BaseException):
     pass
+
+
+class ServiceUnavailableException(BaseException):
+    pass
+
+
+class InvalidCursorException(BaseException):
+    pass
+
+
+class LogTooLargeException(BaseException):
+    pass
+
+
+class InvalidTransactionSpecException(BaseException):
+    pass
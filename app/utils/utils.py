@@ -1,11 +1,20 @@
 import base64
 import hashlib
 import json
-from typing import Any, Dict
+import logging
+import time
+from typing import Any, Dict, List, Tuple
 
 from algosdk import account, encoding
 from algosdk.future import transaction
 from utils.constants import LOG_TOKEN_DESCRIPTION
+from utils.logger import get_logger
+from utils.metrics import (CONFIRMATION_ROUNDS, CONFIRMATION_SECONDS,
+                           CONFIRMATIONS, CONFIRMATIONS_IN_FLIGHT)
+from utils.notes import NOTE_PREFIX, decode_note
+from utils.tracing import span
+
+logger = get_logger(__name__)
 
 
 #  vvvv  copied from official docs vvvvv
@@ -14,17 +23,65 @@ def wait_for_confirmation(client, txid):
     Utility function to wait until the transaction is
     confirmed before proceeding.
     """
-    last_round = client.status().get("last-round")
-    txinfo = client.pending_transaction_info(txid)
-    while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
-        print("Waiting for confirmation")
-        last_round += 1
-        client.status_after_block(last_round)
-        txinfo = client.pending_transaction_info(txid)
-    print("Transaction {} confirmed in round {}.".format(txid, txinfo.get("confirmed-round")))
+    start = time.perf_counter()
+    last_round = first_round = client.status().get("last-round")
+    with span("wait_for_confirmation", txid=txid):
+        CONFIRMATIONS_IN_FLIGHT.inc()
+        try:
+            txinfo = client.pending_transaction_info(txid)
+            while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
+                if txinfo.get("pool-error"):
+                    CONFIRMATIONS.inc(outcome="failed")
+                    raise AssertionError(f"transaction {txid} was rejected: {txinfo['pool-error']}")
+                logger.debug("waiting for confirmation", extra={"txid": txid, "round": last_round})
+                last_round += 1
+                client.status_after_block(last_round)
+                txinfo = client.pending_transaction_info(txid)
+        finally:
+            CONFIRMATIONS_IN_FLIGHT.dec()
+    _record_confirmed(txid, txinfo, start, first_round)
+    return txinfo
+
+
+async def wait_for_confirmation_async(client, txid):
+    """ same as wait_for_confirmation but for the AsyncAlgodClient, the waiting only costs a coroutine """
+    start = time.perf_counter()
+    last_round = first_round = (await client.status()).get("last-round")
+    with span("wait_for_confirmation", txid=txid):
+        CONFIRMATIONS_IN_FLIGHT.inc()
+        try:
+            txinfo = await client.pending_transaction_info(txid)
+            while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
+                if txinfo.get("pool-error"):
+                    CONFIRMATIONS.inc(outcome="failed")
+                    raise AssertionError(f"transaction {txid} was rejected: {txinfo['pool-error']}")
+                logger.debug("waiting for confirmation", extra={"txid": txid, "round": last_round})
+                last_round += 1
+                await client.status_after_block(last_round)
+                txinfo = await client.pending_transaction_info(txid)
+        finally:
+            CONFIRMATIONS_IN_FLIGHT.dec()
+    _record_confirmed(txid, txinfo, start, first_round)
     return txinfo
 
 
+def _record_confirmed(txid: str, txinfo: Dict, start: float, first_round: int):
+    """ logs a confirmation and adds it to the confirmation-metrics """
+    seconds = time.perf_counter() - start
+    CONFIRMATIONS.inc(outcome="confirmed")
+    CONFIRMATION_SECONDS.observe(seconds)
+    CONFIRMATION_ROUNDS.observe(txinfo["confirmed-round"] - first_round)
+    logger.info(
+        "transaction confirmed",
+        extra={
+            "txid": txid,
+            "confirmed_round": txinfo.get("confirmed-round"),
+            "asset_id": txinfo.get("asset-index"),
+            "duration_ms": round(seconds * 1000, 1),
+        },
+    )
+
+
 #   Utility function used to print created asset for account and assetid
 def print_created_asset(algodclient, account, assetid):
     # note: if you have an indexer instance available it is easier to just use this
@@ -62,7 +119,10 @@ def get_asset_holding(algodclient, account, assetid):
     # note: if you have an indexer instance available it is easier to just use this
     # response = myindexer.accounts(asset_id = assetid)
     # then loop thru the accounts returned and match the account you are looking for
-    account_info = algodclient.account_info(account)
+    return find_asset_holding(algodclient.account_info(account), assetid)
+
+
+def find_asset_holding(account_info, assetid):
     idx = 0
     for my_account_info in account_info["assets"]:
         scrutinized_asset = account_info["assets"][idx]
@@ -76,7 +136,10 @@ def get_created_asset(algodclient, account, assetid):
     # note: if you have an indexer instance available it is easier to just use this
     # response = myindexer.accounts(asset_id = assetid)
     # then use 'account_info['created-assets'][0] to get info on the created asset
-    account_info = algodclient.account_info(account)
+    return find_created_asset(algodclient.account_info(account), assetid)
+
+
+def find_created_asset(account_info, assetid):
     idx = 0
     for my_account_info in account_info["created-assets"]:
         scrutinized_asset = account_info["created-assets"][idx]
@@ -124,28 +187,48 @@ def hash_str(s, return_type="bytes"):
         return base64.b64encode(h.digest())
 
 
-def get_note_from_tx(tx):
-    return base64.b64decode(tx["txn"]["txn"]["note"]).decode()
+def get_note_bytes_from_tx(tx) -> bytes:
+    """ the raw note of a transaction in the json-format of algod """
+    return base64.b64decode(tx["txn"]["txn"]["note"])
 
 
-def get_object_from_note(note_str, prefix):
-    if prefix in note_str:
-        return json.loads(note_str.split(prefix)[1])
-    else:
+def get_note_from_tx(tx) -> str:
+    """
+    the note of a transaction in the json-format of algod as text. Bytes that are not valid utf-8 (msgpack-notes)
+    are kept as surrogates, so get_object_from_note reads every format; use get_note_bytes_from_tx for the raw note.
+    """
+    return get_note_bytes_from_tx(tx).decode("utf-8", "surrogateescape")
+
+
+def get_object_from_note(note, prefix=NOTE_PREFIX):
+    """
+    the object in one of our notes, in any format (see utils.notes.decode_note). A prefix including the format
+    (like APP_PREFIX) matches all formats. Chunked notes have to be joined first, decode_tx_notes does that.
+    """
+    note = note.encode("utf-8", "surrogateescape") if isinstance(note, str) else note
+    prefix = prefix.encode() if isinstance(prefix, str) else prefix
+    if prefix.startswith(NOTE_PREFIX):
+        prefix = NOTE_PREFIX
+    obj = decode_note(note, prefix)
+    if obj is None:
         raise AssertionError("Prefix not in note")
+    return obj
 
 
-def get_arc3_nft_metadata(
-    name: str, loan_data: Dict[str, Any], description: str = LOG_TOKEN_DESCRIPTION, return_type="bytes"
-):
-    json_metadata = f"""{{
+def _arc3_nft_metadata_json(name: str, loan_data: Dict[str, Any], description: str) -> str:
+    return f"""{{
         "name": "{name}",
         "description": "{description}",
         "decimals": 0,
         "properties": "{json.dumps(loan_data, indent=2, sort_keys=True)}"
     }}"""
-    print("metadata_obj:")
-    print(str(json_metadata))
+
+
+def get_arc3_nft_metadata(
+    name: str, loan_data: Dict[str, Any], description: str = LOG_TOKEN_DESCRIPTION, return_type="bytes"
+):
+    json_metadata = _arc3_nft_metadata_json(name, loan_data, description)
+    logger.debug("arc3 metadata", extra={"asset_name": name, "metadata": json_metadata})
     return hash_str(json_metadata, return_type)
     # vars = {
     #     'name': name,
@@ -159,19 +242,25 @@ def get_arc3_nft_metadata(
     # return hash_str(str_to_be_hashed, return_type)
 
 
+def get_arc3_nft_metadata_batch(
+    assets: List[Tuple[str, Dict[str, Any]]], description: str = LOG_TOKEN_DESCRIPTION, return_type="bytes"
+):
+    """ get_arc3_nft_metadata for many (name, loan_data) at once, without logging every metadata object """
+    return [hash_str(_arc3_nft_metadata_json(name, loan_data, description), return_type) for name, loan_data in assets]
+
+
 # print(hash_file_data("./sample_loan.json"))
 # print(hash_file_data("./sample_loan.json", 'base64'))
 # print(hash_object({'a': 1}, 'base64'))
 # print(hash_object({'a': 1}))
 
 # Call application
-def call_app(client, private_key, index, app_args, accounts):
+def call_app(client, private_key, index, app_args, accounts, params=None, confirmations=None):
     # Declare sender
     sender = account.address_from_private_key(private_key)
-    print("Call from account: ", sender)
 
-    # Get node suggested parameters
-    params = client.suggested_params()
+    # Get node suggested parameters (unless given, e.g. from a SuggestedParamsProvider)
+    params = params or client.suggested_params()
     # params.flat_fee = True
     # params.fee = 1000
 
@@ -179,53 +268,87 @@ def call_app(client, private_key, index, app_args, accounts):
     txn = transaction.ApplicationNoOpTxn(sender, params, index, app_args, accounts)
 
     # Sign transaction
-    signed_txn = txn.sign(private_key)
+    with span("sign", count=1):
+        signed_txn = txn.sign(private_key)
     tx_id = signed_txn.transaction.get_txid()
 
     # Send transaction
     client.send_transactions([signed_txn])
 
-    # Await confirmation
-    wait_for_confirmation(client, tx_id)
+    # Await confirmation (through the shared ConfirmationEngine if given)
+    if confirmations is not None:
+        confirmations.wait(tx_id, txn.last_valid_round)
+    else:
+        wait_for_confirmation(client, tx_id)
+
+    # Log results (the state deltas are only in the full pending_transaction_info, fetched for the debug log only)
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_app_call(sender, tx_id, client.pending_transaction_info(tx_id))
+
+    return tx_id
+
 
-    # Display results
-    transaction_response = client.pending_transaction_info(tx_id)
-    print("Called app-id: ", transaction_response["txn"]["txn"]["apid"])
+async def call_app_async(client, private_key, index, app_args, accounts, params=None, wait=True):
+    """ call_app for the AsyncAlgodClient, with wait=False it returns right after submitting the transaction """
+    sender = account.address_from_private_key(private_key)
+
+    params = params or await client.suggested_params()
+    txn = transaction.ApplicationNoOpTxn(sender, params, index, app_args, accounts)
+    with span("sign", count=1):
+        signed_txn = txn.sign(private_key)
+    tx_id = signed_txn.transaction.get_txid()
 
-    if "global-state-delta" in transaction_response:
-        print("Global State updated :\n", transaction_response["global-state-delta"])
-    if "local-state-delta" in transaction_response:
-        print("Local State updated :\n", transaction_response["local-state-delta"])
+    await client.send_transactions([signed_txn])
+    if not wait:
+        return tx_id
 
+    transaction_response = await wait_for_confirmation_async(client, tx_id)
+    _log_app_call(sender, tx_id, transaction_response)
     return tx_id
 
 
+def _log_app_call(sender: str, tx_id: str, transaction_response: Dict):
+    # the state deltas are only dumped at debug level
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    logger.debug(
+        "called app",
+        extra={
+            "txid": tx_id,
+            "sender": sender,
+            "app_id": transaction_response["txn"]["txn"]["apid"],
+            "global_state_delta": transaction_response.get("global-state-delta"),
+            "local_state_delta": transaction_response.get("local-state-delta"),
+        },
+    )
+
+
 # Read user local state
 def read_local_state(client, addr, app_id):
-    results = client.account_info(addr)
-    local_state = results["apps-local-state"][0]
-    ret = {}
-    for index in local_state:
-        if local_state[index] == app_id:
-            print(f"local_state of account {addr} for app_id {app_id}:")
+    return parse_local_state(client.account_info(addr), app_id)
+
 
+def parse_local_state(results, app_id):
+    addr = results.get("address")
+    ret = {}
+    # an account can be opted in to several apps, ours is not necessarily the first
+    for local_state in results.get("apps-local-state", []):
+        if local_state["id"] == app_id:
             # Check if there is a local state to even display
             if "key-value" not in local_state:
-                print("\t", "No local state")
+                logger.debug("no local state", extra={"address": addr, "app_id": app_id})
                 return ret
 
             for kv in local_state["key-value"]:
                 key = base64.b64decode(kv["key"])
                 value = kv["value"]
                 if "bytes" in value:
-                    value["bytes"] = base64.b64decode(value["bytes"])
-
+                    # (decoded into a new value, account_info may come from the shared AccountInfoCache)
                     # this is my adaptation to make it more user-friendly
                     # not sure if trying to decode from bytes without checks liek this might cause trouble
                     # for some local state
-                    ret[key.decode("utf-8")] = value["bytes"].decode("utf-8")
+                    ret[key.decode("utf-8")] = base64.b64decode(value["bytes"]).decode("utf-8")
 
-                # print("\t", key, value)
     return ret
 
 
@@ -236,40 +359,40 @@ def read_global_state(client, addr, app_id):
     ret = {}
     for app in apps_created:
         if app["id"] == app_id:
-            print(f"global_state for app_id {app_id}:")
-
             # Check if there is a global state to even display
             if "global-state" not in app["params"]:
-                print("\t", "No global state")
+                logger.debug("no global state", extra={"app_id": app_id})
                 return
 
             for kv in app["params"]["global-state"]:
                 key = base64.b64decode(kv["key"])
                 value = kv["value"]
                 if "bytes" in value:
-                    value["bytes"] = base64.b64decode(value["bytes"])
                     # my addition
-                    ret[key.decode("utf-8")] = value["bytes"]
-
-                print("\t", key, value)
+                    ret[key.decode("utf-8")] = base64.b64decode(value["bytes"])
     return ret
 
 
 def check_registrar_field_match(global_state: Dict, registrar_address: str):
     """ verifies if there is a registrar key in the global state that stores a given address"""
+    # (the registrar is not necessarily the first key of the global state)
     try:
-        for key, value in global_state.items():
-            if key == "registrar":
-                from_state = encoding.encode_address(value)
-                return registrar_address == from_state
-            else:
-                return False
-    except Exception as e:
-        print("error", e)
+        value = global_state.get("registrar")
+        return value is not None and registrar_address == encoding.encode_address(value)
+    except Exception:
+        logger.warning("registrar in global state is not an address", exc_info=True)
         return False
 
 
-def sign_and_send_tx(client, unsigned_tx, private_key):
+def is_opted_in_to_app(account_info, app_id: int):
+    return app_id in [a["id"] for a in account_info.get("apps-local-state", [])]
+
+
+def is_opted_in_to_asset(account_info, asset_id: int):
+    return asset_id in [a["asset-id"] for a in account_info.get("assets", [])]
+
+
+def sign_and_send_tx(client, unsigned_tx, private_key, confirmations=None):
     # Sign transaction
     signed_txn = unsigned_tx.sign(private_key)
     tx_id = signed_txn.transaction.get_txid()
@@ -277,5 +400,16 @@ def sign_and_send_tx(client, unsigned_tx, private_key):
     # Send transaction
     client.send_transactions([signed_txn])
 
-    # Await confirmation
+    # Await confirmation (through the shared ConfirmationEngine if given)
+    if confirmations is not None:
+        return confirmations.wait(tx_id, unsigned_tx.last_valid_round)
     return wait_for_confirmation(client, tx_id)
+
+
+async def sign_and_send_tx_async(client, unsigned_tx, private_key, confirmations=None):
+    signed_txn = unsigned_tx.sign(private_key)
+    tx_id = signed_txn.transaction.get_txid()
+    await client.send_transactions([signed_txn])
+    if confirmations is not None:
+        return await confirmations.wait_async(tx_id, unsigned_tx.last_valid_round)
+    return await wait_for_confirmation_async(client, tx_id)